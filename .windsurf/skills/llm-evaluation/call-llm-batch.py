@@ -11,6 +11,7 @@ from pathlib import Path
 from datetime import datetime, timezone
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from threading import Lock
+from llm_rate_limiter import get_rate_limiter, estimate_tokens, call_with_rate_limit, print_rate_limiter_stats
 
 UNKNOWN = '[UNKNOWN]'
 EFFORT_LEVELS = ['none', 'minimal', 'low', 'medium', 'high', 'xhigh']
@@ -440,13 +441,17 @@ def process_file(worker_id: int, file_idx: int, total_files: int, input_file: Pa
                 text_content = input_file.read_text(encoding='utf-8')
                 file_prompt = f"{prompt}\n\n---\n\n{text_content}"
             
+            rate_limiter = get_rate_limiter(args.model, provider)
+            estimated_tokens = estimate_tokens(file_prompt, api_params.get('max_tokens', 4096), 1 if image_data else 0)
             if provider == 'openai':
                 result = retry_with_backoff(
-                    lambda: call_openai(client, args.model, file_prompt, api_params, image_data, image_media_type)
+                    lambda: call_with_rate_limit(rate_limiter, estimated_tokens,
+                        lambda: call_openai(client, args.model, file_prompt, api_params, image_data, image_media_type))
                 )
             else:
                 result = retry_with_backoff(
-                    lambda: call_anthropic(client, args.model, file_prompt, api_params, method, image_data, image_media_type, use_caching)
+                    lambda: call_with_rate_limit(rate_limiter, estimated_tokens,
+                        lambda: call_anthropic(client, args.model, file_prompt, api_params, method, image_data, image_media_type, use_caching))
                 )
             
             # Write content to .md file
@@ -601,6 +606,7 @@ def main():
             except Exception as e:
                 print(f"[ERROR] Unhandled: {futures[future]}: {e}", file=sys.stderr)
     
+    print_rate_limiter_stats()
     print(f"Batch complete. Output: {args.output_folder}", file=sys.stderr)
 
 
@@ -11,8 +11,10 @@ from pathlib import Path
 from datetime import datetime, timezone
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from threading import Lock
+from llm_rate_limiter import get_rate_limiter, estimate_tokens, call_with_rate_limit, print_rate_limiter_stats
 
 UNKNOWN = '[UNKNOWN]'
+MAX_OUTPUT_TOKENS = 1024
 
 
 def load_api_keys(keys_file: Path) -> dict:
@@ -90,7 +92,7 @@ def call_openai(client, model: str, prompt: str):
     response = client.chat.completions.create(
         model=model,
         messages=[{"role": "user", "content": prompt}],
-        **{token_param: 1024}
+        **{token_param: MAX_OUTPUT_TOKENS}
     )
     return {
         "text": response.choices[0].message.content,
@@ -102,7 +104,7 @@ def call_openai(client, model: str, prompt: str):
 def call_anthropic(client, model: str, prompt: str):
     response = client.messages.create(
         model=model,
-        max_tokens=1024,
+        max_tokens=MAX_OUTPUT_TOKENS,
         messages=[{"role": "user", "content": prompt}]
     )
     return {
@@ -169,10 +171,12 @@ def process_answer(worker_id: int, a_idx: int, total: int, answer: dict,
     try:
         prompt = build_judge_prompt(question, reference, model_answer, judge_prompt_text)
         
+        rate_limiter = get_rate_limiter(args.model, provider)
+        estimated_tokens = estimate_tokens(prompt, MAX_OUTPUT_TOKENS)
         if provider == 'openai':
-            result = retry_with_backoff(lambda: call_openai(client, args.model, prompt))
+            result = retry_with_backoff(lambda: call_with_rate_limit(rate_limiter, estimated_tokens, lambda: call_openai(client, args.model, prompt)))
         else:
-            result = retry_with_backoff(lambda: call_anthropic(client, args.model, prompt))
+            result = retry_with_backoff(lambda: call_with_rate_limit(rate_limiter, estimated_tokens, lambda: call_anthropic(client, args.model, prompt)))
         
         evaluation = extract_json_from_response(result["text"])
         score = evaluation.get("score", 0)
@@ -494,6 +498,8 @@ def main():
                 except Exception as e:
                     print(f"[ERROR] {e}", file=sys.stderr)
     
+    print_rate_limiter_stats()
+    
     passed = sum(1 for r in results if r.get("passed"))
     failed = len(results) - passed
     avg_score = sum(r.get("score", 0) for r in results) / len(results) if results else 0
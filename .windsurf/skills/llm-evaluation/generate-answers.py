@@ -11,8 +11,10 @@ from pathlib import Path
 from datetime import datetime, timezone
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from threading import Lock
+from llm_rate_limiter import get_rate_limiter, estimate_tokens, call_with_rate_limit, print_rate_limiter_stats
 
 UNKNOWN = '[UNKNOWN]'
+MAX_OUTPUT_TOKENS = 2048
 
 
 def load_api_keys(keys_file: Path) -> dict:
@@ -90,7 +92,7 @@ def call_openai(client, model: str, prompt: str):
     response = client.chat.completions.create(
         model=model,
         messages=[{"role": "user", "content": prompt}],
-        **{token_param: 2048}
+        **{token_param: MAX_OUTPUT_TOKENS}
     )
     return {
         "text": response.choices[0].message.content,
@@ -102,7 +104,7 @@ def call_openai(client, model: str, prompt: str):
 def call_anthropic(client, model: str, prompt: str):
     response = client.messages.create(
         model=model,
-        max_tokens=2048,
+        max_tokens=MAX_OUTPUT_TOKENS,
         messages=[{"role": "user", "content": prompt}]
     )
     return {
@@ -159,10 +161,12 @@ def process_question(worker_id: int, q_idx: int, total: int, question: dict,
     try:
         prompt = build_answer_prompt(q_text, transcription, custom_prompt)
         
+        rate_limiter = get_rate_limiter(args.model, provider)
+        estimated_tokens = estimate_tokens(prompt, MAX_OUTPUT_TOKENS)
         if provider == 'openai':
-            result = retry_with_backoff(lambda: call_openai(client, args.model, prompt))
+            result = retry_with_backoff(lambda: call_with_rate_limit(rate_limiter, estimated_tokens, lambda: call_openai(client, args.model, prompt)))
         else:
-            result = retry_with_backoff(lambda: call_anthropic(client, args.model, prompt))
+            result = retry_with_backoff(lambda: call_with_rate_limit(rate_limiter, estimated_tokens, lambda: call_anthropic(client, args.model, prompt)))
         
         answer_data = {
             "question": q_text,
@@ -292,6 +296,8 @@ def main():
             except Exception as e:
                 print(f"[ERROR] {e}", file=sys.stderr)
     
+    print_rate_limiter_stats()
+    
     output = {
         "model": args.model,
         "total_answers": len(results),
@@ -11,8 +11,10 @@ from pathlib import Path
 from datetime import datetime, timezone
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from threading import Lock
+from llm_rate_limiter import get_rate_limiter, estimate_tokens, call_with_rate_limit, print_rate_limiter_stats
 
 UNKNOWN = '[UNKNOWN]'
+MAX_OUTPUT_TOKENS = 4096
 
 IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.webp'}
 TEXT_EXTENSIONS = {'.txt', '.md', '.json', '.py', '.html', '.xml', '.csv'}
@@ -151,7 +153,7 @@ def call_openai(client, model: str, prompt: str, image_data: str = None, image_m
     response = client.chat.completions.create(
         model=model,
         messages=[{"role": "user", "content": content}],
-        **{token_param: 4096}
+        **{token_param: MAX_OUTPUT_TOKENS}
     )
     
     return {
@@ -167,7 +169,7 @@ def call_anthropic(client, model: str, prompt: str, image_data: str = None, imag
         content.append({"type": "image", "source": {"type": "base64", "media_type": image_media_type, "data": image_data}})
     content.append({"type": "text", "text": prompt})
     
-    response = client.messages.create(model=model, max_tokens=4096, messages=[{"role": "user", "content": content}])
+    response = client.messages.create(model=model, max_tokens=MAX_OUTPUT_TOKENS, messages=[{"role": "user", "content": content}])
     
     return {
         "text": response.content[0].text,
@@ -213,10 +215,12 @@ def process_file(worker_id: int, file_idx: int, total: int, input_file: Path,
             text_content = input_file.read_text(encoding='utf-8')
             file_prompt = f"{prompt}\n\nContent:\n{text_content}"
         
+        rate_limiter = get_rate_limiter(args.model, provider)
+        estimated_tokens = estimate_tokens(file_prompt, MAX_OUTPUT_TOKENS, 1 if image_data else 0)
         if provider == 'openai':
-            result = retry_with_backoff(lambda: call_openai(client, args.model, file_prompt, image_data, image_media_type))
+            result = retry_with_backoff(lambda: call_with_rate_limit(rate_limiter, estimated_tokens, lambda: call_openai(client, args.model, file_prompt, image_data, image_media_type)))
         else:
-            result = retry_with_backoff(lambda: call_anthropic(client, args.model, file_prompt, image_data, image_media_type))
+            result = retry_with_backoff(lambda: call_with_rate_limit(rate_limiter, estimated_tokens, lambda: call_anthropic(client, args.model, file_prompt, image_data, image_media_type)))
         
         questions = extract_json_from_response(result["text"])
         
@@ -289,6 +293,8 @@ def main():
             except Exception as e:
                 print(f"[ERROR] {futures[future]}: {e}", file=sys.stderr)
     
+    print_rate_limiter_stats()
+    
     output = {
         "model": args.model,
         "total_questions": len(results),
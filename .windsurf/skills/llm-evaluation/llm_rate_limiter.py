@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+llm_rate_limiter.py - Loads the shared RPM/TPM rate limiter from src/llm_rate_limiter.py of this repository.
+
+The implementation lives in src/llm_rate_limiter.py (also used by src/openai_backendtools.py). This module only
+re-exports it and makes get_rate_limiter() read the limits from the model-registry.json in this folder.
+
+Usage (from a script in the same folder):
+  from llm_rate_limiter import get_rate_limiter, estimate_tokens, call_with_rate_limit
+  limiter = get_rate_limiter(model, deployment=provider)
+  result = call_with_rate_limit(limiter, estimate_tokens(prompt, max_output_tokens=4096), lambda: call_openai(...))
+"""
+
+import importlib.util, sys
+from pathlib import Path
+
+SHARED_MODULE_NAME = 'llm_rate_limiter_shared'
+SHARED_MODULE_PATH = Path(__file__).resolve().parents[3] / 'src' / 'llm_rate_limiter.py'
+REGISTRY_PATH = Path(__file__).resolve().parent / 'model-registry.json'
+
+if SHARED_MODULE_NAME not in sys.modules:
+    if not SHARED_MODULE_PATH.exists():
+        raise ImportError(f"Shared rate limiter not found: {SHARED_MODULE_PATH}")
+    _spec = importlib.util.spec_from_file_location(SHARED_MODULE_NAME, SHARED_MODULE_PATH)
+    sys.modules[SHARED_MODULE_NAME] = importlib.util.module_from_spec(_spec)
+    _spec.loader.exec_module(sys.modules[SHARED_MODULE_NAME])
+_shared = sys.modules[SHARED_MODULE_NAME]
+
+TokenBucket = _shared.TokenBucket
+RateLimiter = _shared.RateLimiter
+estimate_tokens = _shared.estimate_tokens
+get_used_tokens = _shared.get_used_tokens
+call_with_rate_limit = _shared.call_with_rate_limit
+print_rate_limiter_stats = _shared.print_rate_limiter_stats
+
+_registry = None
+
+
+def get_rate_limiter(model: str, deployment: str = 'default', registry: dict = None) -> RateLimiter:
+    """Return the shared limiter for (deployment, model), configured from this folder's model-registry.json. None if not configured."""
+    global _registry
+    if registry is None:
+        if _registry is None:
+            _registry = {'rate_limits': _shared.load_rate_limits(registry_path=str(REGISTRY_PATH))}
+        registry = _registry
+    return _shared.get_rate_limiter(model, deployment, registry)
@@ -14,10 +14,12 @@ import json
 import argparse
 from pathlib import Path
 from datetime import datetime, timezone
+from llm_rate_limiter import get_rate_limiter, estimate_tokens, call_with_rate_limit
 
 AUDIO_EXTENSIONS = {'.mp3', '.wav', '.m4a', '.ogg', '.flac', '.webm', '.mp4', '.mpeg', '.mpga'}
 DEFAULT_MODEL = 'whisper-1'
 DEFAULT_FORMAT_MODEL = 'gpt-4o-mini'
+FORMAT_MAX_OUTPUT_TOKENS = 8192
 
 FORMATTING_PROMPT = """You are a transcript editor. Format the provided raw transcript into clean, readable markdown.
 
@@ -128,7 +130,7 @@ def format_transcript(text: str, api_key: str, model: str = DEFAULT_FORMAT_MODEL
     
     payload = {
         'model': model,
-        'max_tokens': 8192,
+        'max_tokens': FORMAT_MAX_OUTPUT_TOKENS,
         'messages': [
             {'role': 'system', 'content': prompt},
             {'role': 'user', 'content': f"Format this transcript:\n\n{text}"}
@@ -168,7 +170,8 @@ def process_single(input_path: Path, output_path: Path, api_keys: dict,
     
     # Transcribe
     response_format = 'verbose_json' if verbose else 'text'
-    transcript = transcribe_audio(input_path, api_key, model, language, response_format)
+    transcript = call_with_rate_limit(get_rate_limiter(model, 'openai'), 0,
+        lambda: transcribe_audio(input_path, api_key, model, language, response_format))
     
     text = transcript['text']
     format_tokens = {'input': 0, 'output': 0}
@@ -177,7 +180,9 @@ def process_single(input_path: Path, output_path: Path, api_keys: dict,
     if do_format and text.strip():
         if verbose:
             print(f"  Formatting with {format_model}...")
-        format_result = format_transcript(text, api_key, format_model, format_prompt)
+        estimated_tokens = estimate_tokens((format_prompt or FORMATTING_PROMPT) + text, FORMAT_MAX_OUTPUT_TOKENS)
+        format_result = call_with_rate_limit(get_rate_limiter(format_model, 'openai'), estimated_tokens,
+            lambda: format_transcript(text, api_key, format_model, format_prompt))
         text = format_result['content']
         format_tokens = {
             'input': format_result['input_tokens'],
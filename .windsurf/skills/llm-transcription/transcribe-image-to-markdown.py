@@ -24,6 +24,7 @@ from pathlib import Path
 from datetime import datetime, timezone
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from threading import Lock
+from llm_rate_limiter import get_rate_limiter, estimate_tokens, call_with_rate_limit, print_rate_limiter_stats
 
 EFFORT_LEVELS = ['none', 'minimal', 'low', 'medium', 'high', 'xhigh']
 IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.webp'}
@@ -311,19 +312,23 @@ def call_anthropic_vision(model: str, image_data: str, media_type: str,
 def call_vision_api(model: str, image_data: str, media_type: str, prompt: str,
                     api_keys: dict, api_params: dict, provider: str) -> dict:
     """Call appropriate vision API based on provider."""
+    rate_limiter = get_rate_limiter(model, provider)
+    estimated_tokens = estimate_tokens(prompt, api_params.get('max_tokens', 8192), image_count=1)
     if provider == 'anthropic':
         api_key = api_keys.get('ANTHROPIC_API_KEY')
         if not api_key:
             raise ValueError("ANTHROPIC_API_KEY not found")
         return retry_with_backoff(
-            lambda: call_anthropic_vision(model, image_data, media_type, prompt, api_key, api_params)
+            lambda: call_with_rate_limit(rate_limiter, estimated_tokens,
+                lambda: call_anthropic_vision(model, image_data, media_type, prompt, api_key, api_params))
         )
     else:
         api_key = api_keys.get('OPENAI_API_KEY')
         if not api_key:
             raise ValueError("OPENAI_API_KEY not found")
         return retry_with_backoff(
-            lambda: call_openai_vision(model, image_data, media_type, prompt, api_key, api_params)
+            lambda: call_with_rate_limit(rate_limiter, estimated_tokens,
+                lambda: call_openai_vision(model, image_data, media_type, prompt, api_key, api_params))
         )
 
 
@@ -746,6 +751,8 @@ def main():
                 except Exception as e:
                     results.append({'input': str(futures[future]), 'error': str(e)})
     
+    print_rate_limiter_stats()
+    
     if args.json:
         print(json.dumps(results, indent=2))
     else:
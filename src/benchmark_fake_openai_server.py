@@ -0,0 +1,177 @@
+import argparse
+import contextlib
+import json
+import os
+import subprocess
+import sys
+import time
+from openai_backendtools import *
+from fake_openai_server import FakeOpenAIServer
+if sys.platform == 'win32':
+  import ctypes
+  from ctypes import wintypes
+else:
+  import resource
+
+# Benchmark: toolkit functions against the local fake OpenAI server (fake_openai_server.py) at 1k / 10k / 100k objects
+#   replicate:     replicate_vector_store_content() from 2 source into 2 target vector stores (adds and removals)
+#   vector_stores: get_all_vector_stores() with one unlistable vector store and one broken pagination cursor
+#   cleanup:       delete_failed_and_unused_files() with 5% failed and 1/3 unused files
+# Reports wall time, request count (by endpoint) and peak RSS. Every case runs in its own process, so that the peak RSS
+# of one case is not inflated by the previous ones. The process also hosts the fake server and the seeded objects:
+# 'RSS after seeding' is the baseline before the function runs.
+#
+# Usage (from the repo root):
+#   python src/benchmark_fake_openai_server.py
+#   python src/benchmark_fake_openai_server.py --sizes 1000,10000 --cases replicate --latency-ms 5 --rate-limit-every 50
+
+BENCHMARK_CASES = ['replicate', 'vector_stores', 'cleanup']
+BENCHMARK_SIZES = [1000, 10000, 100000]
+
+# ----------------------------------------------------- START: Memory usage ---------------------------------------------------
+
+if sys.platform == 'win32':
+  # Result of GetProcessMemoryInfo() (psapi.h)
+  class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+    _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD), ('PeakWorkingSetSize', ctypes.c_size_t), ('WorkingSetSize', ctypes.c_size_t),
+      ('QuotaPeakPagedPoolUsage', ctypes.c_size_t), ('QuotaPagedPoolUsage', ctypes.c_size_t), ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t),
+      ('QuotaNonPagedPoolUsage', ctypes.c_size_t), ('PagefileUsage', ctypes.c_size_t), ('PeakPagefileUsage', ctypes.c_size_t)]
+
+# Returns (current RSS, peak RSS) of this process in bytes. Values are None where the platform doesn't provide them.
+def get_memory_usage():
+  if sys.platform == 'win32':
+    counters = PROCESS_MEMORY_COUNTERS(); counters.cb = ctypes.sizeof(counters)
+    get_process_memory_info = ctypes.windll.psapi.GetProcessMemoryInfo
+    get_process_memory_info.argtypes = [wintypes.HANDLE, ctypes.POINTER(PROCESS_MEMORY_COUNTERS), wintypes.DWORD]
+    if not get_process_memory_info(ctypes.windll.kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb): return None, None
+    return counters.WorkingSetSize, counters.PeakWorkingSetSize
+  peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+  # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+  peak_rss = peak_rss if sys.platform == 'darwin' else peak_rss * 1024
+  current_rss = None
+  try:
+    with open('/proc/self/statm', 'r') as f: current_rss = int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+  except Exception: pass
+  return current_rss, peak_rss
+
+# ----------------------------------------------------- END: Memory usage -----------------------------------------------------
+
+# ----------------------------------------------------- START: Benchmark cases ------------------------------------------------
+
+# Every case seeds the server with about 'object_count' objects and returns a function that runs the benchmarked call
+# with a client and returns a one-line summary of the result.
+
+# 'object_count' files: the first 90% are split between 2 source vector stores, the last 10% are extra files in target 2.
+# Target 1 is empty, target 2 already has the files of source 1. Adds 1.35 x object_count and removes 0.1 x object_count vector store files.
+def seed_replicate_case(server, object_count):
+  files = server.seed_files(object_count)
+  source_1, source_2, target_1, target_2 = server.seed_vector_stores(4, name_pattern="replication_{i}")
+  source_count = object_count * 9 // 10
+  server.add_files_to_vector_store(source_1['id'], [f['id'] for f in files[:source_count//2]])
+  server.add_files_to_vector_store(source_2['id'], [f['id'] for f in files[source_count//2:source_count]])
+  server.add_files_to_vector_store(target_2['id'], [f['id'] for f in files[:source_count//2] + files[source_count:]])
+  def run(client):
+    added_file_ids, removed_file_ids, errors = replicate_vector_store_content(client, [source_1['id'], source_2['id']], [target_1['id'], target_2['id']], remove_target_files_not_in_sources=True)
+    return f"{sum(len(x) for x in added_file_ids):,} files added, {sum(len(x) for x in removed_file_ids):,} removed, {sum(len(x) for x in errors):,} errors"
+  return run
+
+# 'object_count' vector stores. The one in the middle can't be listed, and one page boundary is a broken cursor.
+def seed_vector_stores_case(server, object_count):
+  vector_stores = server.seed_vector_stores(object_count)
+  server.unlistable_vector_store_ids.add(vector_stores[object_count // 2]['id'])
+  # the last vector store of the k-th page in default (desc) order
+  k = max(1, object_count // (4 * PAGINATION_MAX_LIMIT))
+  server.broken_cursor_ids.add(vector_stores[object_count - k * PAGINATION_MAX_LIMIT]['id'])
+  def run(client):
+    stats = PaginationStats()
+    all_vector_stores = get_all_vector_stores(client, known_broken_vector_stores_path=None, stats=stats)
+    return f"{len(all_vector_stores):,} of {object_count:,} vector stores listed ({stats.pages} pages)"
+  return run
+
+# 'object_count' files, every 20th failed. Files with index divisible by 3 are not used, the others are spread over
+# one vector store per 1000 files.
+def seed_cleanup_case(server, object_count):
+  files = server.seed_files(object_count, status_function=lambda i: 'failed' if i % 20 == 0 else 'processed')
+  vector_stores = server.seed_vector_stores(max(1, object_count // 1000))
+  used_file_ids = [f['id'] for i, f in enumerate(files) if i % 3 != 0]
+  for i, vector_store in enumerate(vector_stores):
+    server.add_files_to_vector_store(vector_store['id'], used_file_ids[i::len(vector_stores)])
+  def run(client):
+    delete_failed_and_unused_files(client)
+    return f"{object_count - len(server.files):,} of {object_count:,} files deleted"
+  return run
+
+BENCHMARK_CASE_FUNCTIONS = {'replicate': seed_replicate_case, 'vector_stores': seed_vector_stores_case, 'cleanup': seed_cleanup_case}
+
+# Runs one case in this process and returns the measurements as dictionary.
+# The output of the benchmarked function is discarded unless verbose=True.
+def run_case(case, object_count, latency_seconds=0.0, rate_limit_every=0, verbose=False):
+  with FakeOpenAIServer(latency_seconds=latency_seconds, rate_limit_every=rate_limit_every) as server:
+    run = BENCHMARK_CASE_FUNCTIONS[case](server, object_count)
+    client = server.create_client()
+    rss_after_seeding, _ = get_memory_usage()
+    server.reset_counters()
+    start_time = time.perf_counter()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(sys.stdout if verbose else devnull):
+      summary = run(client)
+    elapsed_seconds = time.perf_counter() - start_time
+    stats = server.get_stats()
+  _, peak_rss = get_memory_usage()
+  return {'case': case, 'objects': object_count, 'seconds': elapsed_seconds, 'summary': summary, 'rss_after_seeding': rss_after_seeding, 'peak_rss': peak_rss, **stats}
+
+# Runs one case in a child process (this script with --child) and returns its measurements
+def run_case_in_child_process(case, object_count, latency_seconds, rate_limit_every):
+  command = [sys.executable, os.path.abspath(__file__), '--child', '--cases', case, '--sizes', str(object_count), '--latency-ms', str(latency_seconds * 1000), '--rate-limit-every', str(rate_limit_every)]
+  completed = subprocess.run(command, capture_output=True, text=True)
+  if completed.returncode != 0: raise RuntimeError(f"Benchmark case '{case}' with {object_count:,} objects failed:\n{completed.stderr[-2000:]}")
+  return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def format_optional_filesize(num_bytes):
+  return format_filesize(num_bytes) if num_bytes is not None else "n/a"
+
+def print_case_result(result, indentation=2):
+  requests_per_second = result['requests'] / result['seconds'] if result['seconds'] > 0 else 0.0
+  print(f"{' '*indentation}{result['summary']}")
+  print(f"{' '*indentation}{format_milliseconds(int(result['seconds'] * 1000))}, {result['requests']:,} requests ({requests_per_second:,.0f} requests/sec, {result['rate_limited']:,} rate limited, {result['not_found']:,} not found)")
+  print(f"{' '*indentation}Peak RSS: {format_optional_filesize(result['peak_rss'])} (after seeding: {format_optional_filesize(result['rss_after_seeding'])})")
+  by_endpoint = sorted(result['requests_by_endpoint'].items(), key=lambda x: -x[1])
+  print(f"{' '*indentation}Requests: {', '.join([f'{endpoint}: {count:,}' for endpoint, count in by_endpoint])}")
+
+def run_benchmark(cases=BENCHMARK_CASES, sizes=BENCHMARK_SIZES, latency_seconds=0.0, rate_limit_every=0):
+  print(f"Fake OpenAI server: latency {latency_seconds * 1000:.0f} ms, {f'every {rate_limit_every}th request rate limited' if rate_limit_every else 'no rate limiting'}")
+  results = []; runs = [(case, size) for case in cases for size in sizes]
+  for i, (case, size) in enumerate(runs, 1):
+    print(f"[ {i} / {len(runs)} ] {case}, {size:,} objects...")
+    result = run_case_in_child_process(case, size, latency_seconds, rate_limit_every)
+    print_case_result(result, 2)
+    results.append(result)
+
+  print(f"\n{'Case':<15} {'Objects':>9} {'Wall time':>11} {'Requests':>10} {'Req/sec':>9} {'Peak RSS':>10}")
+  for result in results:
+    requests_per_second = result['requests'] / result['seconds'] if result['seconds'] > 0 else 0.0
+    print(f"{result['case']:<15} {result['objects']:>9,} {result['seconds']:>9.2f} s {result['requests']:>10,} {requests_per_second:>9,.0f} {format_optional_filesize(result['peak_rss']):>10}")
+  return results
+
+# ----------------------------------------------------- END: Benchmark cases --------------------------------------------------
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description="Benchmark toolkit functions against a local fake OpenAI server")
+  parser.add_argument('--cases', default=','.join(BENCHMARK_CASES), help=f"Comma-separated cases: {', '.join(BENCHMARK_CASES)}")
+  parser.add_argument('--sizes', default=','.join(str(s) for s in BENCHMARK_SIZES), help="Comma-separated object counts")
+  parser.add_argument('--latency-ms', type=float, default=0.0, help="Latency added to every request")
+  parser.add_argument('--rate-limit-every', type=int, default=0, help="Answer every n-th request with HTTP 429 (0 = off)")
+  parser.add_argument('--verbose', action='store_true', help="Run in this process and show the output of the benchmarked functions")
+  parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+  args = parser.parse_args()
+  cases = [c.strip() for c in args.cases.split(',') if c.strip()]
+  sizes = [int(s) for s in args.sizes.split(',') if s.strip()]
+  for case in cases:
+    if case not in BENCHMARK_CASE_FUNCTIONS: parser.error(f"Invalid case '{case}'. Must be one of: {', '.join(BENCHMARK_CASES)}")
+
+  if args.child:
+    print(json.dumps(run_case(cases[0], sizes[0], args.latency_ms / 1000, args.rate_limit_every)))
+  elif args.verbose:
+    for case in cases:
+      for size in sizes: print_case_result(run_case(case, size, args.latency_ms / 1000, args.rate_limit_every, verbose=True))
+  else:
+    run_benchmark(cases, sizes, args.latency_ms / 1000, args.rate_limit_every)
@@ -0,0 +1,78 @@
+import random
+import time
+from types import SimpleNamespace
+from openai_backendtools import *
+
+# Benchmark: merging vector store file memberships into one list of files (get_all_files_used_by_vector_stores)
+# Compares the previous merge (linear search for every repeated file ID) with merge_vector_store_file_memberships().
+# Uses a synthetic in-memory dataset, no API calls.
+
+# ----------------------------------------------------- START: Benchmark ------------------------------------------------------
+
+# Creates 'vector_store_count' vector stores holding 'membership_count' vector store files in total, drawn from 'unique_file_count' file IDs
+def create_synthetic_vector_stores_with_files(vector_store_count, membership_count, unique_file_count, seed=42):
+  rnd = random.Random(seed)
+  file_ids = [f"file-{i:012d}" for i in range(unique_file_count)]
+  files_per_vector_store = membership_count // vector_store_count
+  vector_stores_with_files = []
+  for i in range(vector_store_count):
+    vector_store = SimpleNamespace(id=f"vs_{i:08d}", name=f"vector-store-{i:05d}")
+    vector_store_files = [SimpleNamespace(id=file_id, status='completed', vector_store_id=vector_store.id) for file_id in rnd.sample(file_ids, files_per_vector_store)]
+    vector_stores_with_files.append((vector_store, vector_store_files))
+  return vector_stores_with_files
+
+# Previous implementation of the merge in get_all_files_used_by_vector_stores(), kept here as reference
+def merge_vector_store_file_memberships_legacy(vector_stores_with_files):
+  all_files = []
+  processed_file_ids = set()
+  for vector_store, vector_store_files in vector_stores_with_files:
+    vector_store_name = getattr(vector_store, 'name', None)
+    vector_store_id = getattr(vector_store, 'id', None)
+    for file in vector_store_files:
+      file_status = getattr(file, 'status', None)
+      if file_status in ['failed', 'cancelled']: continue
+      if file.id not in processed_file_ids:
+        setattr(file, 'vector_store_id', vector_store_id)
+        setattr(file, 'vector_store_name', vector_store_name)
+        all_files.append(file)
+        processed_file_ids.add(file.id)
+      else:
+        existing_file = next((f for f in all_files if f.id == file.id), None)
+        if not existing_file: continue
+        existing_vector_store_id = getattr(existing_file, 'vector_store_id', None)
+        existing_vector_store_name = getattr(existing_file, 'vector_store_name', None)
+        existing_vector_store_id = (existing_vector_store_id + f", {vector_store_id}") if existing_vector_store_id else vector_store_id
+        existing_vector_store_name = (existing_vector_store_name + f", {vector_store_name}") if existing_vector_store_name else vector_store_name
+        setattr(existing_file, 'vector_store_id', existing_vector_store_id)
+        setattr(existing_file, 'vector_store_name', existing_vector_store_name)
+  return all_files
+
+# Runs the merge function on a fresh copy of the dataset and returns (merged files, elapsed seconds)
+def time_merge(merge_function, vector_store_count, membership_count, unique_file_count):
+  vector_stores_with_files = create_synthetic_vector_stores_with_files(vector_store_count, membership_count, unique_file_count)
+  start_time = time.perf_counter()
+  all_files = merge_function(vector_stores_with_files)
+  return all_files, time.perf_counter() - start_time
+
+def run_benchmark(vector_store_count, membership_count, unique_file_count):
+  print(f"Dataset: {vector_store_count:,} vector stores, {membership_count:,} memberships, {unique_file_count:,} unique files")
+
+  new_files, new_seconds = time_merge(merge_vector_store_file_memberships, vector_store_count, membership_count, unique_file_count)
+  print(f"  merge_vector_store_file_memberships: {len(new_files):,} files in {new_seconds:.3f} secs")
+
+  print(f"  Running previous merge (this can take a while)...")
+  legacy_files, legacy_seconds = time_merge(merge_vector_store_file_memberships_legacy, vector_store_count, membership_count, unique_file_count)
+  print(f"  previous merge: {len(legacy_files):,} files in {legacy_seconds:.3f} secs")
+
+  # Both merges must produce the same files in the same order with the same comma-separated compatibility attributes
+  same_result = [(f.id, f.vector_store_id, f.vector_store_name) for f in new_files] == [(f.id, f.vector_store_id, f.vector_store_name) for f in legacy_files]
+  print(f"  Same result: {same_result}")
+  print(f"  Speedup: {legacy_seconds / new_seconds:,.1f}x")
+
+# ----------------------------------------------------- END: Benchmark --------------------------------------------------------
+
+if __name__ == '__main__':
+  vector_store_count = 500
+  membership_count = 100000
+  unique_file_count = 20000
+  run_benchmark(vector_store_count, membership_count, unique_file_count)
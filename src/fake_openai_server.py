@@ -0,0 +1,489 @@
+import email.parser
+import email.policy
+import itertools
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+import openai
+
+# Local stand-in for the OpenAI REST API, used by benchmark_fake_openai_server.py to measure the toolkit functions without
+# network, quotas or costs. Runs an HTTP server in a background thread of the calling process and implements the
+# list / create / retrieve / delete endpoints of files (and file content), vector stores, vector store files (and their chunks), file batches, assistants and evals
+# with cursor pagination ('after', 'limit', 'order'). Objects are kept in memory and can be seeded directly (without requests).
+#
+# Faults that can be configured to reproduce the behavior of real endpoints:
+#   latency_seconds:            Delay added to every request (requests are served in parallel, one thread per connection)
+#   page_size_limit:            Maximum items per page of all list endpoints except files (the real API accepts up to 100)
+#   files_page_size_limit:      Maximum items per page of the files list endpoint (the real API accepts up to 10000)
+#   rate_limit_every:           Every n-th request is answered with HTTP 429 and 'retry-after-ms' = rate_limit_retry_after_ms (0 = off)
+#   broken_cursor_ids:          IDs that return HTTP 404 when used as 'after' cursor
+#   unlistable_vector_store_ids: Vector stores that make every vector store list page containing them return HTTP 404
+#
+# Example:
+#   with FakeOpenAIServer(latency_seconds=0.01) as server:
+#     server.seed_files(1000)
+#     client = server.create_client()
+#     print(len(client.files.list(limit=10000).data), server.request_count)  # -> 1000 1
+
+# ----------------------------------------------------- START: Fake OpenAI server ---------------------------------------------
+
+FAKE_PAGE_SIZE_LIMIT = 100
+FAKE_FILES_PAGE_SIZE_LIMIT = 10000
+FAKE_DEFAULT_PAGE_SIZE = 20
+
+# Objects of one type in creation order. Deleted objects leave a tombstone in 'ids', so that they can still be used as
+# 'after' cursor by a listing that is in progress. Tombstones are removed when they outnumber the remaining objects.
+class FakeCollection:
+  def __init__(self):
+    self.items = {}
+    self.ids = []
+    self.positions = {}
+    self.tombstones = 0
+
+  def __len__(self):
+    return len(self.items)
+
+  def add(self, item):
+    self.positions[item['id']] = len(self.ids)
+    self.ids.append(item['id'])
+    self.items[item['id']] = item
+    return item
+
+  def get(self, id):
+    return self.items.get(id)
+
+  def remove(self, id):
+    item = self.items.pop(id, None)
+    if item is None: return None
+    self.tombstones += 1
+    if self.tombstones > 1000 and self.tombstones > len(self.items): self.compact()
+    return item
+
+  def compact(self):
+    self.ids = [id for id in self.ids if id in self.items]
+    self.positions = {id: position for position, id in enumerate(self.ids)}
+    self.tombstones = 0
+
+  # Returns (items, has_more) of the page after the cursor 'after' (None = first page). Raises KeyError if 'after' is unknown.
+  def list_page(self, after=None, limit=FAKE_DEFAULT_PAGE_SIZE, order='desc', predicate=None):
+    if order == 'asc':
+      start = self.positions[after] + 1 if after else 0
+      candidate_ids = itertools.islice(self.ids, start, None)
+    else:
+      end = self.positions[after] if after else len(self.ids)
+      candidate_ids = (self.ids[position] for position in range(end - 1, -1, -1))
+    page = []
+    for id in candidate_ids:
+      item = self.items.get(id)
+      if item is None or (predicate and not predicate(item)): continue
+      if len(page) == limit: return page, True
+      page.append(item)
+    return page, False
+
+# Raised by endpoint handlers, turned into an OpenAI-style error response
+class FakeAPIError(Exception):
+  def __init__(self, status_code, message, error_type='invalid_request_error', code=None, headers=None):
+    super().__init__(message)
+    self.status_code = status_code
+    self.message = message
+    self.error_type = error_type
+    self.code = code
+    self.headers = headers or {}
+
+class FakeOpenAIServer:
+  def __init__(self, latency_seconds=0.0, page_size_limit=FAKE_PAGE_SIZE_LIMIT, files_page_size_limit=FAKE_FILES_PAGE_SIZE_LIMIT, rate_limit_every=0, rate_limit_retry_after_ms=100, broken_cursor_ids=None, unlistable_vector_store_ids=None, host='127.0.0.1', port=0):
+    self.latency_seconds = latency_seconds
+    self.page_size_limit = page_size_limit
+    self.files_page_size_limit = files_page_size_limit
+    self.rate_limit_every = rate_limit_every
+    self.rate_limit_retry_after_ms = rate_limit_retry_after_ms
+    self.broken_cursor_ids = set(broken_cursor_ids or [])
+    self.unlistable_vector_store_ids = set(unlistable_vector_store_ids or [])
+    self.host = host
+    self.port = port
+    self.lock = threading.Lock()
+    self.files = FakeCollection()
+    self.file_contents = {}
+    self.vector_stores = FakeCollection()
+    self.vector_store_files = {}
+    self.vector_store_file_chunks = {}
+    self.file_batches = {}
+    self.assistants = FakeCollection()
+    self.evals = FakeCollection()
+    self.id_counter = itertools.count(1)
+    self.httpd = None
+    self.thread = None
+    self.routes = [
+      ('GET', r"/files", self.list_files), ('POST', r"/files", self.create_file),
+      ('GET', r"/files/([^/]+)", self.retrieve_file), ('DELETE', r"/files/([^/]+)", self.delete_file),
+      ('GET', r"/files/([^/]+)/content", self.retrieve_file_content),
+      ('GET', r"/vector_stores", self.list_vector_stores), ('POST', r"/vector_stores", self.create_vector_store),
+      ('GET', r"/vector_stores/([^/]+)", self.retrieve_vector_store), ('DELETE', r"/vector_stores/([^/]+)", self.delete_vector_store),
+      ('GET', r"/vector_stores/([^/]+)/files", self.list_vector_store_files), ('POST', r"/vector_stores/([^/]+)/files", self.create_vector_store_file),
+      ('GET', r"/vector_stores/([^/]+)/files/([^/]+)", self.retrieve_vector_store_file), ('DELETE', r"/vector_stores/([^/]+)/files/([^/]+)", self.delete_vector_store_file),
+      ('GET', r"/vector_stores/([^/]+)/files/([^/]+)/content", self.retrieve_vector_store_file_content),
+      ('POST', r"/vector_stores/([^/]+)/file_batches", self.create_file_batch), ('GET', r"/vector_stores/([^/]+)/file_batches/([^/]+)", self.retrieve_file_batch),
+      ('GET', r"/assistants", self.list_assistants), ('POST', r"/assistants", self.create_assistant),
+      ('GET', r"/assistants/([^/]+)", self.retrieve_assistant), ('DELETE', r"/assistants/([^/]+)", self.delete_assistant),
+      ('GET', r"/evals", self.list_evals), ('POST', r"/evals", self.create_eval),
+      ('GET', r"/evals/([^/]+)", self.retrieve_eval), ('DELETE', r"/evals/([^/]+)", self.delete_eval),
+    ]
+    self.routes = [(method, re.compile(r"^/v1" + pattern + r"$"), pattern.replace("([^/]+)", "{id}"), handler) for method, pattern, handler in self.routes]
+    self.reset_counters()
+
+  # ----- Server lifecycle -----
+
+  def start(self):
+    server = self
+    class RequestHandler(FakeOpenAIRequestHandler): fake_server = server
+    self.httpd = ThreadingHTTPServer((self.host, self.port), RequestHandler)
+    self.httpd.daemon_threads = True
+    self.port = self.httpd.server_address[1]
+    self.thread = threading.Thread(target=self.httpd.serve_forever, name='FakeOpenAIServer', daemon=True)
+    self.thread.start()
+    return self
+
+  def stop(self):
+    if not self.httpd: return
+    self.httpd.shutdown()
+    self.httpd.server_close()
+    self.thread.join()
+    self.httpd = None; self.thread = None
+
+  def __enter__(self):
+    return self.start()
+
+  def __exit__(self, exc_type, exc_value, traceback):
+    self.stop()
+
+  @property
+  def base_url(self):
+    return f"http://{self.host}:{self.port}/v1"
+
+  # Returns an OpenAI client for this server. SDK retries are off by default, so that retries are done (and counted) by the toolkit.
+  def create_client(self, max_retries=0, **kwargs):
+    return openai.OpenAI(api_key='fake-api-key', base_url=self.base_url, max_retries=max_retries, **kwargs)
+
+  # ----- Request counters -----
+
+  def reset_counters(self):
+    with self.lock:
+      self.request_count = 0
+      self.requests_by_endpoint = {}
+      self.rate_limited_count = 0
+      self.not_found_count = 0
+
+  # Counts the request and returns True if it has to be answered with HTTP 429
+  def count_request(self, endpoint):
+    with self.lock:
+      self.request_count += 1
+      self.requests_by_endpoint[endpoint] = self.requests_by_endpoint.get(endpoint, 0) + 1
+      if self.rate_limit_every and self.request_count % self.rate_limit_every == 0:
+        self.rate_limited_count += 1
+        return True
+      return False
+
+  def get_stats(self):
+    with self.lock:
+      return {'requests': self.request_count, 'rate_limited': self.rate_limited_count, 'not_found': self.not_found_count, 'requests_by_endpoint': dict(self.requests_by_endpoint)}
+
+  # Handles one request. Returns (status_code, headers, body as dict).
+  def handle(self, method, path, query, body, content_type):
+    route = next(((pattern, handler, match) for route_method, regex, pattern, handler in self.routes if route_method == method for match in [regex.match(path)] if match), None)
+    endpoint = f"{method} {route[0] if route else path}"
+    rate_limited = self.count_request(endpoint)
+    if self.latency_seconds: time.sleep(self.latency_seconds)
+    try:
+      if rate_limited:
+        headers = {'retry-after-ms': str(self.rate_limit_retry_after_ms), 'x-ratelimit-remaining-requests': '0', 'x-ratelimit-reset-requests': f"{self.rate_limit_retry_after_ms}ms"}
+        raise FakeAPIError(429, "Rate limit reached for requests", error_type='requests', code='rate_limit_exceeded', headers=headers)
+      if not route: raise FakeAPIError(404, f"Invalid URL ({method} {path})")
+      _, handler, match = route
+      params = {key: values[-1] for key, values in parse_qs(query).items()}
+      if method == 'POST': params['body'] = self.parse_body(body, content_type)
+      with self.lock: return 200, {}, handler(*match.groups(), **params)
+    except FakeAPIError as e:
+      if e.status_code == 404:
+        with self.lock: self.not_found_count += 1
+      return e.status_code, e.headers, {'error': {'message': e.message, 'type': e.error_type, 'param': None, 'code': e.code}}
+    except Exception as e:
+      return 500, {}, {'error': {'message': f"{type(e).__name__}: {e}", 'type': 'server_error', 'param': None, 'code': None}}
+
+  def parse_body(self, body, content_type):
+    if not body: return {}
+    if content_type.startswith('multipart/form-data'):
+      message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(b"Content-Type: " + content_type.encode() + b"\r\n\r\n" + body)
+      fields = {}
+      for part in message.iter_parts():
+        name = part.get_param('name', header='content-disposition')
+        payload = part.get_payload(decode=True) or b''
+        fields[name] = {'filename': part.get_filename(), 'bytes': len(payload), 'content': payload} if part.get_filename() else payload.decode('utf-8')
+      return fields
+    return json.loads(body)
+
+  # ----- Helpers -----
+
+  def new_id(self, prefix):
+    return f"{prefix}{next(self.id_counter):012d}"
+
+  def list_response(self, items, has_more):
+    return {'object': 'list', 'data': items, 'first_id': items[0]['id'] if items else None, 'last_id': items[-1]['id'] if items else None, 'has_more': has_more}
+
+  def list_collection(self, collection, name, max_limit, after=None, limit=None, order='desc', predicate=None, **kwargs):
+    if after in self.broken_cursor_ids: raise FakeAPIError(404, f"No {name} found with id '{after}'.")
+    limit = min(int(limit or FAKE_DEFAULT_PAGE_SIZE), max_limit)
+    try: items, has_more = collection.list_page(after, limit, order, predicate)
+    except KeyError: raise FakeAPIError(404, f"No {name} found with id '{after}'.")
+    return items, has_more
+
+  def get_or_404(self, collection, id, name):
+    item = collection.get(id)
+    if item is None: raise FakeAPIError(404, f"No {name} found with id '{id}'.")
+    return item
+
+  def deleted_response(self, id, object_type):
+    return {'id': id, 'object': object_type, 'deleted': True}
+
+  def get_vector_store_files_collection(self, vector_store_id):
+    self.get_or_404(self.vector_stores, vector_store_id, 'vector store')
+    return self.vector_store_files[vector_store_id]
+
+  # Keeps 'file_counts' and 'usage_bytes' of a vector store up to date when one of its files is added (sign=1) or removed (sign=-1)
+  def update_vector_store_file_counts(self, vector_store_file, sign):
+    vector_store = self.vector_stores.get(vector_store_file['vector_store_id'])
+    vector_store['file_counts'][vector_store_file['status']] = vector_store['file_counts'].get(vector_store_file['status'], 0) + sign
+    vector_store['file_counts']['total'] += sign
+    vector_store['usage_bytes'] += sign * vector_store_file['usage_bytes']
+
+  # ----- Object factories (also used for seeding) -----
+
+  def new_file(self, filename, bytes=1024, purpose='assistants', status='processed', created_at=None):
+    return self.files.add({'id': self.new_id('file-'), 'object': 'file', 'bytes': bytes, 'created_at': created_at or int(time.time()), 'filename': filename, 'purpose': purpose, 'status': status, 'expires_at': None, 'status_details': None})
+
+  def new_vector_store(self, name, created_at=None, metadata=None):
+    vector_store = self.vector_stores.add({'id': self.new_id('vs_'), 'object': 'vector_store', 'created_at': created_at or int(time.time()), 'name': name, 'usage_bytes': 0, 'file_counts': {'in_progress': 0, 'completed': 0, 'failed': 0, 'cancelled': 0, 'total': 0}, 'status': 'completed', 'last_active_at': None, 'metadata': metadata or {}, 'expires_after': None, 'expires_at': None})
+    self.vector_store_files[vector_store['id']] = FakeCollection()
+    return vector_store
+
+  # Adds a global file to a vector store. Returns the existing vector store file if the file was already added.
+  def new_vector_store_file(self, vector_store_id, file_id, status='completed', attributes=None, created_at=None):
+    file = self.get_or_404(self.files, file_id, 'file')
+    collection = self.vector_store_files[vector_store_id]
+    existing = collection.get(file_id)
+    if existing is not None: return existing
+    vector_store_file = collection.add({'id': file_id, 'object': 'vector_store.file', 'usage_bytes': file['bytes'], 'created_at': created_at or int(time.time()), 'vector_store_id': vector_store_id, 'status': status, 'last_error': None, 'attributes': attributes or {}, 'chunking_strategy': {'type': 'static', 'static': {'max_chunk_size_tokens': 800, 'chunk_overlap_tokens': 400}}})
+    self.update_vector_store_file_counts(vector_store_file, 1)
+    return vector_store_file
+
+  def new_assistant(self, name, vector_store_ids=None, model='gpt-4o-mini', created_at=None):
+    return self.assistants.add({'id': self.new_id('asst_'), 'object': 'assistant', 'created_at': created_at or int(time.time()), 'name': name, 'description': None, 'model': model, 'instructions': None, 'tools': [{'type': 'file_search'}] if vector_store_ids else [], 'tool_resources': {'file_search': {'vector_store_ids': list(vector_store_ids or [])}}, 'metadata': {}, 'temperature': 1.0, 'top_p': 1.0, 'response_format': 'auto'})
+
+  def new_eval(self, name, created_at=None):
+    return self.evals.add({'id': self.new_id('eval_'), 'object': 'eval', 'created_at': created_at or int(time.time()), 'name': name, 'data_source_config': {'type': 'custom', 'schema': {}}, 'testing_criteria': [], 'metadata': {}})
+
+  # ----- Seeding (direct, no requests) -----
+
+  # Creates 'count' files with ascending 'created_at'. status_function(i) and purpose_function(i) can vary status and purpose.
+  # Returns the list of created files.
+  def seed_files(self, count, filename_pattern="file_{i:06d}.pdf", bytes=1024, status_function=None, purpose_function=None, created_at=None):
+    created_at = created_at or int(time.time()) - count
+    with self.lock:
+      return [self.new_file(filename_pattern.format(i=i), bytes, purpose_function(i) if purpose_function else 'assistants', status_function(i) if status_function else 'processed', created_at + i) for i in range(count)]
+
+  # Creates 'count' vector stores with ascending 'created_at'. Returns the list of created vector stores.
+  def seed_vector_stores(self, count, name_pattern="vector_store_{i:06d}", created_at=None):
+    created_at = created_at or int(time.time()) - count
+    with self.lock:
+      return [self.new_vector_store(name_pattern.format(i=i), created_at + i) for i in range(count)]
+
+  # Sets the content returned by GET /files/{id}/content. Files without content return their filename, repeated to 'bytes'.
+  def set_file_content(self, file_id, content):
+    with self.lock:
+      self.file_contents[file_id] = content
+
+  # Sets the chunk texts returned by GET /vector_stores/{id}/files/{id}/content. Files without chunks return one chunk with their filename.
+  def set_vector_store_file_chunks(self, vector_store_id, file_id, chunk_texts):
+    with self.lock:
+      self.vector_store_file_chunks[(vector_store_id, file_id)] = list(chunk_texts)
+
+  def add_files_to_vector_store(self, vector_store_id, file_ids, status='completed'):
+    with self.lock:
+      for file_id in file_ids: self.new_vector_store_file(vector_store_id, file_id, status)
+
+  def seed_assistants(self, count, name_pattern="assistant_{i:06d}", vector_store_ids_function=None):
+    with self.lock:
+      return [self.new_assistant(name_pattern.format(i=i), vector_store_ids_function(i) if vector_store_ids_function else None) for i in range(count)]
+
+  def seed_evals(self, count, name_pattern="eval_{i:06d}"):
+    with self.lock:
+      return [self.new_eval(name_pattern.format(i=i)) for i in range(count)]
+
+  # ----- Files -----
+
+  def list_files(self, purpose=None, **params):
+    predicate = (lambda f: f['purpose'] == purpose) if purpose else None
+    return self.list_response(*self.list_collection(self.files, 'file', self.files_page_size_limit, predicate=predicate, **params))
+
+  def create_file(self, body):
+    file = body.get('file') or {}
+    new_file = self.new_file(file.get('filename') or 'upload', file.get('bytes', 0), body.get('purpose', 'assistants'))
+    if 'content' in file: self.file_contents[new_file['id']] = file['content']
+    return new_file
+
+  def retrieve_file(self, file_id, **params):
+    return self.get_or_404(self.files, file_id, 'file')
+
+  # Returns bytes instead of a dict: sent as 'application/octet-stream'
+  def retrieve_file_content(self, file_id, **params):
+    file = self.get_or_404(self.files, file_id, 'file')
+    if file_id in self.file_contents: return self.file_contents[file_id]
+    filename = file['filename'].encode('utf-8') or b'-'
+    return (filename * (file['bytes'] // len(filename) + 1))[:file['bytes']]
+
+  def delete_file(self, file_id, **params):
+    self.get_or_404(self.files, file_id, 'file')
+    self.files.remove(file_id)
+    self.file_contents.pop(file_id, None)
+    return self.deleted_response(file_id, 'file')
+
+  # ----- Vector stores -----
+
+  def list_vector_stores(self, **params):
+    items, has_more = self.list_collection(self.vector_stores, 'vector store', self.page_size_limit, **params)
+    unlistable_id = next((vs['id'] for vs in items if vs['id'] in self.unlistable_vector_store_ids), None)
+    if unlistable_id: raise FakeAPIError(404, f"No vector store found with id '{unlistable_id}'.")
+    return self.list_response(items, has_more)
+
+  def create_vector_store(self, body):
+    vector_store = self.new_vector_store(body.get('name'), metadata=body.get('metadata'))
+    for file_id in body.get('file_ids') or []: self.new_vector_store_file(vector_store['id'], file_id)
+    return vector_store
+
+  def retrieve_vector_store(self, vector_store_id, **params):
+    return self.get_or_404(self.vector_stores, vector_store_id, 'vector store')
+
+  def delete_vector_store(self, vector_store_id, **params):
+    self.get_or_404(self.vector_stores, vector_store_id, 'vector store')
+    self.vector_stores.remove(vector_store_id)
+    del self.vector_store_files[vector_store_id]
+    return self.deleted_response(vector_store_id, 'vector_store.deleted')
+
+  # ----- Vector store files and file batches -----
+
+  def list_vector_store_files(self, vector_store_id, filter=None, **params):
+    collection = self.get_vector_store_files_collection(vector_store_id)
+    predicate = (lambda f: f['status'] == filter) if filter else None
+    return self.list_response(*self.list_collection(collection, 'vector store file', self.page_size_limit, predicate=predicate, **params))
+
+  def create_vector_store_file(self, vector_store_id, body):
+    self.get_vector_store_files_collection(vector_store_id)
+    vector_store_file = self.new_vector_store_file(vector_store_id, body.get('file_id'), attributes=body.get('attributes'))
+    return vector_store_file
+
+  def retrieve_vector_store_file(self, vector_store_id, file_id, **params):
+    return self.get_or_404(self.get_vector_store_files_collection(vector_store_id), file_id, 'vector store file')
+
+  def delete_vector_store_file(self, vector_store_id, file_id, **params):
+    collection = self.get_vector_store_files_collection(vector_store_id)
+    self.get_or_404(collection, file_id, 'vector store file')
+    self.update_vector_store_file_counts(collection.remove(file_id), -1)
+    return self.deleted_response(file_id, 'vector_store.file.deleted')
+
+  # Like the real API, all chunks are returned in one page without cursor
+  def retrieve_vector_store_file_content(self, vector_store_id, file_id, **params):
+    self.get_or_404(self.get_vector_store_files_collection(vector_store_id), file_id, 'vector store file')
+    chunk_texts = self.vector_store_file_chunks.get((vector_store_id, file_id))
+    if chunk_texts is None: chunk_texts = [self.get_or_404(self.files, file_id, 'file')['filename']]
+    return {'object': 'vector_store.file_content.page', 'data': [{'type': 'text', 'text': text} for text in chunk_texts], 'has_more': False, 'next_page': None}
+
+  # Like the real API, a batch with an unknown file ID is rejected as a whole
+  def create_file_batch(self, vector_store_id, body):
+    self.get_vector_store_files_collection(vector_store_id)
+    files = [{'file_id': file_id} for file_id in body.get('file_ids') or []] + list(body.get('files') or [])
+    file_ids = [f.get('file_id') for f in files]
+    missing_file_id = next((file_id for file_id in file_ids if self.files.get(file_id) is None), None)
+    if missing_file_id: raise FakeAPIError(404, f"No file found with id '{missing_file_id}'.")
+    for f in files: self.new_vector_store_file(vector_store_id, f['file_id'], attributes=f.get('attributes') or body.get('attributes'))
+    file_batch = {'id': self.new_id('vsfb_'), 'object': 'vector_store.files_batch', 'created_at': int(time.time()), 'vector_store_id': vector_store_id, 'status': 'completed', 'file_counts': {'in_progress': 0, 'completed': len(file_ids), 'failed': 0, 'cancelled': 0, 'total': len(file_ids)}}
+    self.file_batches[file_batch['id']] = file_batch
+    return file_batch
+
+  def retrieve_file_batch(self, vector_store_id, batch_id, **params):
+    file_batch = self.file_batches.get(batch_id)
+    if file_batch is None or file_batch['vector_store_id'] != vector_store_id: raise FakeAPIError(404, f"No file batch found with id '{batch_id}'.")
+    return file_batch
+
+  # ----- Assistants -----
+
+  def list_assistants(self, **params):
+    return self.list_response(*self.list_collection(self.assistants, 'assistant', self.page_size_limit, **params))
+
+  def create_assistant(self, body):
+    vector_store_ids = ((body.get('tool_resources') or {}).get('file_search') or {}).get('vector_store_ids')
+    return self.new_assistant(body.get('name'), vector_store_ids, body.get('model', 'gpt-4o-mini'))
+
+  def retrieve_assistant(self, assistant_id, **params):
+    return self.get_or_404(self.assistants, assistant_id, 'assistant')
+
+  def delete_assistant(self, assistant_id, **params):
+    self.get_or_404(self.assistants, assistant_id, 'assistant')
+    self.assistants.remove(assistant_id)
+    return self.deleted_response(assistant_id, 'assistant.deleted')
+
+  # ----- Evals -----
+
+  def list_evals(self, **params):
+    return self.list_response(*self.list_collection(self.evals, 'eval', self.page_size_limit, **params))
+
+  def create_eval(self, body):
+    return self.new_eval(body.get('name'))
+
+  def retrieve_eval(self, eval_id, **params):
+    return self.get_or_404(self.evals, eval_id, 'eval')
+
+  def delete_eval(self, eval_id, **params):
+    self.get_or_404(self.evals, eval_id, 'eval')
+    self.evals.remove(eval_id)
+    return self.deleted_response(eval_id, 'eval.deleted')
+
+# HTTP/1.1 with keep-alive, so that the SDK's connection pool reuses connections like with the real API.
+# Nagle's algorithm is disabled: headers and body are written separately and would otherwise wait for delayed ACKs (40 ms).
+class FakeOpenAIRequestHandler(BaseHTTPRequestHandler):
+  protocol_version = 'HTTP/1.1'
+  disable_nagle_algorithm = True
+  fake_server = None
+
+  def handle_request(self, method):
+    url = urlsplit(self.path)
+    content_length = int(self.headers.get('Content-Length') or 0)
+    body = self.rfile.read(content_length) if content_length else b''
+    status_code, headers, response = self.fake_server.handle(method, url.path, url.query, body, self.headers.get('Content-Type') or '')
+    response_body = response if isinstance(response, bytes) else json.dumps(response).encode('utf-8')
+    self.send_response(status_code)
+    self.send_header('Content-Type', 'application/octet-stream' if isinstance(response, bytes) else 'application/json')
+    self.send_header('Content-Length', str(len(response_body)))
+    for name, value in headers.items(): self.send_header(name, value)
+    self.end_headers()
+    self.wfile.write(response_body)
+
+  def do_GET(self): self.handle_request('GET')
+  def do_POST(self): self.handle_request('POST')
+  def do_DELETE(self): self.handle_request('DELETE')
+
+  def log_message(self, format, *args):
+    pass
+
+# ----------------------------------------------------- END: Fake OpenAI server -----------------------------------------------
+
+if __name__ == '__main__':
+  with FakeOpenAIServer() as server:
+    files = server.seed_files(250)
+    vector_store = server.seed_vector_stores(1)[0]
+    server.add_files_to_vector_store(vector_store['id'], [f['id'] for f in files[:100]])
+    client = server.create_client()
+    print(f"Fake OpenAI server running at {server.base_url}")
+    print(f"  {len(client.files.list(limit=10000).data)} files, {len(client.vector_stores.files.list(vector_store_id=vector_store['id'], limit=100).data)} vector store files")
+    print(f"  {server.get_stats()}")
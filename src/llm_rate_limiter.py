@@ -0,0 +1,200 @@
+import json
+import os
+import sys
+import threading
+import time
+
+# Client-side RPM/TPM rate limiter shared by all worker threads of a process. No dependencies, so that standalone scripts
+# (the llm-evaluation and llm-transcription skills) can load it next to openai_backendtools.py, which uses it for the eval calls.
+#
+# Keeps one requests-per-minute and one tokens-per-minute token bucket per (deployment, model). Before a request is sent,
+# its token cost is estimated (prompt characters / 4 + image tokens + max output tokens) and reserved from both buckets,
+# waiting if necessary. After the response arrives, the reservation is reconciled with the actual usage and unused tokens
+# are returned to the bucket. This keeps throughput close to the quota without running into 429 errors.
+#
+# Limits come from the "rate_limits" section of a model-registry.json (prefix matching, like "model_id_startswith").
+# Models without a matching entry are not limited. Deployment names (Azure OpenAI) are mapped to the model they serve
+# via "deployment_models", because the prefixes are model names.
+#
+# Example:
+#   registry = {'rate_limits': load_rate_limits(registry_path='./model-registry.json')}
+#   limiter = get_rate_limiter(model, deployment='openai', registry=registry)
+#   result = call_with_rate_limit(limiter, estimate_tokens(prompt, max_output_tokens=4096), lambda: call_openai(...))
+
+# ----------------------------------------------------- START: Rate limiter ---------------------------------------------------
+
+CHARS_PER_TOKEN = 4
+TOKENS_PER_IMAGE = 1105
+DEFAULT_UTILIZATION = 0.95
+
+# Token bucket holding up to 'capacity' tokens, refilled continuously at 'capacity' tokens per 'period_seconds'. Not thread-safe, used by RateLimiter.
+class TokenBucket:
+  def __init__(self, capacity, period_seconds=60.0):
+    self.capacity = float(capacity)
+    self.refill_per_second = self.capacity / period_seconds
+    self.tokens = self.capacity
+    self.updated = time.monotonic()
+
+  def refill(self, now):
+    self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_per_second)
+    self.updated = now
+
+  # Seconds until 'amount' tokens are available. Amounts above capacity wait for a full bucket.
+  def get_wait_seconds(self, amount):
+    missing = min(amount, self.capacity) - self.tokens
+    return 0.0 if missing <= 0 else missing / self.refill_per_second
+
+  def take(self, amount):
+    self.tokens -= min(amount, self.capacity)
+
+  def give_back(self, amount):
+    self.tokens = min(self.capacity, self.tokens + amount)
+
+class RateLimiter:
+  """
+  Thread-safe requests/min (RPM) and tokens/min (TPM) limiter for one (deployment, model), shared by all threads.
+
+  acquire() reserves one request and the estimated tokens of a request, waiting until both are available.
+  reconcile() corrects the reservation with the actual usage: unused tokens go back, overruns are taken
+  (the bucket can go negative, which delays the following requests).
+
+  Args:
+    name: Shown in logs, usually 'deployment/model'
+    rpm, tpm: Limits per minute, None = not limited
+    utilization: Fraction of the limits to use (default: DEFAULT_UTILIZATION)
+  """
+  def __init__(self, name, rpm=None, tpm=None, utilization=DEFAULT_UTILIZATION):
+    self.name = name
+    self.rpm = rpm
+    self.tpm = tpm
+    self.requests = TokenBucket(rpm * utilization) if rpm else None
+    self.tokens = TokenBucket(tpm * utilization) if tpm else None
+    self.lock = threading.Lock()
+    self.waited_seconds = 0.0
+    self.request_count = 0
+    self.reserved_tokens = 0
+    self.used_tokens = 0
+
+  # Blocks until one request and 'estimated_tokens' tokens are available, then reserves them. Returns the reserved token count.
+  def acquire(self, estimated_tokens=0):
+    estimated_tokens = max(0, int(estimated_tokens))
+    while True:
+      with self.lock:
+        now = time.monotonic()
+        wait_seconds = 0.0
+        for bucket, amount in ((self.requests, 1), (self.tokens, estimated_tokens)):
+          if bucket is None: continue
+          bucket.refill(now)
+          wait_seconds = max(wait_seconds, bucket.get_wait_seconds(amount))
+        if wait_seconds <= 0:
+          if self.requests: self.requests.take(1)
+          if self.tokens: self.tokens.take(estimated_tokens)
+          self.request_count += 1
+          self.reserved_tokens += estimated_tokens
+          return estimated_tokens
+        self.waited_seconds += wait_seconds
+      time.sleep(wait_seconds)
+
+  # Corrects a reservation with the actual token usage. Unused tokens go back to the bucket, overruns are taken from it.
+  def reconcile(self, reserved_tokens, used_tokens):
+    with self.lock:
+      self.used_tokens += used_tokens
+      if self.tokens is None: return
+      self.tokens.refill(time.monotonic())
+      if used_tokens < reserved_tokens: self.tokens.give_back(reserved_tokens - used_tokens)
+      else: self.tokens.tokens -= (used_tokens - reserved_tokens)
+
+  # Called after a 429 despite the limiter (quota shared with other clients): empties both buckets so that all threads pause
+  def on_rate_limited(self):
+    with self.lock:
+      now = time.monotonic()
+      for bucket in (self.requests, self.tokens):
+        if bucket is None: continue
+        bucket.refill(now)
+        bucket.tokens = min(bucket.tokens, 0.0)
+
+  def __str__(self):
+    return f"{self.name} (rpm={self.rpm or '-'}, tpm={self.tpm or '-'}): {self.request_count} requests, {self.reserved_tokens} tokens reserved, {self.used_tokens} tokens used, threads waited {self.waited_seconds:.1f} secs"
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+# Returns the 'rate_limits' section of a registry: 'registry' (parsed model-registry.json) or the file at 'registry_path'.
+# Returns {} (nothing is limited) with a warning if the file is missing.
+def load_rate_limits(registry=None, registry_path=None):
+  if registry is None:
+    if not registry_path or not os.path.exists(registry_path):
+      print(f"WARNING: Model registry '{registry_path}' not found. Requests are not rate limited.", file=sys.stderr)
+      return {}
+    with open(registry_path, 'r', encoding='utf-8') as f: registry = json.load(f)
+  return registry.get('rate_limits', {})
+
+# Returns the model a deployment serves ('deployment_models' section), or 'model' itself if it is not a mapped deployment name
+def get_rate_limit_model(model, rate_limits):
+  return rate_limits.get('deployment_models', {}).get(model, model)
+
+# Returns the first entry matching the model prefix and deployment. Entries without 'deployment' match every deployment.
+def get_rate_limit_config(model, deployment, rate_limits):
+  model = get_rate_limit_model(model, rate_limits)
+  for entry in rate_limits.get('limits', []):
+    if entry.get('deployment') not in (None, deployment): continue
+    if model.startswith(entry['prefix']): return entry
+  return None
+
+# Creates a limiter for (deployment, model) from a 'rate_limits' section. None if no rpm/tpm is configured.
+def create_rate_limiter(model, deployment, rate_limits, name=None):
+  entry = get_rate_limit_config(model, deployment, rate_limits)
+  if not entry or not (entry.get('rpm') or entry.get('tpm')): return None
+  utilization = entry.get('utilization', rate_limits.get('utilization', DEFAULT_UTILIZATION))
+  return RateLimiter(name or f"{deployment}/{model}", entry.get('rpm'), entry.get('tpm'), utilization)
+
+# Returns the shared limiter for (deployment, model), created from the registry (parsed model-registry.json) on first use. None if not configured.
+def get_rate_limiter(model, deployment='default', registry=None):
+  key = (deployment, model)
+  with _limiters_lock:
+    if key in _limiters: return _limiters[key]
+    limiter = create_rate_limiter(model, deployment, (registry or {}).get('rate_limits', {}))
+    _limiters[key] = limiter
+    return limiter
+
+# Estimates the token cost of a request the way quotas count it: prompt tokens plus the maximum output tokens
+def estimate_tokens(text='', max_output_tokens=0, image_count=0):
+  return len(text or '') // CHARS_PER_TOKEN + image_count * TOKENS_PER_IMAGE + (max_output_tokens or 0)
+
+# Returns the tokens used by a call result: a dict ({"usage": {...}} or flat) or an SDK response object with a 'usage' attribute. 0 without usage.
+def get_used_tokens(result):
+  if isinstance(result, dict):
+    usage = result.get('usage', result) or {}
+    get = usage.get
+  else:
+    usage = getattr(result, 'usage', None)
+    if usage is None: return 0
+    get = lambda name, default=None: getattr(usage, name, default)
+  if get('total_tokens') is not None: return int(get('total_tokens'))
+  return sum(int(get(name, 0) or 0) for name in ('input_tokens', 'output_tokens', 'prompt_tokens', 'completion_tokens'))
+
+def is_rate_limit_error(e):
+  status_code = getattr(e, 'status_code', None) or getattr(getattr(e, 'response', None), 'status_code', None)
+  return status_code == 429
+
+# Reserves capacity, calls fn() and reconciles with the usage of its result. Without limiter, just calls fn().
+def call_with_rate_limit(limiter, estimated_tokens, fn):
+  if limiter is None: return fn()
+  reserved_tokens = limiter.acquire(estimated_tokens)
+  try:
+    result = fn()
+  except Exception as e:
+    # Failed requests keep their reservation: the provider may have counted them
+    if is_rate_limit_error(e):
+      print(f"WARNING: Rate limited despite client-side limiter: '{limiter.name}'", file=sys.stderr)
+      limiter.on_rate_limited()
+    raise
+  limiter.reconcile(reserved_tokens, get_used_tokens(result))
+  return result
+
+# Prints stats of all limiters used by this process
+def print_rate_limiter_stats():
+  with _limiters_lock: limiters = [l for l in _limiters.values() if l is not None]
+  for limiter in limiters: print(f"Rate limiter {limiter}", file=sys.stderr)
+
+# ----------------------------------------------------- END: Rate limiter -----------------------------------------------------
@@ -1,10 +1,26 @@
 import os
+import copy
 import datetime
+import hashlib
+import json
+import random
+import re
+import sqlite3
+import threading
 import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from dataclasses import dataclass
 from azure.identity import DefaultAzureCredential, get_bearer_token_provider
 import openai
+from openai.types import EvalListResponse, FileObject, VectorStore
+from openai.types.beta import Assistant
+from openai.types.vector_stores import VectorStoreFile
+import llm_rate_limiter
 
 # ----------------------------------------------------- START: Utilities ------------------------------------------------------
+# Number of vector stores whose files are listed in parallel by get_all_files_used_by_vector_stores() and similar functions
+DEFAULT_VECTOR_STORE_FAN_OUT_WORKERS = 8
+
 def create_openai_client():
   api_key = os.environ.get('OPENAI_API_KEY')
   return openai.OpenAI(api_key=api_key)
@@ -30,20 +46,6 @@ def create_azure_openai_client(use_key_authentication=False):
     # Create client with token provider
     return openai.AzureOpenAI( api_version=api_version, azure_endpoint=endpoint, azure_ad_token_provider=token_provider )
 
-# Retries the given function on rate limit errors
-def retry_on_openai_errors(fn, indentation=0, retries=5, backoff_seconds=10):
-  for attempt in range(retries):
-    try:
-      return fn()
-    except Exception as e:
-      # Only retry on rate limit errors
-      if not (hasattr(e, 'type') and e.type == 'rate_limit_error'):
-        raise e
-      if attempt == retries - 1:  # Last attempt
-        raise e
-      print(f"{' '*indentation}Rate limit reached, retrying in {backoff_seconds} seconds... (attempt {attempt + 2} of {retries})")
-      time.sleep(backoff_seconds)
-
 def truncate_string(string, max_length):
   if len(string) > max_length:
     return string[:max_length] + "..."
@@ -104,35 +106,30 @@ def get_all_assistant_vector_store_ids(client):
   all_assistant_vector_store_ids = [get_assistant_vector_store_id(client, a) for a in all_assistants]
   return all_assistant_vector_store_ids
 
-def get_files_used_by_assistant_vector_stores(client):
+# Returns files used by vector stores of assistants. Each file is listed once, with the first vector store it was found in.
+# Vector stores are listed in parallel (see get_files_of_vector_stores), the result order is deterministic.
+def get_files_used_by_assistant_vector_stores(client, max_workers=DEFAULT_VECTOR_STORE_FAN_OUT_WORKERS):
   # Get all assistants and their vector stores
   all_assistant_vector_store_ids = get_all_assistant_vector_store_ids(client)
-  all_vector_stores = get_all_vector_stores(client)
-  # Remove those that returned None
-  all_assistant_vector_store_ids = [vs for vs in all_assistant_vector_store_ids if vs]
-  # Remove duplicates
-  all_assistant_vector_store_ids = list(set(all_assistant_vector_store_ids))
-  
+  all_vector_stores_by_id = {vs.id: vs for vs in get_all_vector_stores(client)}
+  # Remove those that returned None or don't exist anymore, and remove duplicates while keeping the order
+  all_assistant_vector_store_ids = list(dict.fromkeys([vs_id for vs_id in all_assistant_vector_store_ids if vs_id and vs_id in all_vector_stores_by_id]))
+  assistant_vector_stores = [all_vector_stores_by_id[vs_id] for vs_id in all_assistant_vector_store_ids]
+  files_per_vector_store = get_files_of_vector_stores(client, assistant_vector_stores, max_workers)
+
   # Dictionary to store unique files to avoid duplicates
   all_files = []
   processed_file_ids = set()
   
   # For each vector store used by assistants
-  for vector_store_id in all_assistant_vector_store_ids:
-    # Find the vector store object
-    vector_store = next((vs for vs in all_vector_stores if vs.id == vector_store_id), None)
-    vector_store_name = getattr(vector_store, 'name', None)
-      
-    # Get all files in this vector store
-    vector_store_files = get_vector_store_files(client, vector_store)
-    
+  for vector_store, vector_store_files in zip(assistant_vector_stores, files_per_vector_store):
     # Filter out failed and cancelled files, and add new ones to our collection
     for file in vector_store_files:
       file_status = getattr(file, 'status', None)
       if file_status in ['failed', 'cancelled']: continue
       if (getattr(file, 'id', None) and file.id not in processed_file_ids):
-        setattr(file, 'vector_store_id', vector_store_id)
-        setattr(file, 'vector_store_name', vector_store_name)
+        setattr(file, 'vector_store_id', vector_store.id)
+        setattr(file, 'vector_store_name', getattr(vector_store, 'name', None))
         all_files.append(file)
         processed_file_ids.add(file.id)
   
@@ -142,43 +139,52 @@ def get_files_used_by_assistant_vector_stores(client):
 
   return all_files
 
-def get_all_files_used_by_vector_stores(client):
-  # Get all vector stores
-  all_vector_stores = get_all_vector_stores(client)
-  
-  # Dictionary to store unique files to avoid duplicates
-  all_files = []
-  processed_file_ids = set()
-  
-  # For each vector store used by assistants
-  for vector_store in all_vector_stores:
-    # Get all files in this vector store
-    vector_store_files = get_vector_store_files(client, vector_store)
-    vector_store_name = getattr(vector_store, 'name', None)
+# Lists the files of all given vector stores in parallel, with at most max_workers vector stores at a time.
+# Returns a list of file lists in the order of vector_stores, independent of which listing finished first.
+# Transient errors are retried per vector store (retry_policy, default: DEFAULT_RETRY_POLICY). Other errors are raised,
+# because an incomplete listing would make files look unused to the cleanup functions.
+def get_files_of_vector_stores(client, vector_stores, max_workers=DEFAULT_VECTOR_STORE_FAN_OUT_WORKERS, retry_policy=None):
+  def list_vector_store_files(vector_store):
+    return retry_on_openai_errors(lambda: get_vector_store_files(client, vector_store), indentation=2, policy=retry_policy)
+  if max_workers <= 1 or len(vector_stores) <= 1:
+    return [list_vector_store_files(vs) for vs in vector_stores]
+  with ThreadPoolExecutor(max_workers=max_workers) as executor:
+    return list(executor.map(list_vector_store_files, vector_stores))
+
+# Merges the files of several vector stores into one list with one entry per file ID. Failed and cancelled files are skipped.
+# vector_stores_with_files: iterable of (vector_store, vector_store_files) tuples
+# Each entry gets the lists 'vector_store_ids' and 'vector_store_names' (one item per vector store the file is used in) and,
+# as compatibility view for existing callers, the comma-separated strings 'vector_store_id' and 'vector_store_name'.
+# With copy_files=True the entries are shallow copies and the given file objects are not modified.
+def merge_vector_store_file_memberships(vector_stores_with_files, copy_files=False):
+  all_files = []; all_files_by_id = {}
+  for vector_store, vector_store_files in vector_stores_with_files:
     vector_store_id = getattr(vector_store, 'id', None)
-    
-    # Filter out failed and cancelled files, and add others to our collection
+    vector_store_name = getattr(vector_store, 'name', None)
     for file in vector_store_files:
-      file_status = getattr(file, 'status', None)
-      if file_status in ['failed', 'cancelled']: continue
-      if file.id not in processed_file_ids:
-        setattr(file, 'vector_store_id', vector_store_id)
-        setattr(file, 'vector_store_name', vector_store_name)
-        all_files.append(file)
-        processed_file_ids.add(file.id)
-      else:
-        # Here we add the vector store ID and name to the existing file's attributes. These files are used in multiple vector stores.
-        existing_file = next((f for f in all_files if f.id == file.id), None)
-        if not existing_file: continue
-        existing_vector_store_id = getattr(existing_file, 'vector_store_id', None)
-        existing_vector_store_name = getattr(existing_file, 'vector_store_name', None)
-        existing_vector_store_id = (existing_vector_store_id + f", {vector_store_id}") if existing_vector_store_id else vector_store_id
-        existing_vector_store_name = (existing_vector_store_name + f", {vector_store_name}") if existing_vector_store_name else vector_store_name
-        setattr(existing_file, 'vector_store_id', existing_vector_store_id)
-        setattr(existing_file, 'vector_store_name', existing_vector_store_name)
-  
+      if getattr(file, 'status', None) in ['failed', 'cancelled']: continue
+      existing_file = all_files_by_id.get(file.id)
+      if existing_file is None:
+        existing_file = copy.copy(file) if copy_files else file
+        setattr(existing_file, 'vector_store_ids', [])
+        setattr(existing_file, 'vector_store_names', [])
+        all_files_by_id[file.id] = existing_file
+        all_files.append(existing_file)
+      existing_file.vector_store_ids.append(vector_store_id)
+      existing_file.vector_store_names.append(vector_store_name)
+
+  for file in all_files:
+    setattr(file, 'vector_store_id', ', '.join([x for x in file.vector_store_ids if x]) or None)
+    setattr(file, 'vector_store_name', ', '.join([x for x in file.vector_store_names if x]) or None)
   return all_files
 
+# Returns all files used by any vector store, one entry per file ID (see merge_vector_store_file_memberships).
+# Vector stores are listed in parallel (see get_files_of_vector_stores), the result order is deterministic.
+def get_all_files_used_by_vector_stores(client, max_workers=DEFAULT_VECTOR_STORE_FAN_OUT_WORKERS):
+  all_vector_stores = get_all_vector_stores(client)
+  files_per_vector_store = get_files_of_vector_stores(client, all_vector_stores, max_workers)
+  return merge_vector_store_file_memberships(zip(all_vector_stores, files_per_vector_store))
+
 # Utility function to remove temperature parameter for reasoning models that don't support it
 # When reasoning model is used, it will add the reasoning effort if specified
 def remove_temperature_from_request_params_for_reasoning_models(request_params, model_name, reasoning_effort=None):
@@ -203,32 +209,720 @@ def remove_temperature_from_request_params_for_reasoning_models(request_params,
 
 # ----------------------------------------------------- END: Utilities --------------------------------------------------------
 
+# ----------------------------------------------------- START: Retries --------------------------------------------------------
+
+# Errors retried by default: HTTP 429, HTTP 5xx, timeouts and connection errors
+DEFAULT_TRANSIENT_ERROR_TYPES = (openai.RateLimitError, openai.InternalServerError, openai.APIConnectionError)
+
+# Returns True for HTTP 429 errors (Azure OpenAI returns them without error type)
+def is_rate_limit_error(e):
+  return isinstance(e, openai.RateLimitError) or getattr(e, 'type', None) == 'rate_limit_error'
+
+# Returns the number of seconds to wait given the rate limit headers of a response, or None if there is no hint.
+# Supports 'retry-after-ms', 'retry-after' (seconds) and 'x-ratelimit-reset-requests' / 'x-ratelimit-reset-tokens' ('20ms', '1s', '6m0s' or seconds).
+def get_rate_limit_wait_seconds(headers):
+  if not headers: return None
+  def parse_duration(value):
+    if value is None: return None
+    value = str(value).strip()
+    try: return float(value)
+    except ValueError: pass
+    parts = re.findall(r"(\d+(?:\.\d+)?)(ms|h|m|s)", value)
+    if not parts: return None
+    return sum(float(number) * {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600}[unit] for number, unit in parts)
+  retry_after_ms = parse_duration(headers.get('retry-after-ms'))
+  if retry_after_ms is not None: return retry_after_ms / 1000
+  seconds = parse_duration(headers.get('retry-after'))
+  if seconds is not None: return seconds
+  reset_seconds = [parse_duration(headers.get(h)) for h in ['x-ratelimit-reset-requests', 'x-ratelimit-reset-tokens']]
+  reset_seconds = [s for s in reset_seconds if s is not None]
+  return max(reset_seconds) if reset_seconds else None
+
+# Returns the response headers of an SDK error, if any
+def get_error_headers(e):
+  return getattr(getattr(e, 'response', None), 'headers', None)
+
+# Counts retries and the wall time spent waiting. Shared by all RetryPolicy objects unless they get their own.
+class RetryMetrics:
+  def __init__(self):
+    self.lock = threading.Lock()
+    self.reset()
+
+  def reset(self):
+    self.calls = 0
+    self.retries = 0
+    self.retries_by_error_type = {}
+    self.throttled_seconds = 0.0
+    self.backoff_seconds = 0.0
+    self.gave_up = 0
+    self.budget_exhausted = 0
+
+  def record_call(self):
+    with self.lock: self.calls += 1
+
+  def record_retry(self, e, wait_seconds):
+    with self.lock:
+      self.retries += 1
+      error_type = type(e).__name__
+      self.retries_by_error_type[error_type] = self.retries_by_error_type.get(error_type, 0) + 1
+      if is_rate_limit_error(e): self.throttled_seconds += wait_seconds
+      else: self.backoff_seconds += wait_seconds
+
+  def record_give_up(self, budget_exhausted=False):
+    with self.lock:
+      self.gave_up += 1
+      if budget_exhausted: self.budget_exhausted += 1
+
+  def __str__(self):
+    by_type = ", ".join([f"{count} {error_type}" for error_type, count in self.retries_by_error_type.items()])
+    return f"{self.calls:,} calls, {self.retries:,} retries{f' ({by_type})' if by_type else ''}, {self.gave_up} gave up ({self.budget_exhausted} budget exhausted), throttled {format_milliseconds(int(self.throttled_seconds * 1000))}, backoff {format_milliseconds(int(self.backoff_seconds * 1000))}"
+
+# Limits the number of retries per process (token bucket): holds up to 'capacity' retries and regains 'refill_per_second'.
+# When many workers hit errors at the same time, the budget runs out and errors are raised instead of retried forever.
+class RetryBudget:
+  def __init__(self, capacity=200, refill_per_second=2.0):
+    self.capacity = capacity
+    self.refill_per_second = refill_per_second
+    self.tokens = float(capacity)
+    self.updated_at = time.monotonic()
+    self.lock = threading.Lock()
+
+  def try_acquire(self):
+    with self.lock:
+      now = time.monotonic()
+      self.tokens = min(float(self.capacity), self.tokens + (now - self.updated_at) * self.refill_per_second)
+      self.updated_at = now
+      if self.tokens < 1: return False
+      self.tokens -= 1
+      return True
+
+DEFAULT_RETRY_METRICS = RetryMetrics()
+DEFAULT_RETRY_BUDGET = RetryBudget()
+
+class RetryPolicy:
+  """
+  Retries transient OpenAI errors with exponential backoff and full jitter.
+
+  The wait before attempt n is random between 0 and min(max_delay_seconds, base_delay_seconds * 2^(n-1)), so that
+  parallel workers don't retry in lockstep. If the server sends 'retry-after' or 'x-ratelimit-reset-*' headers, the
+  wait is at least that long. Each retry takes one token from the retry budget; without tokens the error is raised.
+
+  Args:
+    max_attempts: Attempts including the first call
+    base_delay_seconds, max_delay_seconds: Backoff range
+    transient_error_types: Tuple of exception types to retry (rate limit errors are always retried)
+    budget: RetryBudget (default: DEFAULT_RETRY_BUDGET, shared by the process). None = unlimited retries within max_attempts.
+    metrics: RetryMetrics (default: DEFAULT_RETRY_METRICS)
+
+  Example:
+    policy = RetryPolicy(max_attempts=8, max_delay_seconds=120)
+    response = policy.call(lambda: client.responses.create(**request_params), indentation=4)
+    print(DEFAULT_RETRY_METRICS)  # -> 412 calls, 9 retries (9 RateLimitError), 0 gave up (0 budget exhausted), throttled 38 secs, backoff 0 ms
+  """
+  def __init__(self, max_attempts=5, base_delay_seconds=1.0, max_delay_seconds=60.0, transient_error_types=DEFAULT_TRANSIENT_ERROR_TYPES, budget=DEFAULT_RETRY_BUDGET, metrics=None):
+    self.max_attempts = max(1, max_attempts)
+    self.base_delay_seconds = base_delay_seconds
+    self.max_delay_seconds = max_delay_seconds
+    self.transient_error_types = tuple(transient_error_types)
+    self.budget = budget
+    self.metrics = metrics or DEFAULT_RETRY_METRICS
+
+  def is_transient(self, e):
+    return is_rate_limit_error(e) or isinstance(e, self.transient_error_types)
+
+  # Wait in seconds before the given attempt (2 = first retry)
+  def get_delay_seconds(self, attempt, e=None):
+    delay = random.uniform(0, min(self.max_delay_seconds, self.base_delay_seconds * (2 ** (attempt - 2))))
+    hint = get_rate_limit_wait_seconds(get_error_headers(e)) if e is not None else None
+    if hint is not None: delay = max(delay, min(hint, self.max_delay_seconds))
+    return delay
+
+  # Returns the wait in seconds if the error should be retried before the given attempt, None if it should be raised
+  def get_retry_delay_seconds(self, attempt, e):
+    if not self.is_transient(e): return None
+    if attempt > self.max_attempts: self.metrics.record_give_up(); return None
+    if self.budget is not None and not self.budget.try_acquire(): self.metrics.record_give_up(budget_exhausted=True); return None
+    delay = self.get_delay_seconds(attempt, e)
+    self.metrics.record_retry(e, delay)
+    return delay
+
+  def call(self, fn, indentation=0):
+    attempt = 1
+    while True:
+      self.metrics.record_call()
+      try:
+        return fn()
+      except Exception as e:
+        attempt += 1
+        delay = self.get_retry_delay_seconds(attempt, e)
+        if delay is None: raise e
+        reason = "Rate limit reached" if is_rate_limit_error(e) else f"{type(e).__name__}"
+        print(f"{' '*indentation}{reason}, retrying ( {attempt - 1} / {self.max_attempts - 1} ) in {delay:.1f} seconds...")
+        time.sleep(delay)
+
+DEFAULT_RETRY_POLICY = RetryPolicy()
+
+# Calls fn and retries transient errors according to 'policy' (default: DEFAULT_RETRY_POLICY).
+# retries (number of retries after the first call) / backoff_seconds override max_attempts (= retries + 1) / base_delay_seconds of the policy for this call.
+def retry_on_openai_errors(fn, indentation=0, retries=None, backoff_seconds=None, policy=None):
+  policy = policy or DEFAULT_RETRY_POLICY
+  if retries is not None or backoff_seconds is not None:
+    policy = copy.copy(policy)
+    if retries is not None: policy.max_attempts = max(0, retries) + 1
+    if backoff_seconds is not None: policy.base_delay_seconds = backoff_seconds
+  return policy.call(fn, indentation)
+
+# ----------------------------------------------------- END: Retries ----------------------------------------------------------
+
+# ----------------------------------------------------- START: Status watcher -------------------------------------------------
+# Adaptive polling of server-side operations (vector store ingestion, assistant runs) instead of fixed sleep loops.
+# Every watched object is polled on its own schedule: the first poll comes after initial_delay_seconds, then the delay grows
+# by backoff_factor up to max_delay_seconds. One loop watches any number of objects and always sleeps only until the next
+# object is due, so a finished object is noticed within its current delay and not after a fixed tick.
+# Transient errors (DEFAULT_TRANSIENT_ERROR_TYPES) only delay the next poll, other errors end the watch of that object.
+DEFAULT_POLL_INITIAL_DELAY_SECONDS = 0.5
+DEFAULT_POLL_MAX_DELAY_SECONDS = 5.0
+DEFAULT_POLL_BACKOFF_FACTOR = 1.5
+DEFAULT_RUN_POLL_MAX_DELAY_SECONDS = 2.0
+DEFAULT_RUN_DEADLINE_SECONDS = 600
+
+# Ingestion deadline estimate: base + per file + per MB, by file extension ('default' for others). Large HTML files take much longer.
+INGESTION_DEADLINE_BASE_SECONDS = 30
+INGESTION_DEADLINE_SECONDS_PER_FILE = {'.html': 10, '.htm': 10, 'default': 3}
+INGESTION_DEADLINE_SECONDS_PER_MB = {'.html': 2, '.htm': 2, '.pdf': 2, 'default': 1}
+INGESTION_DEADLINE_MAX_SECONDS = 4 * 3600
+
+# Run statuses after which a run doesn't change anymore without action from the caller
+RUN_FINAL_STATUSES = ['completed', 'failed', 'cancelled', 'expired', 'incomplete', 'requires_action']
+
+# Returns the estimated maximum ingestion time in seconds for files given as (filename or path, bytes) tuples
+def estimate_ingestion_deadline_seconds(files):
+  seconds = INGESTION_DEADLINE_BASE_SECONDS
+  for filename, num_bytes in files:
+    extension = get_file_extension(filename)
+    seconds += INGESTION_DEADLINE_SECONDS_PER_FILE.get(extension, INGESTION_DEADLINE_SECONDS_PER_FILE['default'])
+    seconds += (num_bytes or 0) / (1024 * 1024) * INGESTION_DEADLINE_SECONDS_PER_MB.get(extension, INGESTION_DEADLINE_SECONDS_PER_MB['default'])
+  return min(seconds, INGESTION_DEADLINE_MAX_SECONDS)
+
+# Outcome of watching one object. value: last polled value (None if no poll succeeded)
+@dataclass
+class WatchResult:
+  key: str
+  value: object = None
+  done: bool = False
+  timed_out: bool = False
+  error: str = None
+  polls: int = 0
+  elapsed_seconds: float = 0.0
+
+class StatusWatcher:
+  """
+  Polls any number of objects from one loop until each one is done, failed or past its deadline.
+
+  Args:
+    initial_delay_seconds: Delay before the first poll of an object
+    max_delay_seconds: Maximum delay between two polls of the same object
+    backoff_factor: Growth of the delay after every poll
+    on_poll: Optional function(key, value) called after every successful poll (for progress output)
+
+  Example:
+    watcher = StatusWatcher()
+    for vector_store_id in vector_store_ids:
+      watcher.add(vector_store_id, lambda vector_store_id=vector_store_id: client.vector_stores.retrieve(vector_store_id), is_vector_store_ingestion_done, deadline_seconds=600)
+    results = watcher.wait()  # dictionary key -> WatchResult
+  """
+  def __init__(self, initial_delay_seconds=DEFAULT_POLL_INITIAL_DELAY_SECONDS, max_delay_seconds=DEFAULT_POLL_MAX_DELAY_SECONDS, backoff_factor=DEFAULT_POLL_BACKOFF_FACTOR, on_poll=None):
+    self.initial_delay_seconds = initial_delay_seconds
+    self.max_delay_seconds = max_delay_seconds
+    self.backoff_factor = backoff_factor
+    self.on_poll = on_poll
+    self.watched = {}
+
+  # poll_function() returns the current object, is_done_function(object) True when the watch is complete
+  def add(self, key, poll_function, is_done_function, deadline_seconds=None):
+    now = time.monotonic()
+    self.watched[key] = {'poll': poll_function, 'is_done': is_done_function, 'started_at': now, 'deadline': now + deadline_seconds if deadline_seconds else None,
+      'next_poll_at': now + self.initial_delay_seconds, 'delay': self.initial_delay_seconds, 'result': WatchResult(key)}
+
+  def poll(self, key, watched, now):
+    result = watched['result']
+    try:
+      result.value = watched['poll']()
+      result.polls += 1
+      if self.on_poll: self.on_poll(key, result.value)
+      result.done = bool(watched['is_done'](result.value))
+    except DEFAULT_TRANSIENT_ERROR_TYPES as e:
+      # Respect rate limit hints, otherwise just back off
+      wait_seconds = get_rate_limit_wait_seconds(get_error_headers(e)) if is_rate_limit_error(e) else None
+      if wait_seconds: watched['delay'] = max(watched['delay'], wait_seconds)
+    except Exception as e:
+      result.error = str(e)
+    now = time.monotonic()
+    result.elapsed_seconds = now - watched['started_at']
+    if result.done or result.error: return True
+    if watched['deadline'] and now >= watched['deadline']:
+      result.timed_out = True
+      return True
+    watched['next_poll_at'] = now + watched['delay']
+    if watched['deadline']: watched['next_poll_at'] = min(watched['next_poll_at'], watched['deadline'])
+    watched['delay'] = min(watched['delay'] * self.backoff_factor, self.max_delay_seconds)
+    return False
+
+  # Polls until every object is finished. Returns a dictionary key -> WatchResult in the order the objects were added.
+  def wait(self):
+    results = {key: watched['result'] for key, watched in self.watched.items()}
+    pending = dict(self.watched)
+    while pending:
+      key = min(pending, key=lambda k: pending[k]['next_poll_at'])
+      sleep_seconds = pending[key]['next_poll_at'] - time.monotonic()
+      if sleep_seconds > 0: time.sleep(sleep_seconds)
+      if self.poll(key, pending[key], time.monotonic()): del pending[key]
+    self.watched = {}
+    return results
+
+# Returns True if no file of the vector store is in progress anymore
+def is_vector_store_ingestion_done(vector_store):
+  file_counts = getattr(vector_store, 'file_counts', None)
+  return file_counts is None or file_counts.in_progress == 0
+
+# Waits until no file of the given vector stores is in progress anymore, watching all of them from one loop.
+# deadline_seconds: one value for all vector stores or dictionary vector_store_id -> seconds (see estimate_ingestion_deadline_seconds())
+# Prints the number of files in progress whenever it changes. Returns a dictionary vector_store_id -> WatchResult (value = vector store).
+def wait_for_vector_store_ingestion(client, vector_store_ids, deadline_seconds=None, max_delay_seconds=DEFAULT_POLL_MAX_DELAY_SECONDS, indentation=4):
+  last_in_progress = {}
+  def on_poll(vector_store_id, vector_store):
+    in_progress = vector_store.file_counts.in_progress if getattr(vector_store, 'file_counts', None) else 0
+    if last_in_progress.get(vector_store_id) != in_progress and in_progress > 0:
+      print(f"{' '*indentation}Vector store ID={vector_store_id}: {in_progress} files in progress...")
+    last_in_progress[vector_store_id] = in_progress
+  watcher = StatusWatcher(max_delay_seconds=max_delay_seconds, on_poll=on_poll)
+  for vector_store_id in vector_store_ids:
+    seconds = deadline_seconds.get(vector_store_id) if isinstance(deadline_seconds, dict) else deadline_seconds
+    watcher.add(vector_store_id, lambda vector_store_id=vector_store_id: client.vector_stores.retrieve(vector_store_id), is_vector_store_ingestion_done, seconds)
+  return watcher.wait()
+
+# Waits until the given assistant runs reach a final status (see RUN_FINAL_STATUSES), watching all of them from one loop.
+# runs: list of (thread_id, run_id) tuples. Returns a dictionary run_id -> WatchResult (value = run).
+def wait_for_runs(client, runs, deadline_seconds=DEFAULT_RUN_DEADLINE_SECONDS, max_delay_seconds=DEFAULT_RUN_POLL_MAX_DELAY_SECONDS):
+  watcher = StatusWatcher(max_delay_seconds=max_delay_seconds)
+  for thread_id, run_id in runs:
+    watcher.add(run_id, lambda thread_id=thread_id, run_id=run_id: client.beta.threads.runs.retrieve(thread_id=thread_id, run_id=run_id), lambda run: run.status in RUN_FINAL_STATUSES, deadline_seconds)
+  return watcher.wait()
+
+# ----------------------------------------------------- END: Status watcher ---------------------------------------------------
+
+# ----------------------------------------------------- START: Rate limiting --------------------------------------------------
+
+# The rate limiter itself is implemented in llm_rate_limiter.py (also loaded by the llm-evaluation and llm-transcription skill scripts).
+# Limits per model are read from the 'rate_limits' section of this file (same format as used by the llm-evaluation skill scripts).
+# If the file does not exist (e.g. src/ copied without the skills folder), a warning is printed and nothing is limited.
+DEFAULT_MODEL_REGISTRY_PATH = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '.windsurf', 'skills', 'llm-evaluation', 'model-registry.json'))
+# Assumed output tokens of a request if max_output_tokens is not set
+DEFAULT_ESTIMATED_OUTPUT_TOKENS = 1000
+DEFAULT_RATE_LIMIT_UTILIZATION = llm_rate_limiter.DEFAULT_UTILIZATION
+# Prompt characters per token used to estimate the tokens of a request before it is sent
+CHARS_PER_TOKEN = llm_rate_limiter.CHARS_PER_TOKEN
+
+# Token bucket and thread-safe RPM + TPM limiter, see llm_rate_limiter.py
+RateLimitBucket = llm_rate_limiter.TokenBucket
+RateLimiter = llm_rate_limiter.RateLimiter
+
+_rate_limits = None
+_rate_limiters = {}
+_rate_limiters_lock = threading.Lock()
+
+# Returns the 'rate_limits' section of a model-registry.json file, {} with a warning if the file does not exist
+def load_rate_limits_from_model_registry(model_registry_path=DEFAULT_MODEL_REGISTRY_PATH):
+  return llm_rate_limiter.load_rate_limits(registry_path=model_registry_path)
+
+# Replaces the rate limits used by get_rate_limiter() (loaded from DEFAULT_MODEL_REGISTRY_PATH by default) and drops existing limiters
+def configure_rate_limits(rate_limits=None, model_registry_path=DEFAULT_MODEL_REGISTRY_PATH):
+  global _rate_limits
+  with _rate_limiters_lock:
+    _rate_limits = rate_limits if rate_limits is not None else load_rate_limits_from_model_registry(model_registry_path)
+    _rate_limiters.clear()
+
+# Returns the first 'limits' entry whose 'prefix' matches the model (deployment names are mapped via 'deployment_models'). Entries with 'deployment' only match that deployment.
+def get_rate_limit_config(rate_limits, model, deployment=None):
+  return llm_rate_limiter.get_rate_limit_config(model, deployment, rate_limits)
+
+# Returns the shared RateLimiter for the model on this client's endpoint, None if no limits are configured.
+# For Azure OpenAI 'model' is the deployment name: map it to its model in the 'deployment_models' section of the rate limits, otherwise it is not limited (with a warning).
+def get_rate_limiter(client, model):
+  global _rate_limits
+  deployment = str(getattr(client, 'base_url', ''))
+  key = (deployment, model)
+  with _rate_limiters_lock:
+    if key in _rate_limiters: return _rate_limiters[key]
+    if _rate_limits is None: _rate_limits = load_rate_limits_from_model_registry()
+    rate_limiter = llm_rate_limiter.create_rate_limiter(model, deployment, _rate_limits, name=f"{deployment.rstrip('/')}/{model}")
+    if rate_limiter is None and isinstance(client, openai.AzureOpenAI) and model not in _rate_limits.get('deployment_models', {}):
+      print(f"WARNING: Azure OpenAI deployment '{model}' is not rate limited. Map it to its model in the 'deployment_models' section of the rate limits.")
+    _rate_limiters[key] = rate_limiter
+    return rate_limiter
+
+# Estimates the tokens a request counts against the TPM limit: prompt tokens + maximum output tokens
+def estimate_request_tokens(text, max_output_tokens=DEFAULT_ESTIMATED_OUTPUT_TOKENS):
+  if not isinstance(text, str): text = json.dumps(text, default=str)
+  return llm_rate_limiter.estimate_tokens(text, max_output_tokens)
+
+# Returns the total tokens of a responses, chat completions or embeddings response, 0 if it has no usage
+def get_response_used_tokens(response):
+  return llm_rate_limiter.get_used_tokens(response)
+
+# Waits for capacity of the model's rate limiter, calls fn and reconciles the reservation with the usage of the response.
+# Use inside retry_on_openai_errors() so that each attempt reserves its own request: retry_on_openai_errors(lambda: call_with_rate_limit(...))
+def call_with_rate_limit(client, model, estimated_tokens, fn):
+  return llm_rate_limiter.call_with_rate_limit(get_rate_limiter(client, model), estimated_tokens, fn)
+
+# Prints all rate limiters used so far
+def print_rate_limiters(indentation=0):
+  with _rate_limiters_lock: rate_limiters = [r for r in _rate_limiters.values() if r is not None]
+  for rate_limiter in rate_limiters: print(f"{' '*indentation}Rate limiter {rate_limiter}")
+
+# ----------------------------------------------------- END: Rate limiting ----------------------------------------------------
+
+# ----------------------------------------------------- START: Pagination -----------------------------------------------------
+
+# Maximum 'limit' accepted by the list endpoints. The Files API accepts up to 10000 items per page, all other cursor-paginated endpoints up to 100.
+PAGINATION_MAX_LIMIT = 100
+PAGINATION_MAX_LIMIT_FILES = 10000
+
+# Collects page and item counts of a paginated listing. Filled in by iterate_paginated_items() and get_all_paginated_items().
+@dataclass
+class PaginationStats:
+  pages: int = 0
+  items: int = 0
+  start_time: float = 0.0
+  end_time: float = 0.0
+
+  @property
+  def elapsed_seconds(self):
+    end_time = self.end_time if self.end_time else time.perf_counter()
+    return (end_time - self.start_time) if self.start_time else 0.0
+
+  @property
+  def pages_per_second(self):
+    return (self.pages / self.elapsed_seconds) if self.elapsed_seconds > 0 else 0.0
+
+  @property
+  def items_per_second(self):
+    return (self.items / self.elapsed_seconds) if self.elapsed_seconds > 0 else 0.0
+
+  def __str__(self):
+    pages = f"{self.pages} page{'s' if self.pages != 1 else ''}"
+    items = f"{self.items:,} item{'s' if self.items != 1 else ''}"
+    return f"{pages}, {items} in {format_milliseconds(int(self.elapsed_seconds * 1000))} ({self.pages_per_second:.1f} pages/sec, {self.items_per_second:.1f} items/sec)"
+
+def iterate_paginated_items(list_function, limit=PAGINATION_MAX_LIMIT, stats=None, **list_params):
+  """
+  Generator over all items of a cursor-paginated list endpoint ('after' = ID of the last item of the previous page).
+  While the caller processes the items of the current page, the next page is already fetched in a background thread.
+
+  Args:
+    list_function: SDK list method, e.g. client.files.list or client.vector_stores.files.list
+    limit: Page size passed as 'limit' (None = do not pass 'limit' for endpoints that don't support it)
+    stats: Optional PaginationStats object that receives page/item counts and timings
+    **list_params: Additional parameters passed to every call, e.g. vector_store_id='vs_123', filter='failed'
+
+  Example:
+    stats = PaginationStats()
+    for file in iterate_paginated_items(client.files.list, limit=PAGINATION_MAX_LIMIT_FILES, stats=stats): ...
+    print(stats)  # -> 3 pages, 24,810 items in 4.2 secs (0.7 pages/sec, 5907.1 items/sec)
+  """
+  if stats is None: stats = PaginationStats()
+  if limit: list_params['limit'] = limit
+  stats.start_time = time.perf_counter(); stats.end_time = 0.0
+  with ThreadPoolExecutor(max_workers=1) as executor:
+    page = list_function(**list_params)
+    try:
+      while True:
+        stats.pages += 1
+        page_items = list(getattr(page, 'data', None) or [])
+        has_more = hasattr(page, 'has_more') and page.has_more
+        last_id = getattr(page_items[-1], 'id', None) if page_items else None
+        # Prefetch next page before handing out the items of the current page
+        next_page_future = executor.submit(list_function, after=last_id, **list_params) if (has_more and last_id) else None
+        for item in page_items:
+          stats.items += 1
+          yield item
+        if not next_page_future: break
+        page = next_page_future.result()
+    finally:
+      stats.end_time = time.perf_counter()
+
+# Returns all items of a cursor-paginated list endpoint as list. See iterate_paginated_items() for parameters.
+def get_all_paginated_items(list_function, limit=PAGINATION_MAX_LIMIT, stats=None, **list_params):
+  return list(iterate_paginated_items(list_function, limit=limit, stats=stats, **list_params))
+
+# ----------------------------------------------------- END: Pagination -------------------------------------------------------
+
+# ----------------------------------------------------- START: Bulk deletion --------------------------------------------------
+
+# Shared executor for deleting many objects: runs deletions concurrently, adapts the number of requests in flight to
+# rate limits (AIMD: +1 after a window of successful requests, halved on HTTP 429, paused until the reset time given in
+# the 'retry-after' / 'x-ratelimit-*' headers), dedupes keys and records one DeleteResult per key.
+# With 'journal_path', the planned keys and every outcome are appended to a JSONL journal. An interrupted run can be
+# continued with resume_bulk_delete(client, journal_path) without listing the objects again.
+
+DEFAULT_BULK_DELETE_MAX_CONCURRENCY = 16
+BULK_DELETE_KINDS = ['file', 'vector_store_file', 'vector_store', 'assistant', 'eval']
+
+# Calls an SDK method through 'with_raw_response' (if available) to get the response headers. Returns (result, headers).
+def call_with_response_headers(resource, method_name, *args, **kwargs):
+  raw_resource = getattr(resource, 'with_raw_response', None)
+  if raw_resource is None: return getattr(resource, method_name)(*args, **kwargs), {}
+  response = getattr(raw_resource, method_name)(*args, **kwargs)
+  return response.parse(), response.headers
+
+# Limits the number of requests in flight. The limit grows by 1 per 'limit' successful requests (additive increase),
+# is multiplied by 'decrease_factor' on rate limit errors (multiplicative decrease), and all requests pause until the
+# rate limit resets if a 429 response or 'x-ratelimit-remaining-requests' says so.
+class AdaptiveConcurrencyLimiter:
+  def __init__(self, max_concurrency=DEFAULT_BULK_DELETE_MAX_CONCURRENCY, min_concurrency=1, decrease_factor=0.5, default_wait_seconds=5):
+    self.max_concurrency = max(1, max_concurrency)
+    self.min_concurrency = max(1, min(min_concurrency, self.max_concurrency))
+    self.decrease_factor = decrease_factor
+    self.default_wait_seconds = default_wait_seconds
+    self.limit = float(max(self.min_concurrency, self.max_concurrency // 2))
+    self.in_flight = 0
+    self.paused_until = 0.0
+    self.rate_limited_count = 0
+    self.throttled_seconds = 0.0
+    self.condition = threading.Condition()
+
+  @property
+  def concurrency(self):
+    return int(self.limit)
+
+  def acquire(self):
+    with self.condition:
+      while True:
+        wait_seconds = self.paused_until - time.monotonic()
+        if wait_seconds <= 0 and self.in_flight < int(self.limit):
+          self.in_flight += 1
+          return
+        self.condition.wait(timeout=wait_seconds if wait_seconds > 0 else None)
+
+  def pause(self, wait_seconds):
+    paused_until = time.monotonic() + wait_seconds
+    if paused_until > self.paused_until:
+      self.throttled_seconds += paused_until - max(self.paused_until, time.monotonic())
+      self.paused_until = paused_until
+
+  # Releases a slot after a successful request (also after 404 Not Found) and grows the limit
+  def release_success(self, headers=None):
+    with self.condition:
+      self.in_flight -= 1
+      remaining = (headers or {}).get('x-ratelimit-remaining-requests')
+      if remaining is not None and str(remaining).isdigit() and int(remaining) <= self.in_flight:
+        self.pause(get_rate_limit_wait_seconds({'x-ratelimit-reset-requests': (headers or {}).get('x-ratelimit-reset-requests')}) or 1)
+      else:
+        self.limit = min(float(self.max_concurrency), self.limit + 1 / self.limit)
+      self.condition.notify_all()
+
+  # Releases a slot after a rate limit error, shrinks the limit and pauses until the rate limit resets
+  def release_rate_limited(self, headers=None):
+    with self.condition:
+      self.in_flight -= 1
+      self.rate_limited_count += 1
+      self.limit = max(float(self.min_concurrency), self.limit * self.decrease_factor)
+      self.pause(get_rate_limit_wait_seconds(headers) or self.default_wait_seconds)
+      self.condition.notify_all()
+
+  def release_error(self):
+    with self.condition:
+      self.in_flight -= 1
+      self.condition.notify_all()
+
+# Outcome of one deletion. status: 'deleted', 'not_found' (already deleted), 'failed', 'skipped' (done in journal) or 'dry_run'
+@dataclass
+class DeleteResult:
+  key: str
+  status: str
+  error: str = None
+  attempts: int = 0
+
+@dataclass
+class BulkDeleteResult:
+  kind: str
+  results: list
+  elapsed_seconds: float = 0.0
+  rate_limited_count: int = 0
+  throttled_seconds: float = 0.0
+
+  def get_keys_with_status(self, status):
+    return [r.key for r in self.results if r.status == status]
+
+  @property
+  def deleted_keys(self): return self.get_keys_with_status('deleted')
+
+  @property
+  def failed_results(self): return [r for r in self.results if r.status == 'failed']
+
+  def __str__(self):
+    counts = {}
+    for r in self.results: counts[r.status] = counts.get(r.status, 0) + 1
+    counts_str = ", ".join([f"{count:,} {status.replace('_', ' ')}" for status, count in counts.items()]) or "nothing to delete"
+    items_per_second = (len(self.results) / self.elapsed_seconds) if self.elapsed_seconds > 0 else 0.0
+    rate_limited = f", {self.rate_limited_count} rate limited, throttled {format_milliseconds(int(self.throttled_seconds * 1000))}" if self.rate_limited_count else ""
+    return f"{counts_str} in {format_milliseconds(int(self.elapsed_seconds * 1000))} ({items_per_second:.1f} items/sec{rate_limited})"
+
+# Returns the key of a vector store file for bulk_delete(kind='vector_store_file')
+def get_vector_store_file_key(vector_store_id, file_id):
+  return f"{vector_store_id}/{file_id}"
+
+# Deletes one object and returns the response headers
+def delete_object(client, kind, key):
+  if kind == 'file': _, headers = call_with_response_headers(client.files, 'delete', key)
+  elif kind == 'vector_store_file':
+    vector_store_id, file_id = key.split('/', 1)
+    _, headers = call_with_response_headers(client.vector_stores.files, 'delete', file_id=file_id, vector_store_id=vector_store_id)
+  elif kind == 'vector_store':
+    _, headers = call_with_response_headers(client.vector_stores, 'delete', key)
+    invalidate_vector_store_cache(client, key)
+  elif kind == 'assistant': _, headers = call_with_response_headers(client.beta.assistants, 'delete', key)
+  elif kind == 'eval': _, headers = call_with_response_headers(client.evals, 'delete', key)
+  else: raise ValueError(f"Invalid kind '{kind}'. Must be one of: {', '.join(BULK_DELETE_KINDS)}")
+  return headers
+
+def get_bulk_delete_label(kind, key):
+  if kind == 'vector_store_file':
+    vector_store_id, file_id = key.split('/', 1)
+    return f"file ID={file_id} from vector store ID={vector_store_id}"
+  return f"{kind.replace('_', ' ')} ID={key}"
+
+# Reads a bulk delete journal. Returns (kind, planned keys, dictionary key -> last recorded status).
+def read_bulk_delete_journal(journal_path):
+  kind = None; planned_keys = []; statuses = {}
+  with open(journal_path, 'r', encoding='utf-8') as f:
+    for line in f:
+      line = line.strip()
+      if not line: continue
+      try: entry = json.loads(line)
+      except json.JSONDecodeError: continue  # last line of an interrupted run can be incomplete
+      if entry.get('type') == 'plan':
+        kind = entry.get('kind', kind)
+        planned_keys.extend(entry.get('keys', []))
+      elif entry.get('type') == 'result':
+        statuses[entry['key']] = entry['status']
+  return kind, planned_keys, statuses
+
+def bulk_delete(client, kind, keys, labels=None, max_concurrency=DEFAULT_BULK_DELETE_MAX_CONCURRENCY, journal_path=None, dry_run=False, retry_policy=None, indentation=2):
+  """
+  Deletes many objects of one kind concurrently with rate-limit-aware concurrency (see AdaptiveConcurrencyLimiter).
+
+  Args:
+    client: OpenAI client
+    kind: 'file', 'vector_store_file', 'vector_store', 'assistant' or 'eval'
+    keys: Object IDs. For 'vector_store_file' use get_vector_store_file_key(vector_store_id, file_id). Duplicates are removed.
+    labels: Optional dictionary key -> text shown in the log instead of the ID
+    max_concurrency: Maximum number of deletions in flight
+    journal_path: Optional JSONL journal. Keys recorded as 'deleted' or 'not_found' are skipped, new keys are appended to the plan.
+    dry_run: Only log what would be deleted
+    retry_policy: RetryPolicy for transient errors (default: DEFAULT_RETRY_POLICY). Rate limit waits are handled by the limiter.
+
+  Returns:
+    BulkDeleteResult with one DeleteResult per unique key, in the order of keys
+
+  Example:
+    result = bulk_delete(client, 'file', [f.id for f in files], journal_path="./purge.jsonl")
+    print(result)  # -> 99,412 deleted, 588 not found in 14 mins, 2 secs (118.6 items/sec, 3 rate limited, throttled 41 secs)
+  """
+  if kind not in BULK_DELETE_KINDS: raise ValueError(f"Invalid kind '{kind}'. Must be one of: {', '.join(BULK_DELETE_KINDS)}")
+  keys = list(dict.fromkeys([k for k in keys if k]))
+  labels = labels or {}
+  indent = ' ' * indentation
+  start_time = time.perf_counter()
+
+  done_keys = set(); journal_lock = threading.Lock(); journal_file = None
+  if journal_path and not dry_run:
+    if os.path.exists(journal_path):
+      journal_kind, planned_keys, statuses = read_bulk_delete_journal(journal_path)
+      if journal_kind and journal_kind != kind: raise ValueError(f"Journal '{journal_path}' is for kind '{journal_kind}', not '{kind}'")
+      done_keys = {k for k, status in statuses.items() if status in ['deleted', 'not_found']}
+      new_keys = [k for k in keys if k not in set(planned_keys)]
+    else: new_keys = keys
+    journal_file = open(journal_path, 'a', encoding='utf-8')
+    if new_keys: journal_file.write(json.dumps({'type': 'plan', 'kind': kind, 'keys': new_keys, 'created_at': int(time.time())}) + "\n"); journal_file.flush()
+
+  limiter = AdaptiveConcurrencyLimiter(max_concurrency)
+  retry_policy = retry_policy or DEFAULT_RETRY_POLICY
+  keys_to_delete = [k for k in keys if k not in done_keys]
+  results_by_key = {k: DeleteResult(k, 'skipped') for k in keys if k in done_keys}
+  if done_keys: print(f"{indent}Skipping {len(results_by_key)} of {len(keys)} {kind.replace('_', ' ')}s already deleted according to journal '{journal_path}'.")
+  counter = {'count': 0}; counter_lock = threading.Lock()
+
+  def log_result(result):
+    with counter_lock:
+      counter['count'] += 1
+      label = labels.get(result.key) or get_bulk_delete_label(kind, result.key)
+      if result.status == 'deleted': print(f"{indent}[ {counter['count']} / {len(keys_to_delete)} ] Deleted {label}.")
+      elif result.status == 'not_found': print(f"{indent}[ {counter['count']} / {len(keys_to_delete)} ] {label} not found. Probably already deleted.")
+      elif result.status == 'dry_run': print(f"{indent}[ {counter['count']} / {len(keys_to_delete)} ] Deleting {label}... (dry run)")
+      else: print(f"{indent}[ {counter['count']} / {len(keys_to_delete)} ] WARNING: Failed to delete {label} -> {result.error}")
+    if journal_file:
+      with journal_lock:
+        journal_file.write(json.dumps({'type': 'result', 'key': result.key, 'status': result.status, 'error': result.error, 'attempts': result.attempts}) + "\n")
+        journal_file.flush()
+
+  def delete_one(key):
+    attempts = 0
+    while True:
+      attempts += 1
+      limiter.acquire()
+      released = False
+      try:
+        headers = delete_object(client, kind, key)
+        limiter.release_success(headers); released = True
+        result = DeleteResult(key, 'deleted', None, attempts)
+      except openai.NotFoundError as e:
+        limiter.release_success(get_error_headers(e)); released = True
+        result = DeleteResult(key, 'not_found', None, attempts)
+      except Exception as e:
+        if is_rate_limit_error(e): limiter.release_rate_limited(get_error_headers(e))
+        else: limiter.release_error()
+        released = True
+        delay_seconds = retry_policy.get_retry_delay_seconds(attempts + 1, e)
+        if delay_seconds is not None:
+          # Rate limit errors wait in limiter.acquire() until the rate limit resets
+          if not is_rate_limit_error(e): time.sleep(delay_seconds)
+          continue
+        result = DeleteResult(key, 'failed', str(e), attempts)
+      finally:
+        if not released: limiter.release_error()
+      log_result(result)
+      return result
+
+  try:
+    if dry_run:
+      for key in keys_to_delete:
+        results_by_key[key] = DeleteResult(key, 'dry_run'); log_result(results_by_key[key])
+    elif keys_to_delete:
+      executor = ThreadPoolExecutor(max_workers=min(limiter.max_concurrency, len(keys_to_delete)))
+      try:
+        for result in executor.map(delete_one, keys_to_delete): results_by_key[result.key] = result
+      finally:
+        # On interruption, don't start the remaining deletions (the journal records what is done)
+        executor.shutdown(wait=True, cancel_futures=True)
+  finally:
+    if journal_file: journal_file.close()
+
+  return BulkDeleteResult(kind, [results_by_key[k] for k in keys], time.perf_counter() - start_time, limiter.rate_limited_count, limiter.throttled_seconds)
+
+# Continues an interrupted bulk_delete() from its journal. Keys are taken from the journal, nothing is listed.
+def resume_bulk_delete(client, journal_path, max_concurrency=DEFAULT_BULK_DELETE_MAX_CONCURRENCY, retry_policy=None, indentation=2):
+  kind, planned_keys, _ = read_bulk_delete_journal(journal_path)
+  if not kind: raise ValueError(f"Journal '{journal_path}' contains no plan")
+  return bulk_delete(client, kind, planned_keys, max_concurrency=max_concurrency, journal_path=journal_path, retry_policy=retry_policy, indentation=indentation)
+
+# ----------------------------------------------------- END: Bulk deletion ----------------------------------------------------
+
 # ----------------------------------------------------- START: Files ----------------------------------------------------------
 # Gets all files from Azure OpenAI with pagination handling.
 # Adds a zero-based 'index' attribute to each file.
-def get_all_files(client):
-  first_page = client.files.list()
-  has_more = hasattr(first_page, 'has_more') and first_page.has_more
-  
-  # If only one page, add 'index' and return
-  if not has_more:
-    for idx, file in enumerate(first_page.data): setattr(file, 'index', idx)
-    return first_page.data
-  
-  # Initialize collection with first page data
-  all_files = list(first_page.data)
-  total_files = len(all_files)
-  
-  # Continue fetching pages while there are more results
-  current_page = first_page
-  while has_more:
-    last_id = current_page.data[-1].id if current_page.data else None    
-    if not last_id: break
-    next_page = client.files.list(after=last_id)
-    all_files.extend(next_page.data)
-    total_files += len(next_page.data)
-    current_page = next_page
-    has_more = hasattr(next_page, 'has_more') and next_page.has_more
+def get_all_files(client, stats=None):
+  all_files = get_all_paginated_items(client.files.list, limit=PAGINATION_MAX_LIMIT_FILES, stats=stats)
   
   # Add index attribute to all files
   for idx, file in enumerate(all_files): setattr(file, 'index', idx)
@@ -310,22 +1004,15 @@ def format_files_table(file_list):
   
   return '\n'.join(lines)
 
-# Deletes a list of files
-def delete_files(client, files):
-  for file in files:
-    file_id = getattr(file, 'id', None)
-    if not file_id: continue
-    filename = getattr(file, 'filename', None)
-    print(f"Deleting file ID={file_id} '{filename}'...")
-    try: client.files.delete(file_id)
-    except Exception as e: print(f"  WARNING: Failed to delete file file_id={file_id} '{filename}'. The file is probably already deleted in the global file storage.")
-
-# Deletes a list of file IDs
-def delete_file_ids(client, file_ids):
-  for file_id in file_ids:
-    print(f"Deleting file ID={file_id}...")
-    try: client.files.delete(file_id)
-    except Exception as e: print(f"  WARNING: Failed to delete file file_id={file_id}. The file is probably already deleted in the global file storage.")
+# Deletes a list of files concurrently (see bulk_delete). Returns a BulkDeleteResult.
+def delete_files(client, files, max_concurrency=DEFAULT_BULK_DELETE_MAX_CONCURRENCY, journal_path=None):
+  file_ids = [getattr(file, 'id', None) for file in files]
+  labels = {f.id: f"file ID={f.id} '{f.filename}'" for f in files if getattr(f, 'id', None) and getattr(f, 'filename', None)}
+  return bulk_delete(client, 'file', file_ids, labels, max_concurrency, journal_path, indentation=0)
+
+# Deletes a list of file IDs concurrently (see bulk_delete). Returns a BulkDeleteResult.
+def delete_file_ids(client, file_ids, max_concurrency=DEFAULT_BULK_DELETE_MAX_CONCURRENCY, journal_path=None):
+  return bulk_delete(client, 'file', file_ids, None, max_concurrency, journal_path, indentation=0)
 
 # returns dictionary with metrics for a list of files
 def get_filelist_metrics(files):
@@ -367,33 +1054,8 @@ def get_assistant_vector_store_id(client, assistant):
   return None
 
 # Adds a zero-based 'index' attribute to each file.
-def get_all_assistants(client):
-  first_page = client.beta.assistants.list()
-  has_more = hasattr(first_page, 'has_more') and first_page.has_more
-  
-  # If only one page, add 'index' and return
-  if not has_more:
-    for idx, assistant in enumerate(first_page.data):
-      setattr(assistant, 'index', idx)
-      # Extract and set vector store ID
-      vector_store_id = get_assistant_vector_store_id(client, assistant)
-      setattr(assistant, 'vector_store_id', vector_store_id)
-    return first_page.data
-  
-  # Initialize collection with first page data
-  all_assistants = list(first_page.data)
-  total_assistants = len(all_assistants)
-  
-  # Continue fetching pages while there are more results
-  current_page = first_page
-  while has_more:
-    last_id = current_page.data[-1].id if current_page.data else None    
-    if not last_id: break
-    next_page = client.beta.assistants.list(after=last_id)
-    all_assistants.extend(next_page.data)
-    total_assistants += len(next_page.data)
-    current_page = next_page
-    has_more = hasattr(next_page, 'has_more') and next_page.has_more
+def get_all_assistants(client, stats=None):
+  all_assistants = get_all_paginated_items(client.beta.assistants.list, stats=stats)
   
   # Add 'index' attribute and extract vector store ID for all assistants
   for idx, assistant in enumerate(all_assistants):
@@ -515,22 +1177,18 @@ def get_assistant_answer(client, assistant_id, query):
         assistant_id=assistant_id
       )
       
-      # Wait for the run to complete
-      while True:
-        run_status = client.beta.threads.runs.retrieve(
-          thread_id=thread.id,
-          run_id=run.id
-        )
-        
-        if run_status.status == 'completed':
-          break
-        elif run_status.status == 'failed':
-          error_msg = run_status.last_error.message if hasattr(run_status, 'last_error') else 'Unknown error'
-          # Delete thread before raising exception
-          client.beta.threads.delete(thread_id=thread.id)
-          raise Exception(f"Run failed: {error_msg}")
-        
-        time.sleep(1)
+      # Wait for the run to complete (adaptive polling, see StatusWatcher)
+      result = wait_for_runs(client, [(thread.id, run.id)])[run.id]
+      error_msg = None
+      if result.timed_out: error_msg = f"Run not completed after {format_milliseconds(int(result.elapsed_seconds * 1000))}"
+      elif result.error: error_msg = f"Run status unknown: {result.error}"
+      elif result.value.status != 'completed':
+        last_error = getattr(result.value, 'last_error', None)
+        error_msg = f"Run {result.value.status}: {last_error.message if last_error else 'Unknown error'}"
+      if error_msg:
+        # Delete thread before raising exception
+        client.beta.threads.delete(thread_id=thread.id)
+        raise Exception(error_msg)
       
       # Get the assistant's response
       messages = client.beta.threads.messages.list(thread_id=thread.id)
@@ -558,276 +1216,793 @@ def get_assistant_answer(client, assistant_id, query):
 
 # ----------------------------------------------------- END: Assistants -------------------------------------------------------
 
-# Gets all vector stores from Azure OpenAI with pagination handling.
-# Adds a zero-based 'index' attribute to each vector store.
-# Implements fallback as broken vector stores can cause the REST API to return 404 Not Found
-def get_all_vector_stores(client, include_broken_ones: bool = False):
-  # Dummy class to mark 404 errors in vector store lists
-  class DummyVectorStore404:
-    def __init__(self, error_context):
-      self.id = "[UNKNOWN]"
-      self.name = f"[404: {error_context}]"
-      self.created_at = 0
-      self.file_counts = None
-      self.status = ""
-      self.error_context = error_context
-  
+# ----------------------------------------------------- START: Vector store enumeration ---------------------------------------
+
+# Broken vector stores can cause the REST API to return 404 Not Found while paginating. Two cases are handled:
+# 1) Broken cursor: the vector store is listed, but 'after=<its ID>' fails. The page is re-requested from the vector store
+#    before it, so the page straddles the broken ID and the listing continues with full pages.
+# 2) Unlistable vector store: every page that would contain it fails. The largest page that still works is found by
+#    bisection of 'limit' (about 7 requests for limit=100). The listing then jumps past the broken vector store if its ID
+#    is known (from the error message or from an earlier run), otherwise the rest is listed from the other end (order='asc').
+# Detected broken vector stores are saved to 'known_broken_vector_stores_path', so later runs skip them without bisection.
+# A saved gap is never trusted blindly: vector stores created since then are listed from the broken vector store towards
+# the cursor (order='asc'), and one probe request checks that the gap still exists. If the broken vector store can be
+# listed again, or its ID is unknown, the gap is dropped and the listing continues normally.
+DEFAULT_KNOWN_BROKEN_VECTOR_STORES_PATH = "./known_broken_vector_stores.json"
+
+# Marks a position in a vector store list where the REST API returned 404
+# Placeholder for vector stores that can't be listed. broken_id: ID of the unlistable vector store, None if unknown.
+class DummyVectorStore404:
+  def __init__(self, error_context, broken_id=None):
+    self.id = "[UNKNOWN]"
+    self.name = f"[404: {error_context}]"
+    self.created_at = 0
+    self.file_counts = None
+    self.status = ""
+    self.usage_bytes = 0
+    self.error_context = error_context
+    self.broken_id = broken_id
+
+# Loads the known broken vector stores of one API endpoint. Returns a dictionary with keys:
+# 'broken_cursor_ids': list of vector store IDs that can't be used as 'after' cursor
+# 'gaps': dictionary 'after_id' -> { 'broken_id', 'resume_id', 'error_context', 'detected_at' } for unlistable vector stores.
+#   'after_id' is the last vector store before the gap in default (desc) order ('' = start of list), 'resume_id' the first one after it.
+def load_known_broken_vector_stores(known_broken_vector_stores_path, endpoint):
+  known = {'broken_cursor_ids': [], 'gaps': {}}
+  if not known_broken_vector_stores_path or not os.path.exists(known_broken_vector_stores_path): return known
   try:
-    first_page = client.vector_stores.list()
-    has_more = hasattr(first_page, 'has_more') and first_page.has_more
-    
-    # If only one page, add 'index' and return
-    if not has_more:
-      result = first_page.data if include_broken_ones else [vs for vs in first_page.data if vs.id != "[UNKNOWN]"]
-      for idx, vector_store in enumerate(result): setattr(vector_store, 'index', idx)
-      return result
-    
-    # Initialize collection with first page data
-    all_vector_stores = list(first_page.data)
-    total_vector_stores = len(all_vector_stores)
-    
-    # Continue fetching pages while there are more results
-    current_page = first_page
-    while has_more:
-      last_id = current_page.data[-1].id if current_page.data else None    
-      if not last_id: break
-      
+    with open(known_broken_vector_stores_path, 'r', encoding='utf-8') as f: data = json.load(f)
+    known.update(data.get(endpoint, {}))
+  except Exception as e:
+    print(f"  WARNING: Failed to read known broken vector stores from '{known_broken_vector_stores_path}' -> {e}")
+  return known
+
+# Saves the known broken vector stores of one API endpoint (atomic: temp file + rename). Other endpoints in the file are kept.
+def save_known_broken_vector_stores(known_broken_vector_stores_path, endpoint, known):
+  data = {}
+  if os.path.exists(known_broken_vector_stores_path):
+    try:
+      with open(known_broken_vector_stores_path, 'r', encoding='utf-8') as f: data = json.load(f)
+    except Exception: data = {}
+  data[endpoint] = known
+  temp_path = known_broken_vector_stores_path + '.tmp'
+  with open(temp_path, 'w', encoding='utf-8') as f: json.dump(data, f, indent=2)
+  os.replace(temp_path, known_broken_vector_stores_path)
+
+# Generator over all vector stores (default order: newest first) that works around broken vector stores (see above).
+# With include_broken_ones=True, a DummyVectorStore404 marker (id='[UNKNOWN]') is yielded at every gap.
+# Set known_broken_vector_stores_path=None to neither read nor write the list of known broken vector stores.
+def iterate_all_vector_stores(client, include_broken_ones=False, known_broken_vector_stores_path=DEFAULT_KNOWN_BROKEN_VECTOR_STORES_PATH, limit=PAGINATION_MAX_LIMIT, stats=None):
+  if stats is None: stats = PaginationStats()
+  endpoint = str(getattr(client, 'base_url', ''))
+  known = load_known_broken_vector_stores(known_broken_vector_stores_path, endpoint)
+  broken_cursor_ids = set(known['broken_cursor_ids']); gaps = known['gaps']
+  known_changed = False
+  seen_ids = set()
+
+  def list_page(order, after, page_limit):
+    params = {'order': order, 'limit': page_limit}
+    if after: params['after'] = after
+    page = client.vector_stores.list(**params)
+    stats.pages += 1
+    return list(page.data), bool(getattr(page, 'has_more', False))
+
+  # Finds the largest page after 'after' that can be listed, given that 'page_limit' failed with 'error'.
+  # Returns (items, has_more, error). error is None if the end of the list was reached before the broken vector store.
+  def bisect_page(order, after, page_limit, error):
+    good_items = []; good_has_more = True; lo = 0; hi = page_limit
+    while hi - lo > 1:
+      mid = (lo + hi) // 2
       try:
-        next_page = client.vector_stores.list(after=last_id)
-      except openai.NotFoundError:
-        # Insert 404 marker
-        all_vector_stores.append(DummyVectorStore404(f"Pagination after={last_id}"))
-        # Fallback: Try fetching with desc order and limit=1
-        fetched_ids = {vs.id for vs in all_vector_stores}
-        try:
-          desc_page = client.vector_stores.list(order='desc', limit=1)
-          desc_has_more = hasattr(desc_page, 'has_more') and desc_page.has_more
-          desc_current = desc_page
-          
-          # Add if not already fetched
-          if desc_page.data and desc_page.data[0].id not in fetched_ids:
-            all_vector_stores.extend(desc_page.data)
-            fetched_ids.add(desc_page.data[0].id)
-          
-          # Continue fetching in desc order until 404 or duplicate
-          while desc_has_more:
-            last_desc_id = desc_current.data[-1].id if desc_current.data else None
-            if not last_desc_id: break
-            try:
-              desc_next = client.vector_stores.list(order='desc', limit=1, after=last_desc_id)
-              # Check if already fetched
-              if desc_next.data and desc_next.data[0].id in fetched_ids:
-                break
-              all_vector_stores.extend(desc_next.data)
-              fetched_ids.update(vs.id for vs in desc_next.data)
-              desc_current = desc_next
-              desc_has_more = hasattr(desc_next, 'has_more') and desc_next.has_more
-            except openai.NotFoundError:
-              # Insert 404 marker and switch to asc order
-              all_vector_stores.append(DummyVectorStore404(f"DESC order after={last_desc_id}"))
-              break
-          
-          # Now fetch with asc order
-          try:
-            asc_page = client.vector_stores.list(order='asc', limit=1)
-            asc_has_more = hasattr(asc_page, 'has_more') and asc_page.has_more
-            asc_current = asc_page
-            
-            # Add if not already fetched
-            if asc_page.data and asc_page.data[0].id not in fetched_ids:
-              all_vector_stores.extend(asc_page.data)
-              fetched_ids.add(asc_page.data[0].id)
-            
-            # Continue fetching in asc order
-            while asc_has_more:
-              last_asc_id = asc_current.data[-1].id if asc_current.data else None
-              if not last_asc_id: break
-              try:
-                asc_next = client.vector_stores.list(order='asc', limit=1, after=last_asc_id)
-                # Check if already fetched
-                if asc_next.data and asc_next.data[0].id in fetched_ids:
-                  break
-                all_vector_stores.extend(asc_next.data)
-                fetched_ids.update(vs.id for vs in asc_next.data)
-                asc_current = asc_next
-                asc_has_more = hasattr(asc_next, 'has_more') and asc_next.has_more
-              except openai.NotFoundError:
-                all_vector_stores.append(DummyVectorStore404(f"ASC order after={last_asc_id}"))
-                break
-          except openai.NotFoundError:
-            # ASC initial fetch failed as part of fallback
-            pass
-        except openai.NotFoundError:
-          # If desc fails, try asc directly
-          pass
-          try:
-            asc_page = client.vector_stores.list(order='asc', limit=1)
-            asc_has_more = hasattr(asc_page, 'has_more') and asc_page.has_more
-            asc_current = asc_page
-            
-            # Add if not already fetched
-            if asc_page.data and asc_page.data[0].id not in fetched_ids:
-              all_vector_stores.extend(asc_page.data)
-              fetched_ids.add(asc_page.data[0].id)
-            
-            # Continue fetching in asc order
-            while asc_has_more:
-              last_asc_id = asc_current.data[-1].id if asc_current.data else None
-              if not last_asc_id: break
-              try:
-                asc_next = client.vector_stores.list(order='asc', limit=1, after=last_asc_id)
-                # Check if already fetched
-                if asc_next.data and asc_next.data[0].id in fetched_ids:
-                  break
-                all_vector_stores.extend(asc_next.data)
-                fetched_ids.update(vs.id for vs in asc_next.data)
-                asc_current = asc_next
-                asc_has_more = hasattr(asc_next, 'has_more') and asc_next.has_more
-              except openai.NotFoundError:
-                all_vector_stores.append(DummyVectorStore404(f"Fallback ASC after={last_asc_id}"))
-                break
-          except openai.NotFoundError:
-            # Fallback ASC initial failed
-            pass
-        break
-      
-      all_vector_stores.extend(next_page.data)
-      total_vector_stores += len(next_page.data)
-      current_page = next_page
-      has_more = hasattr(next_page, 'has_more') and next_page.has_more
-    
-    # Filter out dummy markers if requested
-    if not include_broken_ones: all_vector_stores = [vs for vs in all_vector_stores if vs.id != "[UNKNOWN]"]
-    
-    # Add index attribute to all vector stores
-    for idx, vector_store in enumerate(all_vector_stores): setattr(vector_store, 'index', idx)
-      
-    return all_vector_stores
-    
-  except openai.NotFoundError:
-    # If initial request fails with 404, try desc order with limit=1
-    all_vector_stores = []
+        items, has_more = list_page(order, after, mid)
+        if not has_more: return items, False, None
+        good_items = items; good_has_more = has_more; lo = mid
+      except openai.NotFoundError as e: hi = mid; error = e
+    return good_items, good_has_more, error
+
+  def list_largest_page(order, after):
     try:
-      desc_page = client.vector_stores.list(order='desc', limit=1)
-      all_vector_stores.extend(desc_page.data)
-      
-      # Add index and return if no more pages
-      if not (hasattr(desc_page, 'has_more') and desc_page.has_more):
-        if not include_broken_ones: all_vector_stores = [vs for vs in all_vector_stores if vs.id != "[UNKNOWN]"]
-        for idx, vector_store in enumerate(all_vector_stores): setattr(vector_store, 'index', idx)
-        return all_vector_stores
-      
-      # Continue fetching in desc order until 404
-      current_page = desc_page
-      has_more = True
-      fetched_ids = {vs.id for vs in all_vector_stores}
-      
-      while has_more:
-        last_id = current_page.data[-1].id if current_page.data else None
-        if not last_id: break
+      items, has_more = list_page(order, after, limit)
+      return items, has_more, None
+    except openai.NotFoundError as e:
+      return bisect_page(order, after, limit, e)
+
+  # The page after 'after' failed: if the next known gap is within this page, returns the vector stores up to the gap
+  # (newest first, ending with the vector store before the gap) from one ascending page instead of bisecting.
+  def list_page_up_to_known_gap(after):
+    gap_after_id = next((id for id in gaps if id and id not in seen_ids), None)
+    if not gap_after_id: return None
+    try:
+      items, has_more = list_page('asc', gap_after_id, limit)
+      gap_vector_store = client.vector_stores.retrieve(gap_after_id)
+    except openai.NotFoundError: return None
+    ids = [vs.id for vs in items]
+    if after and after not in ids: return None
+    if not after and has_more: return None
+    if after: items = items[:ids.index(after)]
+    return list(reversed(items)) + [gap_vector_store]
+
+  # Vector stores between 'after' ('' = start of list) and the known broken vector store, newest first. They were created
+  # after the gap was saved. Listed in ascending order from the broken vector store until 'after' or a seen one is reached.
+  def list_vector_stores_before_known_gap(after, broken_id):
+    new_items = []; asc_cursor = broken_id
+    while True:
+      items, has_more = list_page('asc', asc_cursor, limit)
+      for vs in items:
+        if vs.id == after or vs.id in seen_ids: return list(reversed(new_items))
+        new_items.append(vs)
+      if not has_more or not items: return list(reversed(new_items))
+      asc_cursor = items[-1].id
+
+  # True if the page right after 'after' still fails, i.e. the gap still exists
+  def is_gap_still_broken(after):
+    try: list_page('desc', after or None, 1)
+    except openai.NotFoundError: return True
+    return False
+
+  def mark_seen(items):
+    new_items = [vs for vs in items if vs.id not in seen_ids]
+    seen_ids.update(vs.id for vs in new_items)
+    stats.items += len(new_items)
+    return new_items
+
+  # Lists the remaining vector stores from the other end of the list until a seen vector store is reached.
+  # Broken vector stores named in the error message are skipped like in the descending listing.
+  # Returns (new items, list of (error context, broken vector store ID or None) of the broken vector stores that were hit).
+  def list_from_other_end():
+    asc_items = []; asc_ids = set(); error_contexts = []; cursor = None
+    while True:
+      items, has_more, error = list_largest_page('asc', cursor)
+      for vs in items:
+        if vs.id in seen_ids: return asc_items, error_contexts
+        asc_items.append(vs); asc_ids.add(vs.id)
+      if items: cursor = items[-1].id
+      if error:
+        broken_id = next((id for id in re.findall(r"vs_[A-Za-z0-9]+", str(error)) if id != cursor and id not in asc_ids), None)
+        error_contexts.append((f"ASC order after={cursor}", broken_id))
+        if not broken_id or broken_id in seen_ids: return asc_items, error_contexts
+        print(f"    Skipping broken vector store ID={broken_id}.")
+        asc_ids.add(broken_id); cursor = broken_id
+        continue
+      if not has_more or not items: return asc_items, error_contexts
+
+  stats.start_time = time.perf_counter(); stats.end_time = 0.0
+  try:
+    # previous_id: ID of the vector store before 'cursor' ('' = cursor is the first one, None = unknown)
+    cursor = None; previous_id = None
+    while True:
+      # Known unlistable vector store right after the cursor: list the vector stores created since, then skip it
+      gap = gaps.get(cursor or '')
+      if gap and gap.get('broken_id'):
+        gap_key = cursor or ''
         try:
-          next_page = client.vector_stores.list(order='desc', limit=1, after=last_id)
-          all_vector_stores.extend(next_page.data)
-          fetched_ids.update(vs.id for vs in next_page.data)
-          current_page = next_page
-          has_more = hasattr(next_page, 'has_more') and next_page.has_more
-        except openai.NotFoundError:
-          # Switch to asc order to fetch remaining vector stores
-          # Collect ASC items separately to insert them before the 404 marker
-          asc_items = []
-          try:
-            asc_page = client.vector_stores.list(order='asc', limit=1)
-            asc_has_more = hasattr(asc_page, 'has_more') and asc_page.has_more
-            asc_current = asc_page
-            
-            # Add if not already fetched
-            if asc_page.data and asc_page.data[0].id not in fetched_ids:
-              asc_items.extend(asc_page.data)
-              fetched_ids.add(asc_page.data[0].id)
-            
-            # Continue fetching in asc order
-            while asc_has_more:
-              last_asc_id = asc_current.data[-1].id if asc_current.data else None
-              if not last_asc_id: break
-              try:
-                asc_next = client.vector_stores.list(order='asc', limit=1, after=last_asc_id)
-                # Check if already fetched
-                if asc_next.data and asc_next.data[0].id in fetched_ids:
-                  break
-                asc_items.extend(asc_next.data)
-                asc_current = asc_next
-                asc_has_more = hasattr(asc_next, 'has_more') and asc_next.has_more
-              except openai.NotFoundError:
-                asc_items.append(DummyVectorStore404(f"ASC after={last_asc_id}"))
-                break
-          except openai.NotFoundError:
-            # ASC initial fetch failed, but this is expected as part of fallback
-            pass
-          
-          # Insert ASC items before adding the DESC 404 marker
-          all_vector_stores.extend(asc_items)
-          all_vector_stores.append(DummyVectorStore404(f"DESC after={last_id}"))
-          break
-      
-      if not include_broken_ones:
-        all_vector_stores = [vs for vs in all_vector_stores if vs.id != "[UNKNOWN]"]
-      for idx, vector_store in enumerate(all_vector_stores): setattr(vector_store, 'index', idx)
-      return all_vector_stores
-      
-    except openai.NotFoundError:
-      # Final fallback: Fetch one-by-one with asc order
+          items_before_gap = list_vector_stores_before_known_gap(gap_key, gap['broken_id'])
+          gap_still_broken = is_gap_still_broken(items_before_gap[-1].id if items_before_gap else cursor)
+        except openai.NotFoundError: items_before_gap = []; gap_still_broken = False
+        if not gap_still_broken:
+          # Broken vector store can be listed again (or can't be used as cursor anymore): forget the gap and list normally
+          del gaps[gap_key]; known_changed = True
+          gap = None
+        elif items_before_gap:
+          for vs in mark_seen(items_before_gap): yield vs
+          previous_id = items_before_gap[-2].id if len(items_before_gap) >= 2 else (cursor or '')
+          cursor = items_before_gap[-1].id
+          # The gap now comes after the newest vector store before it
+          del gaps[gap_key]; gaps[cursor] = gap; known_changed = True
+      elif gap:
+        # ID of the broken vector store unknown: the gap can't be checked, detect it again
+        del gaps[cursor or '']; known_changed = True
+        gap = None
+      if gap:
+        if include_broken_ones: yield DummyVectorStore404(gap.get('error_context') or f"Pagination after={cursor}", gap.get('broken_id'))
+        resume_vector_store = None
+        if gap.get('resume_id'):
+          try: resume_vector_store = client.vector_stores.retrieve(gap['resume_id'])
+          except openai.NotFoundError: pass
+        if resume_vector_store and mark_seen([resume_vector_store]):
+          yield resume_vector_store
+          cursor = resume_vector_store.id; previous_id = None
+          continue
+        if gap.get('broken_id') and gap['broken_id'] not in seen_ids:
+          seen_ids.add(gap['broken_id'])
+          cursor = gap['broken_id']; previous_id = None
+          continue
+        # Gap can't be skipped anymore: forget it and detect again
+        del gaps[cursor or '']; known_changed = True
+
+      # Known broken cursor: request the page from the vector store before it
+      if cursor in broken_cursor_ids and previous_id is not None: page_cursor = previous_id or None
+      else: page_cursor = cursor
+      error = None
       try:
-        asc_page = client.vector_stores.list(order='asc', limit=1)
-        all_vector_stores.extend(asc_page.data)
-        
-        # Continue fetching one-by-one in ascending order
-        asc_has_more = hasattr(asc_page, 'has_more') and asc_page.has_more
-        asc_current = asc_page
-        fetched_ids = {vs.id for vs in all_vector_stores if hasattr(vs, 'id') and vs.id != "[UNKNOWN]"}
-        
-        while asc_has_more:
-          last_asc_id = asc_current.data[-1].id if asc_current.data else None
-          if not last_asc_id: break
-          try:
-            asc_next = client.vector_stores.list(order='asc', limit=1, after=last_asc_id)
-            # Check if already fetched
-            if asc_next.data and asc_next.data[0].id in fetched_ids:
-              break
-            all_vector_stores.extend(asc_next.data)
-            asc_current = asc_next
-            asc_has_more = hasattr(asc_next, 'has_more') and asc_next.has_more
-          except openai.NotFoundError:
-            all_vector_stores.append(DummyVectorStore404(f"ASC after={last_asc_id}"))
-            break
-        
-        if not include_broken_ones:
-          all_vector_stores = [vs for vs in all_vector_stores if vs.id != "[UNKNOWN]"]
-        for idx, vector_store in enumerate(all_vector_stores): setattr(vector_store, 'index', idx)
-        return all_vector_stores
-      except openai.NotFoundError:
-        # If all strategies fail, return list with error marker
-        all_vector_stores.append(DummyVectorStore404("All fallbacks failed"))
-        if not include_broken_ones:
-          all_vector_stores = [vs for vs in all_vector_stores if vs.id != "[UNKNOWN]"]
-        for idx, vector_store in enumerate(all_vector_stores): setattr(vector_store, 'index', idx)
-        return all_vector_stores
+        items, has_more = list_page('desc', page_cursor, limit)
+      except openai.NotFoundError as e:
+        items, has_more, error = [], True, e
+        # Broken cursor? Request the page from the vector store before the cursor, so that it straddles the cursor
+        # The straddling page is bisected too: an unlistable vector store right after the broken cursor would otherwise
+        # make it fail as a whole, and the vector stores between the two could not be listed from either end.
+        if cursor and page_cursor == cursor and previous_id is not None:
+          straddling_items, straddling_has_more, straddling_error = list_largest_page('desc', previous_id or None)
+          if len(straddling_items) >= 2 and straddling_items[0].id == cursor:
+            # If the straddling page failed too, the first request may have failed because of the unlistable vector store
+            # and not because of the cursor: the cursor is broken only if the part of the page that worked fails after it
+            cursor_is_broken = True
+            if straddling_error:
+              try: list_page('desc', cursor, len(straddling_items) - 1); cursor_is_broken = False
+              except openai.NotFoundError: pass
+            if cursor_is_broken:
+              print(f"  WARNING: Vector store ID={cursor} can't be used as pagination cursor. Continuing from the vector store before it.")
+              broken_cursor_ids.add(cursor); known_changed = True
+            items, has_more, error = straddling_items, straddling_has_more, straddling_error
+        if error and not items:
+          known_page = list_page_up_to_known_gap(page_cursor)
+          if known_page: items, has_more, error = known_page, True, None
+        if error and not items: items, has_more, error = bisect_page('desc', page_cursor, limit, error)
+
+      new_items = mark_seen(items)
+      for vs in new_items: yield vs
+      # Saved gaps whose broken vector store was listed in this page don't exist anymore
+      if not error and gaps:
+        page_ids = [page_cursor or ''] + [vs.id for vs in items]
+        for after_id in [id for id in page_ids[:-1] if id in gaps]:
+          if gaps[after_id].get('broken_id') in page_ids: del gaps[after_id]; known_changed = True
+      if len(items) >= 2: previous_id = items[-2].id
+      elif items: previous_id = page_cursor or ''
+      if items: cursor = items[-1].id
+      if not error:
+        if not has_more or not new_items: break
+        continue
+
+      # Unlistable vector store right after the cursor
+      error_context = f"Pagination after={cursor}"
+      print(f"  WARNING: Vector store listing returned 404 after={cursor}.")
+      broken_id = next((id for id in re.findall(r"vs_[A-Za-z0-9]+", str(error)) if id != cursor and id not in seen_ids), None)
+      if include_broken_ones: yield DummyVectorStore404(error_context, broken_id)
+      gap = {'broken_id': broken_id, 'resume_id': None, 'error_context': error_context, 'detected_at': int(time.time())}
+      gaps[cursor or ''] = gap; known_changed = True
+      if broken_id:
+        # Continue after the broken vector store as if it had been listed
+        print(f"    Skipping broken vector store ID={broken_id}.")
+        seen_ids.add(broken_id)
+        cursor = broken_id; previous_id = None
+        continue
+
+      # ID of the broken vector store unknown: list the rest from the other end
+      print(f"    Listing remaining vector stores in ascending order...")
+      asc_items, asc_error_contexts = list_from_other_end()
+      for vs in mark_seen(asc_items): yield vs
+      if asc_items: gap['resume_id'] = asc_items[-1].id
+      if include_broken_ones:
+        for asc_error_context, asc_broken_id in asc_error_contexts: yield DummyVectorStore404(asc_error_context, asc_broken_id)
+      break
+  finally:
+    stats.end_time = time.perf_counter()
+    if known_changed and known_broken_vector_stores_path:
+      known = {'broken_cursor_ids': sorted(broken_cursor_ids), 'gaps': gaps}
+      try: save_known_broken_vector_stores(known_broken_vector_stores_path, endpoint, known)
+      except Exception as e: print(f"  WARNING: Failed to save known broken vector stores to '{known_broken_vector_stores_path}' -> {e}")
+
+# Gets all vector stores with pagination handling (see iterate_all_vector_stores).
+# Adds a zero-based 'index' attribute to each vector store.
+def get_all_vector_stores(client, include_broken_ones: bool = False, known_broken_vector_stores_path=DEFAULT_KNOWN_BROKEN_VECTOR_STORES_PATH, stats=None):
+  try:
+    all_vector_stores = list(iterate_all_vector_stores(client, include_broken_ones, known_broken_vector_stores_path, stats=stats))
   except openai.InternalServerError:
     # Azure backends may return 500 when vector stores aren't supported
     return []
+  for idx, vector_store in enumerate(all_vector_stores): setattr(vector_store, 'index', idx)
+  return all_vector_stores
+
+# ----------------------------------------------------- END: Vector store enumeration -----------------------------------------
+
+# ----------------------------------------------------- START: Vector store lookup cache --------------------------------------
+
+DEFAULT_VECTOR_STORE_CACHE_TTL_SECONDS = 300
+
+# TTL-bounded cache for vector store lookups: vector store ID -> vector store object and vector store name -> ID.
+# Name -> ID entries only come from full listings and from created vector stores, so that name lookups keep returning
+# the same vector store as a full listing would (the newest one if names are not unique).
+class VectorStoreCache:
+  def __init__(self, ttl_seconds=DEFAULT_VECTOR_STORE_CACHE_TTL_SECONDS):
+    self.ttl_seconds = ttl_seconds
+    self.vector_stores_by_id = {}
+    self.vector_store_ids_by_name = {}
+    self.lock = threading.Lock()
+
+  def get_by_id(self, vector_store_id):
+    with self.lock: entry = self.vector_stores_by_id.get(vector_store_id)
+    if entry and entry[1] > time.time(): return entry[0]
+    return None
+
+  def get_id_by_name(self, vector_store_name):
+    with self.lock: entry = self.vector_store_ids_by_name.get(vector_store_name)
+    if entry and entry[1] > time.time(): return entry[0]
+    return None
+
+  # Adds or refreshes one vector store. With include_name=True, its name will resolve to this vector store.
+  def put(self, vector_store, include_name=False):
+    vector_store_id = getattr(vector_store, 'id', None)
+    if not vector_store_id or vector_store_id == "[UNKNOWN]": return
+    expires_at = time.time() + self.ttl_seconds
+    with self.lock:
+      self.vector_stores_by_id[vector_store_id] = (vector_store, expires_at)
+      if include_name and getattr(vector_store, 'name', None): self.vector_store_ids_by_name[vector_store.name] = (vector_store_id, expires_at)
+
+  # Adds all vector stores of a full listing. Names resolve to the first vector store in the list with that name.
+  def put_all(self, vector_stores):
+    expires_at = time.time() + self.ttl_seconds
+    with self.lock:
+      self.vector_store_ids_by_name = {}
+      for vector_store in vector_stores:
+        vector_store_id = getattr(vector_store, 'id', None)
+        if not vector_store_id or vector_store_id == "[UNKNOWN]": continue
+        self.vector_stores_by_id[vector_store_id] = (vector_store, expires_at)
+        vector_store_name = getattr(vector_store, 'name', None)
+        if vector_store_name and vector_store_name not in self.vector_store_ids_by_name: self.vector_store_ids_by_name[vector_store_name] = (vector_store_id, expires_at)
+
+  # Removes a vector store (by ID) and all names pointing to it. Call this after deleting a vector store.
+  def invalidate(self, vector_store_id):
+    with self.lock:
+      self.vector_stores_by_id.pop(vector_store_id, None)
+      for name in [name for name, (id, _) in self.vector_store_ids_by_name.items() if id == vector_store_id]: del self.vector_store_ids_by_name[name]
+
+  def clear(self):
+    with self.lock:
+      self.vector_stores_by_id = {}
+      self.vector_store_ids_by_name = {}
+
+# One cache per API endpoint, so OpenAI and Azure OpenAI clients in the same process don't share entries
+_vector_store_caches = {}
+_vector_store_caches_lock = threading.Lock()
+
+def get_vector_store_cache(client):
+  key = str(getattr(client, 'base_url', ''))
+  with _vector_store_caches_lock:
+    if key not in _vector_store_caches: _vector_store_caches[key] = VectorStoreCache()
+    return _vector_store_caches[key]
+
+# Removes a deleted vector store from the lookup cache
+def invalidate_vector_store_cache(client, vector_store_id):
+  get_vector_store_cache(client).invalidate(vector_store_id)
+
+# Retrieves one vector store by ID with a single request (or none, if cached). Returns None if it does not exist.
+# With use_cache=False, the vector store is always retrieved (to get current 'file_counts' and 'status').
+def get_vector_store_by_id(client, vector_store_id, use_cache=True):
+  if not vector_store_id: return None
+  cache = get_vector_store_cache(client)
+  if use_cache:
+    vector_store = cache.get_by_id(vector_store_id)
+    if vector_store: return vector_store
+  try:
+    vector_store = client.vector_stores.retrieve(vector_store_id)
+  except (openai.NotFoundError, openai.BadRequestError):
+    cache.invalidate(vector_store_id)
+    return None
+  cache.put(vector_store)
+  return vector_store
 
-def get_vector_store_by_name(client, vector_store_name):
+# Returns the first vector store with the given name (newest first, as listed by the API) or None.
+# Only lists all vector stores if the name is not cached yet or the cached vector store does not exist anymore.
+def get_vector_store_by_name(client, vector_store_name, use_cache=True):
+  cache = get_vector_store_cache(client)
+  vector_store_id = cache.get_id_by_name(vector_store_name) if use_cache else None
+  if vector_store_id:
+    vector_store = get_vector_store_by_id(client, vector_store_id)
+    if vector_store and vector_store.name == vector_store_name: return vector_store
   vector_stores = get_all_vector_stores(client)
+  cache.put_all(vector_stores)
   for vector_store in vector_stores:
     if vector_store.name == vector_store_name:
       return vector_store
   return None
 
-def get_vector_store_by_id(client, vector_store_id):
-  vector_stores = get_all_vector_stores(client)
-  for vector_store in vector_stores:
-    if vector_store.id == vector_store_id:
-      return vector_store
-  return None
+# Resolves a vector store given as object, ID or name. IDs are retrieved directly, names are resolved via get_vector_store_by_name.
+def resolve_vector_store(client, vector_store, use_cache=True):
+  if not isinstance(vector_store, str): return vector_store
+  if vector_store.startswith('vs_'):
+    resolved_vector_store = get_vector_store_by_id(client, vector_store, use_cache)
+    if resolved_vector_store: return resolved_vector_store
+  # Not an ID or not found by ID: vector store names can look like IDs
+  return get_vector_store_by_name(client, vector_store, use_cache)
+
+# ----------------------------------------------------- END: Vector store lookup cache ----------------------------------------
+
+# ----------------------------------------------------- START: File index -----------------------------------------------------
+
+DEFAULT_FILE_INDEX_PATH = "./file_index.sqlite"
+# Full listing of files and vector store files at least once a day, to drop files that were deleted outside of this toolkit
+DEFAULT_FILE_INDEX_RECONCILE_AFTER_SECONDS = 24 * 3600
+
+FILE_INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS files (id TEXT PRIMARY KEY, filename TEXT, extension TEXT, bytes INTEGER, purpose TEXT, status TEXT, created_at INTEGER);
+CREATE INDEX IF NOT EXISTS files_filename ON files (filename);
+CREATE INDEX IF NOT EXISTS files_extension ON files (extension);
+CREATE TABLE IF NOT EXISTS vector_stores (id TEXT PRIMARY KEY, name TEXT, created_at INTEGER, digest TEXT, file_count INTEGER, watermark INTEGER, reconciled_at INTEGER);
+CREATE TABLE IF NOT EXISTS vector_store_files (vector_store_id TEXT, file_id TEXT, status TEXT, created_at INTEGER, PRIMARY KEY (vector_store_id, file_id));
+CREATE INDEX IF NOT EXISTS vector_store_files_file_id ON vector_store_files (file_id);
+"""
+
+# Returns the lower-case extension including the dot ('Report.PDF' -> '.pdf', 'README' -> '')
+def get_file_extension(filename):
+  return os.path.splitext(filename or '')[1].lower()
+
+# Returns the global files with created_at >= watermark. Reads newest first and stops at the first older file.
+def get_files_created_since(client, watermark, stats=None):
+  files = []
+  for file in iterate_paginated_items(client.files.list, limit=PAGINATION_MAX_LIMIT_FILES, stats=stats, order='desc'):
+    if (getattr(file, 'created_at', None) or 0) < watermark: break
+    files.append(file)
+  return files
+
+class FileIndex:
+  """
+  Persistent local index (SQLite) of global files (file_id -> filename, bytes, purpose, status, created_at) and of
+  vector store memberships, so that lookups by filename don't list the whole tenant every time.
+
+  refresh() updates the index incrementally:
+  - Files: only files created at or after the newest known 'created_at' are listed (newest first, stops at the first older file).
+  - Vector stores: all vector stores are listed (or only the given ones retrieved). Files added since the last refresh
+    (by 'created_at') are listed for every vector store. All files are listed only if the file counts don't add up
+    (files were removed). Vector stores that don't exist anymore are dropped.
+  Files deleted outside of this toolkit are only noticed by a full listing ('reconcile'), done at least every
+  'reconcile_after_seconds'. Lookups can therefore return file IDs that don't exist anymore; deleting them returns 'not_found'.
+
+  Lookups are answered from SQLite indexes:
+    find_files(filenames=['a.pdf', 'b.md'])   exact filenames
+    find_files(prefix='report_')              filename prefix (case-sensitive)
+    find_files(glob='*_2024-??.pdf')          glob pattern (case-sensitive, SQLite GLOB)
+    find_files(extensions=['pdf', '.md'])     file extensions (case-insensitive)
+    find_files(..., vector_store_id='vs_123') only files in this vector store
+
+  An index file belongs to one API endpoint. If it is opened with a client of another endpoint, it is cleared.
+
+  Example:
+    with FileIndex.open(client) as file_index:
+      file_index.refresh(client)
+      pdf_files = file_index.find_files(extensions=['pdf'])
+      vector_stores_by_file_id = file_index.get_vector_stores_of_files([f['file_id'] for f in pdf_files])
+  """
+  def __init__(self, index_path=DEFAULT_FILE_INDEX_PATH, endpoint=''):
+    self.index_path = index_path
+    os.makedirs(os.path.dirname(os.path.abspath(index_path)), exist_ok=True)
+    self.connection = sqlite3.connect(index_path)
+    self.connection.row_factory = sqlite3.Row
+    self.connection.executescript(FILE_INDEX_SCHEMA)
+    indexed_endpoint = self.get_meta('endpoint')
+    if indexed_endpoint is not None and indexed_endpoint != endpoint:
+      print(f"  WARNING: File index '{index_path}' was built for endpoint '{indexed_endpoint}'. Clearing it.")
+      self.clear()
+    with self.connection: self.set_meta('endpoint', endpoint)
+
+  @classmethod
+  def open(cls, client, index_path=DEFAULT_FILE_INDEX_PATH):
+    return cls(index_path, str(getattr(client, 'base_url', '')))
+
+  def close(self):
+    self.connection.close()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc_value, traceback):
+    self.close()
+
+  def get_meta(self, key):
+    row = self.connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return row['value'] if row else None
+
+  def set_meta(self, key, value):
+    self.connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+  def clear(self):
+    with self.connection:
+      for table in ['meta', 'files', 'vector_stores', 'vector_store_files']: self.connection.execute(f"DELETE FROM {table}")
+
+  def upsert_files(self, files):
+    rows = [(f.id, f.filename, get_file_extension(f.filename), getattr(f, 'bytes', None), getattr(f, 'purpose', None), getattr(f, 'status', None), getattr(f, 'created_at', None)) for f in files]
+    self.connection.executemany("INSERT OR REPLACE INTO files (id, filename, extension, bytes, purpose, status, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+
+  def upsert_vector_store_files(self, vector_store_id, vector_store_files):
+    rows = [(vector_store_id, f.id, getattr(f, 'status', None), getattr(f, 'created_at', None)) for f in vector_store_files]
+    self.connection.executemany("INSERT OR REPLACE INTO vector_store_files (vector_store_id, file_id, status, created_at) VALUES (?, ?, ?, ?)", rows)
+
+  def delete_vector_stores(self, vector_store_ids):
+    self.connection.executemany("DELETE FROM vector_store_files WHERE vector_store_id = ?", [(id,) for id in vector_store_ids])
+    self.connection.executemany("DELETE FROM vector_stores WHERE id = ?", [(id,) for id in vector_store_ids])
+
+  def refresh(self, client, vector_store_ids=None, reconcile=False, reconcile_after_seconds=DEFAULT_FILE_INDEX_RECONCILE_AFTER_SECONDS, max_workers=DEFAULT_VECTOR_STORE_FAN_OUT_WORKERS):
+    """
+    Brings the index up to date (see class description).
+
+    Args:
+      vector_store_ids: Only refresh these vector stores (retrieved by ID) instead of listing all vector stores
+      reconcile: Full listing of the files and of all (given) vector stores, regardless of their age
+      reconcile_after_seconds: Full listing if the last one is older than this
+      max_workers: Number of vector stores listed in parallel
+    """
+    now = int(time.time())
+    print(f"  Refreshing file index '{self.index_path}'...")
+
+    # Global files
+    files_watermark = self.get_meta('files_watermark')
+    files_reconciled_at = int(self.get_meta('files_reconciled_at') or 0)
+    if reconcile or files_watermark is None or now - files_reconciled_at > reconcile_after_seconds:
+      files = retry_on_openai_errors(lambda: get_all_files(client), indentation=4)
+      with self.connection:
+        self.connection.execute("DELETE FROM files")
+        self.upsert_files(files)
+        self.set_meta('files_reconciled_at', now)
+        self.set_meta('files_watermark', max([0] + [f.created_at or 0 for f in files]))
+      files_mode = f"{len(files):,} files (full listing)"
+    else:
+      files = retry_on_openai_errors(lambda: get_files_created_since(client, int(files_watermark)), indentation=4)
+      # Files created in the same second as the watermark are listed again
+      known_file_count = self.connection.execute("SELECT COUNT(*) FROM files WHERE id IN (SELECT value FROM json_each(?))", (json.dumps([f.id for f in files]),)).fetchone()[0]
+      with self.connection:
+        self.upsert_files(files)
+        self.set_meta('files_watermark', max([int(files_watermark)] + [f.created_at or 0 for f in files]))
+      files_mode = f"{len(files) - known_file_count:,} new files"
+
+    # Vector stores
+    known = {row['id']: row for row in self.connection.execute("SELECT * FROM vector_stores")}
+    if vector_store_ids is None:
+      vector_stores = [vs for vs in get_all_vector_stores(client) if vs.id != "[UNKNOWN]"]
+      removed_ids = [id for id in known if id not in {vs.id for vs in vector_stores}]
+    else:
+      if isinstance(vector_store_ids, str): vector_store_ids = [vector_store_ids]
+      retrieved = [retry_on_openai_errors(lambda: get_vector_store_by_id(client, vs_id, use_cache=False), indentation=4) for vs_id in vector_store_ids]
+      vector_stores = [vs for vs in retrieved if vs]
+      removed_ids = [vs_id for vs_id, vs in zip(vector_store_ids, retrieved) if not vs and vs_id in known]
+
+    # Decide per vector store: probe (looks unchanged), delta (files were added) or full listing. Probe and delta both list
+    # the files created at or after the watermark (usually one page): the digest doesn't change if a file is removed and
+    # one of the same size is added, so a vector store is only unchanged if the probe finds no new files.
+    probe = []; delta = []; full = []
+    for vs in vector_stores:
+      row = known.get(vs.id); total = get_vector_store_total_file_count(vs)
+      if reconcile or not row or now - (row['reconciled_at'] or 0) > reconcile_after_seconds: full.append(vs)
+      elif row['digest'] == get_vector_store_content_digest(vs): probe.append(vs)
+      # Digest reset by remove_vector_store_files(): looks unchanged if the file count is as expected
+      elif row['digest'] is None and total == row['file_count']: probe.append(vs)
+      elif total is not None and row['file_count'] is not None and total > row['file_count']: delta.append(vs)
+      else: full.append(vs)
+    probe_ids = {vs.id for vs in probe}; delta = probe + delta
+
+    def list_delta(vs):
+      return retry_on_openai_errors(lambda: get_vector_store_files_created_since(client, vs.id, known[vs.id]['watermark'] or 0), indentation=4)
+    def list_full(vs):
+      return retry_on_openai_errors(lambda: get_vector_store_files(client, vs), indentation=4)
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+      delta_files = list(executor.map(list_delta, delta))
+      full_files_future = executor.map(list_full, full)
+
+      with self.connection:
+        self.delete_vector_stores(removed_ids)
+        # Delta listings that don't add up to the total file count (files were also removed) are listed completely
+        unchanged = []; delta_mismatch = []
+        for vs, new_files in zip(delta, delta_files):
+          if vs.id in probe_ids:
+            # Files created in the same second as the watermark are listed again
+            known_file_count = self.connection.execute("SELECT COUNT(*) FROM vector_store_files WHERE vector_store_id = ? AND file_id IN (SELECT value FROM json_each(?))", (vs.id, json.dumps([f.id for f in new_files]))).fetchone()[0]
+            if known_file_count == len(new_files):
+              unchanged.append(vs)
+              self.connection.execute("UPDATE vector_stores SET name = ?, digest = ? WHERE id = ?", (getattr(vs, 'name', None), get_vector_store_content_digest(vs), vs.id))
+              continue
+          self.upsert_vector_store_files(vs.id, new_files)
+          file_count = self.connection.execute("SELECT COUNT(*) FROM vector_store_files WHERE vector_store_id = ?", (vs.id,)).fetchone()[0]
+          if file_count != get_vector_store_total_file_count(vs): delta_mismatch.append(vs); continue
+          watermark = max([known[vs.id]['watermark'] or 0] + [f.created_at or 0 for f in new_files])
+          self.connection.execute("UPDATE vector_stores SET name = ?, digest = ?, file_count = ?, watermark = ? WHERE id = ?", (getattr(vs, 'name', None), get_vector_store_content_digest(vs), file_count, watermark, vs.id))
+      full_files = list(full_files_future) + list(executor.map(list_full, delta_mismatch))
+
+    with self.connection:
+      for vs, vector_store_files in zip(full + delta_mismatch, full_files):
+        self.connection.execute("DELETE FROM vector_store_files WHERE vector_store_id = ?", (vs.id,))
+        self.upsert_vector_store_files(vs.id, vector_store_files)
+        watermark = max([0] + [f.created_at or 0 for f in vector_store_files])
+        self.connection.execute("INSERT OR REPLACE INTO vector_stores (id, name, created_at, digest, file_count, watermark, reconciled_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+          (vs.id, getattr(vs, 'name', None), getattr(vs, 'created_at', None), get_vector_store_content_digest(vs), len(vector_store_files), watermark, now))
+
+    listed_count = len(full) + len(delta_mismatch); delta_count = len(delta) - len(delta_mismatch) - len(unchanged)
+    print(f"    {files_mode}, {len(vector_stores):,} vector stores ({listed_count:,} listed, {delta_count:,} new files only, {len(unchanged):,} unchanged, {len(removed_ids):,} removed).")
+
+  def find_files(self, filenames=None, prefix=None, glob=None, extensions=None, vector_store_id=None):
+    """
+    Returns the indexed global files matching all given criteria (newest first) as list of dictionaries with keys
+    'file_id', 'filename', 'bytes', 'purpose', 'status', 'created_at'.
+
+    Args:
+      filenames: Exact filename or list of filenames
+      prefix: Filename prefix (case-sensitive)
+      glob: Filename glob pattern with *, ? and [...] (case-sensitive)
+      extensions: Extension or list of extensions with or without dot (case-insensitive), e.g. ['pdf', '.md', 'tar.gz']
+      vector_store_id: Only files in this vector store
+    """
+    conditions = []; params = []
+    if filenames is not None:
+      if isinstance(filenames, str): filenames = [filenames]
+      conditions.append("f.filename IN (SELECT value FROM json_each(?))"); params.append(json.dumps(list(filenames)))
+    if prefix:
+      # Range query on the filename index instead of LIKE, which is case-insensitive and can't use the index
+      conditions.append("f.filename >= ? AND f.filename < ?"); params.extend([prefix, prefix + '\U0010ffff'])
+    if glob:
+      conditions.append("f.filename GLOB ?"); params.append(glob)
+    if extensions is not None:
+      if isinstance(extensions, str): extensions = [extensions]
+      extensions = ['.' + e.lower().lstrip('.') for e in extensions if e]
+      extension_conditions = []
+      single_extensions = [e for e in extensions if e.count('.') == 1]
+      if single_extensions:
+        extension_conditions.append("f.extension IN (SELECT value FROM json_each(?))"); params.append(json.dumps(single_extensions))
+      # Multi-part extensions like '.tar.gz' can't be looked up in the extension index
+      for e in [e for e in extensions if e.count('.') > 1]:
+        extension_conditions.append("substr(lower(f.filename), -?) = ?"); params.extend([len(e), e])
+      conditions.append(f"({' OR '.join(extension_conditions) or '0'})")
+    if vector_store_id:
+      conditions.append("f.id IN (SELECT file_id FROM vector_store_files WHERE vector_store_id = ?)"); params.append(vector_store_id)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    rows = self.connection.execute(f"SELECT f.id AS file_id, f.filename, f.bytes, f.purpose, f.status, f.created_at FROM files f {where} ORDER BY f.created_at DESC, f.id", params)
+    return [dict(row) for row in rows]
+
+  # Returns dictionary file_id -> [{'vector_store_id', 'vector_store_name'}, ...] (newest vector store first) for the given files.
+  # Failed and cancelled vector store files are skipped unless include_failed=True, like in get_all_files_used_by_vector_stores().
+  def get_vector_stores_of_files(self, file_ids, include_failed=False):
+    status_condition = "" if include_failed else "AND (vsf.status IS NULL OR vsf.status NOT IN ('failed', 'cancelled'))"
+    rows = self.connection.execute(f"""
+      SELECT vsf.file_id, vs.id AS vector_store_id, vs.name AS vector_store_name FROM vector_store_files vsf JOIN vector_stores vs ON vs.id = vsf.vector_store_id
+      WHERE vsf.file_id IN (SELECT value FROM json_each(?)) {status_condition} ORDER BY vs.created_at DESC, vs.id""", (json.dumps(list(file_ids)),))
+    vector_stores_by_file_id = {}
+    for row in rows: vector_stores_by_file_id.setdefault(row['file_id'], []).append({'vector_store_id': row['vector_store_id'], 'vector_store_name': row['vector_store_name']})
+    return vector_stores_by_file_id
+
+  # Removes deleted global files and their vector store memberships from the index
+  def remove_files(self, file_ids):
+    with self.connection:
+      self.connection.executemany("DELETE FROM files WHERE id = ?", [(id,) for id in file_ids])
+      self.connection.executemany("DELETE FROM vector_store_files WHERE file_id = ?", [(id,) for id in file_ids])
+
+  # Removes vector store files (list of (vector_store_id, file_id)) that were deleted by this toolkit from the index.
+  # The vector store's file count is reduced accordingly, so that the next refresh doesn't list the vector store again.
+  def remove_vector_store_files(self, vector_store_file_ids):
+    with self.connection:
+      for vector_store_id, file_id in vector_store_file_ids:
+        if self.connection.execute("DELETE FROM vector_store_files WHERE vector_store_id = ? AND file_id = ?", (vector_store_id, file_id)).rowcount:
+          self.connection.execute("UPDATE vector_stores SET file_count = file_count - 1, digest = NULL WHERE id = ?", (vector_store_id,))
+
+# Removes the vector store files and files that bulk_delete() deleted (or found already deleted) from the file index
+def update_file_index_after_bulk_delete(client, file_index_path, vector_store_file_result=None, file_result=None):
+  def get_removed_keys(result): return [r.key for r in result.results if r.status in ['deleted', 'not_found']] if result else []
+  with FileIndex.open(client, file_index_path) as file_index:
+    file_index.remove_vector_store_files([tuple(key.split('/', 1)) for key in get_removed_keys(vector_store_file_result)])
+    file_index.remove_files(get_removed_keys(file_result))
+
+# ----------------------------------------------------- END: File index -------------------------------------------------------
+
+# ----------------------------------------------------- START: File content hashes --------------------------------------------
+# SHA-256 of file contents, downloaded in chunks (memory use is bounded by the chunk size, not the file size).
+# The content of a file ID never changes, so hashes are cached without expiry in 'file_hash_cache_path' (one section per
+# API endpoint) and a file is downloaded at most once. Note: OpenAI doesn't allow downloading files with purpose 'assistants'.
+DEFAULT_FILE_HASH_CACHE_PATH = "./file_content_hashes.json"
+FILE_HASH_CHUNK_SIZE = 1024 * 1024
+
+# Returns the SHA-256 hex digest of the content of a file, streamed in chunks of chunk_size bytes
+def get_file_content_sha256(client, file_id, chunk_size=FILE_HASH_CHUNK_SIZE):
+  sha256 = hashlib.sha256()
+  with client.files.with_streaming_response.content(file_id) as response:
+    for chunk in response.iter_bytes(chunk_size): sha256.update(chunk)
+  return sha256.hexdigest()
+
+# Loads the cached hashes of one API endpoint. Returns a dictionary file ID -> SHA-256 hex digest.
+def load_file_hash_cache(file_hash_cache_path, endpoint):
+  if not file_hash_cache_path or not os.path.exists(file_hash_cache_path): return {}
+  try:
+    with open(file_hash_cache_path, 'r', encoding='utf-8') as f: data = json.load(f)
+    return dict(data.get(endpoint, {}))
+  except Exception as e:
+    print(f"  WARNING: Failed to read file hash cache '{file_hash_cache_path}' -> {e}")
+    return {}
+
+# Saves the cached hashes of one API endpoint (atomic: temp file + rename). Other endpoints in the file are kept.
+def save_file_hash_cache(file_hash_cache_path, endpoint, hashes):
+  data = {}
+  if os.path.exists(file_hash_cache_path):
+    try:
+      with open(file_hash_cache_path, 'r', encoding='utf-8') as f: data = json.load(f)
+    except Exception: data = {}
+  data[endpoint] = hashes
+  temp_path = file_hash_cache_path + '.tmp'
+  with open(temp_path, 'w', encoding='utf-8') as f: json.dump(data, f)
+  os.replace(temp_path, file_hash_cache_path)
+
+# Returns a dictionary file ID -> SHA-256 of the content for the given file IDs, None for files that couldn't be downloaded.
+# Files missing in the cache are downloaded in parallel (max_workers). Set file_hash_cache_path=None to disable the cache.
+def get_file_content_hashes(client, file_ids, file_hash_cache_path=DEFAULT_FILE_HASH_CACHE_PATH, max_workers=DEFAULT_VECTOR_STORE_FAN_OUT_WORKERS, retry_policy=None):
+  endpoint = str(getattr(client, 'base_url', ''))
+  cached_hashes = load_file_hash_cache(file_hash_cache_path, endpoint)
+  file_ids = list(dict.fromkeys(file_ids))
+  file_ids_to_download = [file_id for file_id in file_ids if file_id not in cached_hashes]
+  if file_ids_to_download: print(f"  Hashing content of {len(file_ids_to_download):,} files ({len(file_ids) - len(file_ids_to_download):,} cached)...")
+
+  def hash_file(file_id):
+    try: return retry_on_openai_errors(lambda: get_file_content_sha256(client, file_id), indentation=4, policy=retry_policy)
+    except Exception as e:
+      print(f"    WARNING: Failed to hash content of file ID={file_id} -> {e}")
+      return None
+  with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+    new_hashes = dict(zip(file_ids_to_download, executor.map(hash_file, file_ids_to_download)))
+
+  successful_hashes = {file_id: sha256 for file_id, sha256 in new_hashes.items() if sha256}
+  if file_hash_cache_path and successful_hashes: save_file_hash_cache(file_hash_cache_path, endpoint, {**cached_hashes, **successful_hashes})
+  return {file_id: cached_hashes.get(file_id) or new_hashes.get(file_id) for file_id in file_ids}
+
+# Returns the SHA-256 hex digest of a local file, read in chunks of chunk_size bytes
+def get_local_file_sha256(path, chunk_size=FILE_HASH_CHUNK_SIZE):
+  sha256 = hashlib.sha256()
+  with open(path, 'rb') as f:
+    for chunk in iter(lambda: f.read(chunk_size), b''): sha256.update(chunk)
+  return sha256.hexdigest()
+
+# Adds hashes (dictionary file ID -> SHA-256) to the cache and removes removed_file_ids. Used to remember uploaded files.
+def update_file_hash_cache(client, hashes, removed_file_ids=None, file_hash_cache_path=DEFAULT_FILE_HASH_CACHE_PATH):
+  if not file_hash_cache_path or (not hashes and not removed_file_ids): return
+  endpoint = str(getattr(client, 'base_url', ''))
+  cached_hashes = load_file_hash_cache(file_hash_cache_path, endpoint)
+  cached_hashes.update(hashes or {})
+  for file_id in removed_file_ids or []: cached_hashes.pop(file_id, None)
+  save_file_hash_cache(file_hash_cache_path, endpoint, cached_hashes)
+
+# Number of candidates above which uploaded files are verified with one files listing instead of one files.retrieve() each
+FILE_REUSE_VERIFY_BY_LISTING_THRESHOLD = 50
+
+def find_uploaded_files_by_content(client, file_paths, file_hash_cache_path=DEFAULT_FILE_HASH_CACHE_PATH, max_workers=DEFAULT_VECTOR_STORE_FAN_OUT_WORKERS):
+  """
+  Finds local files whose content was uploaded before (content-addressed upload dedup). Local files are hashed (SHA-256)
+  and looked up in the file hash cache (see get_file_content_hashes(); add uploaded files with update_file_hash_cache()).
+  Every match is verified: the file must still exist with purpose 'assistants', the same size and no error status.
+  Files that are gone are removed from the cache.
+
+  Returns:
+    Tuple of (dictionary path -> reusable file ID, dictionary path -> SHA-256 of all hashed files)
+
+  Example:
+    file_ids_by_path, sha256_by_path = find_uploaded_files_by_content(client, paths)
+    paths_to_upload = [path for path in paths if path not in file_ids_by_path]
+  """
+  endpoint = str(getattr(client, 'base_url', ''))
+  def hash_local_file(path):
+    try: return get_local_file_sha256(path)
+    except OSError: return None  # inaccessible files are handled (skipped) by the upload
+  with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+    sha256_by_path = {path: sha256 for path, sha256 in zip(file_paths, executor.map(hash_local_file, file_paths)) if sha256}
+
+  file_ids_by_sha256 = {}
+  for file_id, sha256 in load_file_hash_cache(file_hash_cache_path, endpoint).items(): file_ids_by_sha256.setdefault(sha256, []).append(file_id)
+  candidates = {path: file_ids_by_sha256[sha256] for path, sha256 in sha256_by_path.items() if sha256 in file_ids_by_sha256}
+  candidate_file_ids = list(dict.fromkeys(file_id for file_ids in candidates.values() for file_id in file_ids))
+  if not candidate_file_ids: return {}, sha256_by_path
+
+  # Verify that the candidates still exist
+  if len(candidate_file_ids) > FILE_REUSE_VERIFY_BY_LISTING_THRESHOLD:
+    all_files_by_id = {f.id: f for f in get_all_files(client)}
+    files_by_id = {file_id: all_files_by_id.get(file_id) for file_id in candidate_file_ids}
+  else:
+    def retrieve_file(file_id):
+      try: return retry_on_openai_errors(lambda: client.files.retrieve(file_id), indentation=4)
+      except openai.NotFoundError: return None
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+      files_by_id = dict(zip(candidate_file_ids, executor.map(retrieve_file, candidate_file_ids)))
+  update_file_hash_cache(client, None, [file_id for file_id, f in files_by_id.items() if f is None], file_hash_cache_path)
+
+  file_ids_by_path = {}
+  for path, file_ids in candidates.items():
+    local_bytes = os.path.getsize(path)
+    def is_reusable(f): return f is not None and f.purpose == 'assistants' and f.bytes == local_bytes and f.status not in ['error', 'failed', 'cancelled']
+    file_id = next((file_id for file_id in file_ids if is_reusable(files_by_id.get(file_id))), None)
+    if file_id: file_ids_by_path[path] = file_id
+  return file_ids_by_path, sha256_by_path
+
+# ----------------------------------------------------- END: File content hashes ----------------------------------------------
 
 
 # Get all files from a vector store and add attributes from from global files list
@@ -851,14 +2026,10 @@ def get_vector_store_files_with_filenames(client, vector_store):
   
   return vector_store_files
 
-def get_vector_store_files(client, vector_store):
+def get_vector_store_files(client, vector_store, stats=None):
+  # if it's a name or ID, retrieve the vector store
   if isinstance(vector_store, str):
-    # if it's a name or ID, retrieve the vector store
-    vector_stores = get_all_vector_stores(client)
-    for temp_vs in vector_stores:
-      if temp_vs.name == vector_store or temp_vs.id == vector_store:
-        vector_store = temp_vs
-        break
+    vector_store = resolve_vector_store(client, vector_store) or vector_store
 
   if not vector_store:
     raise ValueError(f"Vector store '{vector_store}' not found")
@@ -868,23 +2039,8 @@ def get_vector_store_files(client, vector_store):
   vector_store_name = getattr(vector_store, 'name', None)
   if not vector_store_id:
     return []
-  
 
-  files_page = client.vector_stores.files.list(vector_store_id=vector_store_id)
-  all_files = list(files_page.data)
-  
-  # Get additional pages if they exist
-  has_more = hasattr(files_page, 'has_more') and files_page.has_more
-  current_page = files_page
-  
-  while has_more:
-    last_id = current_page.data[-1].id if current_page.data else None
-    if not last_id: break
-    
-    next_page = client.vector_stores.files.list(vector_store_id=vector_store_id, after=last_id)
-    all_files.extend(next_page.data)
-    current_page = next_page
-    has_more = hasattr(next_page, 'has_more') and next_page.has_more
+  all_files = get_all_paginated_items(client.vector_stores.files.list, stats=stats, vector_store_id=vector_store_id)
   
   # Add index and vector store attributes to all files
   for idx, file in enumerate(all_files):
@@ -894,13 +2050,8 @@ def get_vector_store_files(client, vector_store):
   
   return all_files
 
-def get_vector_store_file_ids_with_status(client, vector_store, status):
-  if isinstance(vector_store, str):
-    vector_stores = get_all_vector_stores(client)
-    for temp_vs in vector_stores:
-      if temp_vs.name == vector_store or temp_vs.id == vector_store:
-        vector_store = temp_vs
-        break
+def get_vector_store_file_ids_with_status(client, vector_store, status, stats=None):
+  if isinstance(vector_store, str): vector_store = resolve_vector_store(client, vector_store) or vector_store
 
   if not vector_store:
     raise ValueError(f"Vector store '{vector_store}' not found")
@@ -913,19 +2064,7 @@ def get_vector_store_file_ids_with_status(client, vector_store, status):
   if status not in valid_statuses:
     raise ValueError(f"Invalid status '{status}'. Must be one of: {', '.join(valid_statuses)}")
 
-  files_page = client.vector_stores.files.list(vector_store_id=vector_store_id, filter=status)
-  all_files = list(files_page.data)
-
-  has_more = hasattr(files_page, 'has_more') and files_page.has_more
-  current_page = files_page
-
-  while has_more:
-    last_id = current_page.data[-1].id if current_page.data else None
-    if not last_id: break
-    next_page = client.vector_stores.files.list(vector_store_id=vector_store_id, filter=status, after=last_id)
-    all_files.extend(next_page.data)
-    current_page = next_page
-    has_more = hasattr(next_page, 'has_more') and next_page.has_more
+  all_files = get_all_paginated_items(client.vector_stores.files.list, stats=stats, vector_store_id=vector_store_id, filter=status)
 
   return [getattr(f, 'id', None) for f in all_files if getattr(f, 'id', None)]
 
@@ -933,12 +2072,8 @@ def get_vector_store_file_ids_with_status(client, vector_store, status):
 def get_vector_store_file_metrics(client, vector_store):
   metrics = { "total": 0, "failed": 0, "cancelled": 0, "in_progress": 0, "completed": 0 }
 
-  if isinstance(vector_store, str):
-    vector_stores = get_all_vector_stores(client)
-    for vs in vector_stores:
-      if vs.name == vector_store or vs.id == vector_store:
-        vector_store = vs
-        break
+  # Names and IDs are resolved without cache, because 'file_counts' changes while files are processed
+  if isinstance(vector_store, str): vector_store = resolve_vector_store(client, vector_store, use_cache=False) or vector_store
 
   if not vector_store:
     raise ValueError(f"Vector store '{vector_store}' not found")
@@ -1074,13 +2209,13 @@ def delete_failed_vector_store_files(client, vector_store_id, dry_run=False):
   failed_files = [f for f in files if getattr(f, 'status', None) in ['failed', 'cancelled']]
   for i, file in enumerate(failed_files):
     print(f"[ {i+1} / {len(failed_files)} ] Removing and deleting file ID={file.id} with status='{getattr(file, 'status', '')}'...")
-    if dry_run: return failed_files
-    try: client.vector_stores.files.delete(vector_store_id=vector_store_id, file_id=file.id)
-    except Exception as e: print(f"  WARNING: Failed to remove file_id='{file.id}' from vector_store_id='{vector_store_id}'. The file is probably already deleted in the global file storage.")
-    try: client.files.delete(file_id=file.id)
-    except Exception as e: print(f"  WARNING: Failed to delete file_id='{file.id}' from global file storage.")
+  if dry_run or len(failed_files) == 0: return failed_files
+  vector_store_id = getattr(files[0], 'vector_store_id', vector_store_id)
+  bulk_delete(client, 'vector_store_file', [get_vector_store_file_key(vector_store_id, f.id) for f in failed_files], indentation=0)
+  bulk_delete(client, 'file', [f.id for f in failed_files], indentation=0)
   return failed_files
 
+# Removes the files added to a vector store after 'date' from the vector store (see bulk_delete). Returns a BulkDeleteResult.
 def delete_vector_store_files_added_after_date(client, vector_store_id, date, dry_run=False):
   function_name = 'Delete vector store files added after date'
   start_time = log_function_header(function_name)
@@ -1088,20 +2223,172 @@ def delete_vector_store_files_added_after_date(client, vector_store_id, date, dr
   files = get_vector_store_files(client, vector_store_id)
   timestamp = date.timestamp()
   files_added_after_date = [f for f in files if getattr(f, 'created_at', None) > timestamp]
-  for i, file in enumerate(files_added_after_date):
-    print(f"[ {i+1} / {len(files_added_after_date)} ] Deleting file ID={file.id} added after '{date}'...")
-    if dry_run: continue
-    try: client.vector_stores.files.delete(vector_store_id=vector_store_id, file_id=file.id)
-    except Exception as e: print(f"  WARNING: Failed to delete file_id='{file.id}' from vector_store_id='{vector_store_id}'. The file is probably already deleted in the global file storage.")
+  labels = {get_vector_store_file_key(vector_store_id, f.id): f"file ID={f.id} (added after '{date}') from vector store ID={vector_store_id}" for f in files_added_after_date}
+  result = bulk_delete(client, 'vector_store_file', list(labels), labels, dry_run=dry_run, indentation=0)
+  print(f"  {result}")
   
   log_function_footer(function_name, start_time)
+  return result
+
+# Maximum number of file IDs per vector store file batch
+DEFAULT_FILE_BATCH_SIZE = 500
+
+# Adds files to a vector store with vector_stores.file_batches.create() in chunks of 'batch_size' file IDs.
+# The batches are not awaited: files are processed in the background, like after vector_stores.files.create().
+# If a batch is rejected (for example because one file ID does not exist), it is split in halves until the failing files are found.
+# With attributes_by_file_id (file ID -> attributes dictionary), every file gets its own attributes ('files' parameter).
+# Returns: Tuple of (added file IDs, list of (file_id, exception))
+def add_files_to_vector_store_in_batches(client, vector_store_id, file_ids, batch_size=DEFAULT_FILE_BATCH_SIZE, retry_policy=None, attributes_by_file_id=None):
+  added_file_ids = []; failed_file_ids = []
+  def create_batch(chunk):
+    if not attributes_by_file_id: return client.vector_stores.file_batches.create(vector_store_id=vector_store_id, file_ids=chunk)
+    files = [{'file_id': file_id, 'attributes': attributes_by_file_id[file_id]} if attributes_by_file_id.get(file_id) else {'file_id': file_id} for file_id in chunk]
+    return client.vector_stores.file_batches.create(vector_store_id=vector_store_id, files=files)
+  def add_chunk(chunk):
+    try:
+      retry_on_openai_errors(lambda: create_batch(chunk), indentation=4, policy=retry_policy)
+      added_file_ids.extend(chunk)
+    except Exception as e:
+      if len(chunk) == 1: failed_file_ids.append((chunk[0], e)); return
+      add_chunk(chunk[:len(chunk)//2]); add_chunk(chunk[len(chunk)//2:])
+  for i in range(0, len(file_ids), batch_size): add_chunk(file_ids[i:i+batch_size])
+  return added_file_ids, failed_file_ids
+
+DEFAULT_UPLOAD_MAX_CONCURRENCY = 8
+DEFAULT_UPLOAD_BATCH_SIZE = 100
+
+# Outcome of upload_files_to_vector_store(). file_ids_by_path includes files that were uploaded before (existing_file_ids_by_path).
+@dataclass
+class UploadResult:
+  file_ids_by_path: dict
+  errors_by_path: dict
+  attached_file_ids: list
+  uploaded_count: int = 0
+  uploaded_bytes: int = 0
+  elapsed_seconds: float = 0.0
+
+  def __str__(self):
+    mb_per_second = (self.uploaded_bytes / (1024 * 1024) / self.elapsed_seconds) if self.elapsed_seconds > 0 else 0.0
+    files_per_second = (self.uploaded_count / self.elapsed_seconds) if self.elapsed_seconds > 0 else 0.0
+    return f"{self.uploaded_count:,} files uploaded ({format_filesize(self.uploaded_bytes) or '0 B'}), {len(self.attached_file_ids):,} attached, {len(self.errors_by_path):,} failed in {format_milliseconds(int(self.elapsed_seconds * 1000))} ({mb_per_second:.2f} MB/s, {files_per_second:.1f} files/s)"
+
+def upload_files_to_vector_store(client, vector_store_id, file_paths, attributes_by_path=None, existing_file_ids_by_path=None, max_concurrency=DEFAULT_UPLOAD_MAX_CONCURRENCY, batch_size=DEFAULT_UPLOAD_BATCH_SIZE, retry_policy=None, indentation=4):
+  """
+  Uploads files and adds them to a vector store as a pipeline: up to max_concurrency uploads run at the same time, and
+  as soon as batch_size files are uploaded they are attached with one vector_stores.file_batches.create() call, while
+  the remaining uploads continue. Files are streamed from disk (open file handles, never read into memory as a whole).
+  The batches are not awaited (see wait_for_vector_store_ingestion()).
+
+  Args:
+    file_paths: Paths of the files to upload
+    attributes_by_path: Optional dictionary path -> attributes of the vector store file
+    existing_file_ids_by_path: Optional dictionary path -> file ID of files that are already uploaded. They are only attached.
+    max_concurrency: Maximum number of uploads in flight
+    batch_size: Number of files per file batch
+
+  Returns:
+    UploadResult. errors_by_path: path -> exception of failed uploads (OSError if the file can't be read) and attachments
+  """
+  indent = ' ' * indentation
+  attributes_by_path = attributes_by_path or {}; existing_file_ids_by_path = existing_file_ids_by_path or {}
+  result = UploadResult({}, {}, [])
+  start_time = time.perf_counter()
+
+  def attach(paths):
+    path_by_file_id = {result.file_ids_by_path[path]: path for path in paths}
+    attributes_by_file_id = {result.file_ids_by_path[path]: attributes_by_path[path] for path in paths if attributes_by_path.get(path)}
+    added_file_ids, failed_file_ids = add_files_to_vector_store_in_batches(client, vector_store_id, list(path_by_file_id), len(paths), retry_policy, attributes_by_file_id)
+    result.attached_file_ids.extend(added_file_ids)
+    for file_id, e in failed_file_ids: result.errors_by_path[path_by_file_id[file_id]] = e
+    print(f"{indent}Added batch of {len(added_file_ids):,} files to vector store ID={vector_store_id}{f', {len(failed_file_ids):,} failed' if failed_file_ids else ''}.")
+
+  def upload(path):
+    num_bytes = os.path.getsize(path)
+    def create_file():
+      with open(path, 'rb') as f: return client.files.create(file=f, purpose="assistants")
+    return retry_on_openai_errors(create_file, indentation=indentation+2, policy=retry_policy), num_bytes
+
+  pending_paths = []
+  for path in file_paths:
+    if existing_file_ids_by_path.get(path): result.file_ids_by_path[path] = existing_file_ids_by_path[path]; pending_paths.append(path)
+  paths_to_upload = [path for path in file_paths if not existing_file_ids_by_path.get(path)]
+
+  with ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as executor:
+    futures = {executor.submit(upload, path): path for path in paths_to_upload}
+    for i, future in enumerate(as_completed(futures), 1):
+      path = futures[future]
+      try:
+        file, num_bytes = future.result()
+        result.file_ids_by_path[path] = file.id
+        result.uploaded_count += 1; result.uploaded_bytes += num_bytes
+        pending_paths.append(path)
+        print(f"{indent}[ {i} / {len(paths_to_upload)} ] OK: Upload ID={file.id} '{path}'")
+      except Exception as e:
+        result.errors_by_path[path] = e
+        print(f"{indent}[ {i} / {len(paths_to_upload)} ] FAIL: Upload '{path}' - {str(e)}")
+      # Attach full batches while the other uploads continue
+      while len(pending_paths) >= batch_size:
+        attach(pending_paths[:batch_size]); pending_paths = pending_paths[batch_size:]
+  if pending_paths: attach(pending_paths)
+
+  result.elapsed_seconds = time.perf_counter() - start_time
+  return result
+
+# Adds and removes files in target vector stores. Files are added with file batches (see add_files_to_vector_store_in_batches()),
+# up to 'max_workers' target vector stores at a time. Files are removed with bulk_delete() across all target vector stores.
+#   target_vector_stores: List of target vector stores (None = not found, skipped)
+#   file_ids_to_add, file_ids_to_remove: Dictionaries target index -> list of file IDs
+#   source_vector_stores_by_file_id: File ID -> source vector store of every file to add
+# Returns: Tuple of (added_file_ids, removed_file_ids, errors) with one list per target vector store (see replicate_vector_store_content())
+def apply_vector_store_file_changes(client, target_vector_stores, file_ids_to_add, file_ids_to_remove, source_vector_stores_by_file_id, max_workers=DEFAULT_VECTOR_STORE_FAN_OUT_WORKERS, batch_size=DEFAULT_FILE_BATCH_SIZE):
+  added_file_ids = [[] for _ in target_vector_stores]; removed_file_ids = [[] for _ in target_vector_stores]; errors = [[] for _ in target_vector_stores]
+
+  # add files to targets, one worker per target vector store. Log lines of one target are printed together.
+  print_lock = threading.Lock()
+  def add_files_to_target(i):
+    target_vs = target_vector_stores[i]; target_vs_name = getattr(target_vs, 'name', target_vs.id)
+    added, failed = add_files_to_vector_store_in_batches(client, target_vs.id, file_ids_to_add[i], batch_size)
+    added_file_ids[i].extend([(file_id, source_vector_stores_by_file_id[file_id]) for file_id in added])
+    lines = [f"  [ {i+1} / {len(target_vector_stores)} ] Added {len(added)} of {len(file_ids_to_add[i])} files to '{target_vs_name}' (ID={target_vs.id})."]
+    for file_id, e in failed:
+      source_vs = source_vector_stores_by_file_id[file_id]; source_vs_name = getattr(source_vs, 'name', source_vs.id)
+      lines.append(f"    WARNING: Failed to add file ID={file_id} from '{source_vs_name}' to '{target_vs_name}'. Error: {str(e)}")
+      errors[i].append((file_id, f"FAILED: Add file ID='{file_id}' from '{source_vs_name}' to vector store '{target_vs_name}': {str(e)}"))
+    with print_lock: print("\n".join(lines))
+
+  targets_with_files_to_add = [i for i, file_ids in file_ids_to_add.items() if file_ids and target_vector_stores[i]]
+  if targets_with_files_to_add:
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor: list(executor.map(add_files_to_target, targets_with_files_to_add))
+
+  # remove files from targets
+  keys_to_remove = {}; labels = {}
+  for i, file_ids in file_ids_to_remove.items():
+    target_vs = target_vector_stores[i]
+    if not target_vs: continue
+    for file_id in file_ids:
+      key = get_vector_store_file_key(target_vs.id, file_id)
+      keys_to_remove[key] = (i, file_id)
+      labels[key] = f"file ID={file_id} from target vector store '{getattr(target_vs, 'name', target_vs.id)}'"
+  if keys_to_remove:
+    print(f"  Removing {len(keys_to_remove)} files from {len({i for i, _ in keys_to_remove.values()})} target vector stores...")
+    result = bulk_delete(client, 'vector_store_file', list(keys_to_remove), labels=labels, indentation=4)
+    for delete_result in result.results:
+      i, file_id = keys_to_remove[delete_result.key]
+      if delete_result.status in ['deleted', 'not_found']: removed_file_ids[i].append(file_id)
+      else:
+        target_vs_name = getattr(target_vector_stores[i], 'name', target_vector_stores[i].id)
+        errors[i].append((file_id, f"FAILED: Remove file ID='{file_id}' from vector store '{target_vs_name}': {delete_result.error}"))
+
+  return (added_file_ids, removed_file_ids, errors)
 
 # Replicate files from source and target vector stores by replicating missing files and optionally removing extra files
-# Returns: Tuple of (added_file_ids, removed_file_ids, errors) where:
-#   - added_file_ids: List of file IDs successfully added to target stores
+# All source and target vector stores are listed completely (up to 'max_workers' in parallel), changes are applied with apply_vector_store_file_changes().
+# For nightly runs that should only apply what changed since the last run, use sync_vector_store_content().
+# Returns: Tuple of (added_file_ids, removed_file_ids, errors) with one list per target vector store (in the order of target_vector_store_ids):
+#   - added_file_ids: List of (file_id, source_vector_store) tuples successfully added to target stores
 #   - removed_file_ids: List of file IDs removed from target stores (if remove_target_files_not_in_sources=True)
 #   - errors: List of (file_id, error_message) tuples for failed operations
-def replicate_vector_store_content(client, source_vector_store_ids, target_vector_store_ids, remove_target_files_not_in_sources=False):
+def replicate_vector_store_content(client, source_vector_store_ids, target_vector_store_ids, remove_target_files_not_in_sources=False, max_workers=DEFAULT_VECTOR_STORE_FAN_OUT_WORKERS, batch_size=DEFAULT_FILE_BATCH_SIZE):
   function_name = 'Replicate vector store content'
   start_time = log_function_header(function_name)
 
@@ -1109,65 +2396,35 @@ def replicate_vector_store_content(client, source_vector_store_ids, target_vecto
   if isinstance(source_vector_store_ids, str): source_vector_store_ids = [source_vector_store_ids]
   if isinstance(target_vector_store_ids, str): target_vector_store_ids = [target_vector_store_ids]
 
-  collected_file_ids_and_source_vector_stores = []; added_file_ids = []; removed_file_ids = []; errors = []
+  source_vector_stores = []
   for source_vs_id in source_vector_store_ids:
     source_vs = get_vector_store_by_id(client, source_vs_id)
     if not source_vs: print(f"  WARNING: Source vector store ID={source_vs_id} not found, skipping..."); continue
-    source_vs_name = getattr(source_vs, 'name', source_vs_id)
-    print(f"  Loading files from source vector store '{source_vs_name}' (ID={source_vs_id})...")
-    source_files = get_vector_store_files(client, source_vs_id)
-    collected_file_ids_and_source_vector_stores.extend([(f.id, source_vs) for f in source_files])
-
-  for i, target_vs_id in enumerate(target_vector_store_ids):
-    target_vs = get_vector_store_by_id(client, target_vs_id)
-    if not target_vs: print(f"  WARNING: Target vector store ID={target_vs_id} not found, skipping..."); continue
+    source_vector_stores.append(source_vs)
+  target_vector_stores = [get_vector_store_by_id(client, target_vs_id) for target_vs_id in target_vector_store_ids]
+  for target_vs_id, target_vs in zip(target_vector_store_ids, target_vector_stores):
+    if not target_vs: print(f"  WARNING: Target vector store ID={target_vs_id} not found, skipping...")
+
+  existing_target_vector_stores = [vs for vs in target_vector_stores if vs]
+  print(f"  Loading files from {len(source_vector_stores)} source and {len(existing_target_vector_stores)} target vector stores...")
+  files_per_vector_store = get_files_of_vector_stores(client, source_vector_stores + existing_target_vector_stores, max_workers)
+  target_files_iterator = iter(files_per_vector_store[len(source_vector_stores):])
+
+  # Keep the first source vector store in which a file was found
+  collected_source_vector_stores_by_file_id = {}
+  for source_vs, source_files in zip(source_vector_stores, files_per_vector_store[:len(source_vector_stores)]):
+    for f in source_files: collected_source_vector_stores_by_file_id.setdefault(f.id, source_vs)
+
+  file_ids_to_add = {}; file_ids_to_remove = {}
+  for i, (target_vs_id, target_vs) in enumerate(zip(target_vector_store_ids, target_vector_stores)):
+    if not target_vs: continue
     target_vs_name = getattr(target_vs, 'name', target_vs_id)
-    print(f"  [ {i+1} / {len(target_vector_store_ids)} ] Processing target vector store '{target_vs_name}' (ID={target_vs_id})...")
-            
-    target_files = get_vector_store_files(client, target_vs_id)
-    target_file_ids = [f.id for f in target_files]
+    target_file_ids = {f.id for f in next(target_files_iterator)}
+    file_ids_to_add[i] = [file_id for file_id in collected_source_vector_stores_by_file_id if file_id not in target_file_ids]
+    file_ids_to_remove[i] = [file_id for file_id in target_file_ids if file_id not in collected_source_vector_stores_by_file_id] if remove_target_files_not_in_sources else []
+    print(f"  [ {i+1} / {len(target_vector_store_ids)} ] Target vector store '{target_vs_name}' (ID={target_vs_id}): {len(file_ids_to_add[i])} files to add, {len(file_ids_to_remove[i])} to remove.")
 
-    # find out which files are not in target
-    file_ids_missing_in_target_vs = [(file_id, source_vs) for (file_id, source_vs) in collected_file_ids_and_source_vector_stores if file_id not in target_file_ids]
-    file_ids_in_target_but_not_in_collected_files = [file_id for file_id in target_file_ids if file_id not in [f[0] for f in collected_file_ids_and_source_vector_stores]]
-    
-    # Build status message
-    if len(file_ids_missing_in_target_vs) > 0:
-      message = f"Adding {len(file_ids_missing_in_target_vs)} files to '{target_vs_name}' (ID={target_vs_id})"
-    else:      
-      message = f"Nothing to add"
-    if remove_target_files_not_in_sources and len(file_ids_in_target_but_not_in_collected_files) > 0:
-      message += f", removing {len(file_ids_in_target_but_not_in_collected_files)} files"
-    print(f"    {message}...")
-
-    added_target_file_ids = []; removed_target_file_ids = []; target_errors = []
-    # add files to target
-    for j, (file_id, source_vs) in enumerate(file_ids_missing_in_target_vs):
-      source_vs_name = getattr(source_vs, 'name', source_vs.id)
-      print(f"    [ {j+1} / {len(file_ids_missing_in_target_vs)} ] Adding file ID={file_id} from '{source_vs_name}' (ID={source_vs_id}) to '{target_vs_name}' (ID={target_vs_id})...")
-      try:
-        client.vector_stores.files.create(vector_store_id=target_vs_id, file_id=file_id)
-        added_target_file_ids.append((file_id, source_vs))
-      except Exception as e:
-        print(f"      WARNING: Failed to add file ID={file_id} from '{source_vs_name}'. Error: {str(e)}")
-        target_errors.append((file_id, f"FAILED: Add file ID='{file_id}' from '{source_vs_name}' to vector store '{target_vs_name}': {str(e)}"))
-
-    # remove files not in source
-    if remove_target_files_not_in_sources and len(file_ids_in_target_but_not_in_collected_files) > 0:
-      print(f"   Removing {len(file_ids_in_target_but_not_in_collected_files)} files from target '{target_vs_name}'...")
-      for j, file_id in enumerate(file_ids_in_target_but_not_in_collected_files):
-        print(f"    [ {j+1} / {len(file_ids_in_target_but_not_in_collected_files)} ] Removing file ID={file_id} from target vector store '{target_vs_name}'...")
-        try:
-          client.vector_stores.files.delete(vector_store_id=target_vs_id, file_id=file_id)
-          removed_target_file_ids.append(file_id)
-        except Exception as e:
-          print(f"      WARNING: Failed to remove file ID={file_id} from '{target_vs_name}'. Error: {str(e)}")
-          target_errors.append((file_id, f"FAILED: Remove file ID='{file_id}' from vector store '{target_vs_name}': {str(e)}"))
-    
-    # add to return values
-    added_file_ids.append(added_target_file_ids)
-    removed_file_ids.append(removed_target_file_ids)
-    errors.append(target_errors)
+  added_file_ids, removed_file_ids, errors = apply_vector_store_file_changes(client, target_vector_stores, file_ids_to_add, file_ids_to_remove, collected_source_vector_stores_by_file_id, max_workers, batch_size)
 
   log_function_footer(function_name, start_time)
   return (added_file_ids, removed_file_ids, errors)
@@ -1181,6 +2438,186 @@ def print_vector_store_replication_summary(target_vector_store_ids, added_file_i
         print(f"      [{j+1}] {error_msg}")
 
 
+DEFAULT_REPLICATION_STATE_FOLDER = "./replication_state"
+# Full listing of source and target vector stores at least once a week, even if nothing seems to have changed
+DEFAULT_REPLICATION_RECONCILE_AFTER_SECONDS = 7 * 24 * 3600
+
+# State file of one source -> target vector store pair, written by sync_vector_store_content()
+def get_replication_state_path(state_folder, source_vector_store_id, target_vector_store_id):
+  return os.path.join(state_folder, f"{source_vector_store_id}__{target_vector_store_id}.json")
+
+# Returns the sync state of a source -> target pair, or None if there is no (readable) state file
+def load_replication_state(state_folder, source_vector_store_id, target_vector_store_id):
+  state_path = get_replication_state_path(state_folder, source_vector_store_id, target_vector_store_id)
+  if not os.path.exists(state_path): return None
+  try:
+    with open(state_path, 'r', encoding='utf-8') as f: return json.load(f)
+  except Exception as e:
+    print(f"  WARNING: Failed to read replication state '{state_path}' -> {e}")
+    return None
+
+def save_replication_state(state_folder, state):
+  os.makedirs(state_folder, exist_ok=True)
+  state_path = get_replication_state_path(state_folder, state['source_vector_store_id'], state['target_vector_store_id'])
+  temp_path = state_path + '.tmp'
+  with open(temp_path, 'w', encoding='utf-8') as f: json.dump(state, f, indent=2)
+  os.replace(temp_path, state_path)
+
+# ETag-like digest of a vector store's content: changes when files are added, removed or change status
+def get_vector_store_content_digest(vector_store):
+  file_counts = getattr(vector_store, 'file_counts', None)
+  if hasattr(file_counts, 'model_dump'): file_counts = file_counts.model_dump()
+  elif file_counts is not None and not isinstance(file_counts, dict): file_counts = vars(file_counts)
+  return json.dumps({'file_counts': file_counts, 'usage_bytes': getattr(vector_store, 'usage_bytes', None)}, sort_keys=True)
+
+def get_vector_store_total_file_count(vector_store):
+  file_counts = getattr(vector_store, 'file_counts', None)
+  return file_counts.get('total') if isinstance(file_counts, dict) else getattr(file_counts, 'total', None)
+
+# Returns the files of a vector store with created_at >= watermark. Reads newest first and stops at the first older file.
+def get_vector_store_files_created_since(client, vector_store_id, watermark, stats=None):
+  files = []
+  for file in iterate_paginated_items(client.vector_stores.files.list, stats=stats, vector_store_id=vector_store_id, order='desc'):
+    if (getattr(file, 'created_at', None) or 0) < watermark: break
+    files.append(file)
+  return files
+
+def sync_vector_store_content(client, source_vector_store_ids, target_vector_store_ids, remove_target_files_not_in_sources=False, state_folder=DEFAULT_REPLICATION_STATE_FOLDER, reconcile=False, reconcile_after_seconds=DEFAULT_REPLICATION_RECONCILE_AFTER_SECONDS, max_workers=DEFAULT_VECTOR_STORE_FAN_OUT_WORKERS, batch_size=DEFAULT_FILE_BATCH_SIZE):
+  """
+  Incremental version of replicate_vector_store_content(). Keeps one state file per source -> target pair in 'state_folder'
+  with the source file IDs seen in the last run, the 'created_at' watermark of the newest source file, a digest of the
+  source file counts and the expected number of files in the target.
+
+  Each run retrieves all source and target vector stores once (file counts). Then for each source vector store:
+  - Only files created at or after the watermark are listed (newest first, usually one page).
+  - Digest unchanged and no new files: the file IDs of the last run are used. The digest alone is not enough, removing
+    a file and adding one of the same size doesn't change it.
+  - Otherwise: the new files are added to the known ones. If the total file count does not match the known + new files
+    (files were removed), the source is listed completely.
+  Each target vector store gets the files that are new in its sources (plus files that failed to add in the last run).
+  With remove_target_files_not_in_sources=True, files that disappeared from the sources are removed.
+
+  A target vector store is reconciled (listed completely and compared with all source files, like replicate_vector_store_content())
+  if 'reconcile' is True, if there is no state yet, if its last reconcile is older than 'reconcile_after_seconds'
+  or if its file count differs from the count expected after the last run (changed by someone else).
+
+  Returns:
+    Tuple of (added_file_ids, removed_file_ids, errors) with one list per target vector store (see replicate_vector_store_content())
+
+  Example:
+    added_files, removed_files, errors = sync_vector_store_content(client, [source_id], regional_target_ids, remove_target_files_not_in_sources=True)
+    print_vector_store_replication_summary(regional_target_ids, added_files, removed_files, errors)
+  """
+  function_name = 'Sync vector store content'
+  start_time = log_function_header(function_name)
+
+  if isinstance(source_vector_store_ids, str): source_vector_store_ids = [source_vector_store_ids]
+  if isinstance(target_vector_store_ids, str): target_vector_store_ids = [target_vector_store_ids]
+  now = int(time.time())
+
+  # Retrieve all vector stores (not from cache, file counts must be current)
+  all_vector_store_ids = list(dict.fromkeys(list(source_vector_store_ids) + list(target_vector_store_ids)))
+  with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+    retrieved = list(executor.map(lambda vs_id: retry_on_openai_errors(lambda: get_vector_store_by_id(client, vs_id, use_cache=False), indentation=2), all_vector_store_ids))
+  vector_stores_by_id = dict(zip(all_vector_store_ids, retrieved))
+
+  source_vector_stores = []
+  for source_vs_id in source_vector_store_ids:
+    if not vector_stores_by_id.get(source_vs_id): print(f"  WARNING: Source vector store ID={source_vs_id} not found, skipping..."); continue
+    source_vector_stores.append(vector_stores_by_id[source_vs_id])
+  target_vector_stores = [vector_stores_by_id.get(target_vs_id) for target_vs_id in target_vector_store_ids]
+  for target_vs_id, target_vs in zip(target_vector_store_ids, target_vector_stores):
+    if not target_vs: print(f"  WARNING: Target vector store ID={target_vs_id} not found, skipping...")
+  if remove_target_files_not_in_sources and len(source_vector_stores) < len(source_vector_store_ids):
+    print(f"  WARNING: Not removing any files because not all source vector stores were found.")
+    remove_target_files_not_in_sources = False
+
+  existing_target_vector_store_ids = [vs.id for vs in target_vector_stores if vs]
+  states = {(s.id, t_id): load_replication_state(state_folder, s.id, t_id) for s in source_vector_stores for t_id in existing_target_vector_store_ids}
+
+  # Step 1: Current file IDs of each source vector store
+  def get_current_source_file_ids(source_vs):
+    digest = get_vector_store_content_digest(source_vs)
+    pair_states = [states[(source_vs.id, t_id)] for t_id in existing_target_vector_store_ids]
+    previous_state = pair_states[0] if pair_states else None
+    # All pairs of this source must have been synced in the same run to use the known file IDs
+    if not reconcile and previous_state and all(st and st['source_digest'] == previous_state['source_digest'] and st['watermark'] == previous_state['watermark'] for st in pair_states):
+      known_file_ids = set(previous_state['source_file_ids'])
+      new_files = retry_on_openai_errors(lambda: get_vector_store_files_created_since(client, source_vs.id, previous_state['watermark']), indentation=2)
+      # The digest stays the same if a file is removed and one of the same size is added, so also check for new files
+      if previous_state['source_digest'] == digest and all(f.id in known_file_ids for f in new_files): return known_file_ids, previous_state['watermark'], "unchanged"
+      file_ids = known_file_ids | {f.id for f in new_files}
+      if get_vector_store_total_file_count(source_vs) == len(file_ids):
+        return file_ids, max([previous_state['watermark']] + [f.created_at for f in new_files]), f"{len(file_ids) - len(known_file_ids)} new files"
+    files = retry_on_openai_errors(lambda: get_vector_store_files(client, source_vs), indentation=2)
+    return {f.id for f in files}, max([0] + [f.created_at or 0 for f in files]), "full listing"
+
+  with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor: source_results = list(executor.map(get_current_source_file_ids, source_vector_stores))
+  source_file_ids = {}; source_watermarks = {}; source_vector_stores_by_file_id = {}
+  for source_vs, (file_ids, watermark, mode) in zip(source_vector_stores, source_results):
+    source_file_ids[source_vs.id] = file_ids; source_watermarks[source_vs.id] = watermark
+    for file_id in file_ids: source_vector_stores_by_file_id.setdefault(file_id, source_vs)
+    print(f"  Source vector store '{getattr(source_vs, 'name', source_vs.id)}' (ID={source_vs.id}): {len(file_ids)} files ({mode}).")
+
+  # Step 2: Decide per target vector store between delta and full reconcile
+  target_modes = {}
+  for i, target_vs in enumerate(target_vector_stores):
+    if not target_vs: continue
+    pair_states = [states[(s.id, target_vs.id)] for s in source_vector_stores]
+    if reconcile: target_modes[i] = "reconcile (requested)"
+    elif any(st is None for st in pair_states): target_modes[i] = "reconcile (no state)"
+    elif any(now - st.get('last_reconciled_at', 0) > reconcile_after_seconds for st in pair_states): target_modes[i] = "reconcile (scheduled)"
+    elif any(st.get('target_file_count') != get_vector_store_total_file_count(target_vs) for st in pair_states): target_modes[i] = "reconcile (target changed)"
+    else: target_modes[i] = "delta"
+  targets_to_reconcile = [i for i, mode in target_modes.items() if mode != "delta"]
+  reconciled_files = get_files_of_vector_stores(client, [target_vector_stores[i] for i in targets_to_reconcile], max_workers)
+  target_file_ids_by_index = {i: {f.id for f in files} for i, files in zip(targets_to_reconcile, reconciled_files)}
+
+  desired_file_ids = set().union(*source_file_ids.values()) if source_file_ids else set()
+  file_ids_to_add = {}; file_ids_to_remove = {}
+  for i, mode in target_modes.items():
+    target_vs = target_vector_stores[i]
+    if mode == "delta":
+      pair_states = [states[(s.id, target_vs.id)] for s in source_vector_stores]
+      previous_file_ids = set().union(*[st['source_file_ids'] for st in pair_states]) if pair_states else set()
+      failed_file_ids = set().union(*[st.get('failed_file_ids', []) for st in pair_states]) if pair_states else set()
+      file_ids_to_add[i] = sorted((desired_file_ids - previous_file_ids) | (failed_file_ids & desired_file_ids))
+      file_ids_to_remove[i] = sorted(previous_file_ids - desired_file_ids) if remove_target_files_not_in_sources else []
+    else:
+      target_file_ids = target_file_ids_by_index[i]
+      file_ids_to_add[i] = sorted(desired_file_ids - target_file_ids)
+      file_ids_to_remove[i] = sorted(target_file_ids - desired_file_ids) if remove_target_files_not_in_sources else []
+    print(f"  [ {i+1} / {len(target_vector_stores)} ] Target vector store '{getattr(target_vs, 'name', target_vs.id)}' (ID={target_vs.id}): {target_modes[i]}, {len(file_ids_to_add[i])} files to add, {len(file_ids_to_remove[i])} to remove.")
+
+  # Step 3: Apply changes
+  added_file_ids, removed_file_ids, errors = apply_vector_store_file_changes(client, target_vector_stores, file_ids_to_add, file_ids_to_remove, source_vector_stores_by_file_id, max_workers, batch_size)
+
+  # Step 4: Save state per pair
+  for i, mode in target_modes.items():
+    target_vs = target_vector_stores[i]
+    added = {file_id for file_id, _ in added_file_ids[i]}
+    failed_to_add = set(file_ids_to_add[i]) - added
+    if mode == "delta": target_file_count = get_vector_store_total_file_count(target_vs)
+    else: target_file_count = len(target_file_ids_by_index[i])
+    target_file_count = (target_file_count or 0) + len(added) - len(removed_file_ids[i])
+    for source_vs in source_vector_stores:
+      previous_state = states[(source_vs.id, target_vs.id)]
+      save_replication_state(state_folder, {
+        'source_vector_store_id': source_vs.id,
+        'target_vector_store_id': target_vs.id,
+        'source_file_ids': sorted(source_file_ids[source_vs.id]),
+        'watermark': source_watermarks[source_vs.id],
+        'source_digest': get_vector_store_content_digest(source_vs),
+        'target_file_count': target_file_count,
+        'failed_file_ids': sorted(failed_to_add & source_file_ids[source_vs.id]),
+        'last_synced_at': now,
+        'last_reconciled_at': now if mode != "delta" else previous_state.get('last_reconciled_at', now)
+      })
+
+  log_function_footer(function_name, start_time)
+  return (added_file_ids, removed_file_ids, errors)
+
+
 # Returns a dictionary with filename as key and list of results as items
 # Key : <filename>
 # Value : [
@@ -1189,13 +2626,27 @@ def print_vector_store_replication_summary(target_vector_store_ids, added_file_i
 #       {vector_store_id : <vector_store_id>; vector_store_name : <vector_store_name>}
 #     ]
 #   }
-def find_files_in_all_vector_stores_by_filename(client, filenames, log_headers=True) -> dict:
+def find_files_in_all_vector_stores_by_filename(client, filenames, log_headers=True, file_index_path=None) -> dict:
   function_name = 'Find files in all vector stores by filename'
   start_time = log_function_header(function_name) if log_headers else datetime.datetime.now()
 
+  if isinstance(filenames, str): filenames = [filenames]
   # Create filename dict with filename as key and empty list as value. Eliminates duplicate filenames, empty strings.
   search_results = {filename: [] for filename in filenames if filename}
 
+  # With file_index_path (e.g. DEFAULT_FILE_INDEX_PATH), answer from the local file index (see FileIndex), refreshed incrementally.
+  # Otherwise all files and vector stores are listed.
+  if file_index_path:
+    with FileIndex.open(client, file_index_path) as file_index:
+      file_index.refresh(client)
+      found_files = file_index.find_files(filenames=list(search_results))
+      vector_stores_by_file_id = file_index.get_vector_stores_of_files([f['file_id'] for f in found_files])
+    for found_file in found_files:
+      found_vector_stores = vector_stores_by_file_id.get(found_file['file_id'])
+      if found_vector_stores: search_results[found_file['filename']].append({ 'file_id' : found_file['file_id'], 'vector_stores' : found_vector_stores })
+    if log_headers: log_function_footer(function_name, start_time)
+    return search_results
+
   print(f"  Loading all files...")
   all_files = get_all_files(client)
   # Build dictionaries for fast lookup:
@@ -1215,12 +2666,10 @@ def find_files_in_all_vector_stores_by_filename(client, filenames, log_headers=T
     if vector_store_file.id not in found_file_ids: continue
     global_file = all_files_by_id[vector_store_file.id]
     filename = global_file.filename
-    # get comma-separated vector store ids and names from vector store file attributes (added by get_all_files_used_by_vector_stores function) and convert them into arrays
-    found_vector_store_ids = [x for x in getattr(vector_store_file, 'vector_store_id', '').split(', ') if x]
-    found_vector_store_names = [x for x in getattr(vector_store_file, 'vector_store_name', '').split(', ') if x]
+    # get vector store ids and names from vector store file attributes (added by get_all_files_used_by_vector_stores function)
     found_vector_stores = []
-    for j, vector_store_id in enumerate(found_vector_store_ids):
-      found_vector_stores.append({ 'vector_store_id' : vector_store_id, 'vector_store_name' : found_vector_store_names[j] })
+    for vector_store_id, vector_store_name in zip(vector_store_file.vector_store_ids, vector_store_file.vector_store_names):
+      found_vector_stores.append({ 'vector_store_id' : vector_store_id, 'vector_store_name' : vector_store_name })
 
     search_result = { 'file_id' : global_file.id, 'vector_stores' : found_vector_stores }
     search_results[filename].append(search_result)
@@ -1228,10 +2677,10 @@ def find_files_in_all_vector_stores_by_filename(client, filenames, log_headers=T
   if log_headers: log_function_footer(function_name, start_time)
   return search_results
 
-def delete_files_in_all_vector_stores_by_filename(client, filenames, dry_run=False, delete_files_in_global_storage=False):
+def delete_files_in_all_vector_stores_by_filename(client, filenames, dry_run=False, delete_files_in_global_storage=False, file_index_path=None):
   function_name = 'Delete files in all vector stores by filename'
   start_time = log_function_header(function_name)
-  found_files = find_files_in_all_vector_stores_by_filename(client, filenames, log_headers=False)
+  found_files = find_files_in_all_vector_stores_by_filename(client, filenames, log_headers=False, file_index_path=file_index_path)
 
   # if filenames is string, make list with single item
   if isinstance(filenames,str): filenames = [filenames]
@@ -1242,144 +2691,115 @@ def delete_files_in_all_vector_stores_by_filename(client, filenames, dry_run=Fal
 
   if found_files_count == 0: log_function_footer(function_name, start_time); return found_files
 
-  print(f"  Deleting files from vector stores...")
-  for i, (filename, files) in enumerate(found_files.items()):
-    print(f"    [ {i+1} / {len(found_files)} ] Removing file '{filename}'...")
+  vector_store_file_labels = {}; file_labels = {}
+  for filename, files in found_files.items():
     for file in files:
       file_id = file['file_id']
-      vector_stores = file['vector_stores']
-      for vector_store in vector_stores:
-        vector_store_id = vector_store['vector_store_id']
-        vector_store_name = vector_store['vector_store_name']
-        try:
-          print(f"      Deleting file '{filename}' (ID={file_id}) from vector store '{vector_store_name}' (ID={vector_store_id})")
-          if dry_run: continue
-          client.vector_stores.files.delete(vector_store_id=vector_store_id, file_id=file_id)
-          print(f"        OK.")
-        except Exception as e:
-          print(f"      WARNING: Failed to delete file ID={file_id} from vector store ID={vector_store_id}: {str(e)}")
+      file_labels[file_id] = f"file '{filename}' (ID={file_id}) from global storage"
+      for vector_store in file['vector_stores']:
+        key = get_vector_store_file_key(vector_store['vector_store_id'], file_id)
+        vector_store_file_labels[key] = f"file '{filename}' (ID={file_id}) from vector store '{vector_store['vector_store_name']}' (ID={vector_store['vector_store_id']})"
 
+  print(f"  Deleting files from vector stores...")
+  vector_store_file_result = bulk_delete(client, 'vector_store_file', list(vector_store_file_labels), vector_store_file_labels, dry_run=dry_run, indentation=4)
+  print(f"    {vector_store_file_result}")
+
+  file_result = None
   if delete_files_in_global_storage:
     print(f"  Deleting files from global storage...")
-    for i, (filename, files) in enumerate(found_files.items()):
-      print(f"    [ {i+1} / {len(found_files)} ] Deleting file '{filename}' (ID={file_id}) from global storage...")
-      for file in files:
-        file_id = file['file_id']
-        try:
-          if dry_run: continue
-          client.files.delete(file_id=file_id)
-          print(f"      OK.")
-        except Exception as e:
-          print(f"      WARNING: Failed to delete file ID={file_id} from global storage: {str(e)}")
+    file_result = bulk_delete(client, 'file', list(file_labels), file_labels, dry_run=dry_run, indentation=4)
+    print(f"    {file_result}")
+
+  if file_index_path and not dry_run: update_file_index_after_bulk_delete(client, file_index_path, vector_store_file_result, file_result)
 
   log_function_footer(function_name, start_time)
   return found_files
 
-def delete_files_in_vector_store_by_file_type(client, vector_store_id, file_types, dry_run=False, delete_files_in_global_storage=False):
+def delete_files_in_vector_store_by_file_type(client, vector_store_id, file_types, dry_run=False, delete_files_in_global_storage=False, file_index_path=None):
   function_name = 'Delete files in vector stores by file type'
   start_time = log_function_header(function_name)
 
   vector_store = get_vector_store_by_id(client,vector_store_id)
+  found_files = []
   if not vector_store: print(f" Vector store id '{vector_store_id}' not found.")    
   else:
     vector_store_name = vector_store.name
-    print(f"  Loading files of vector store '{vector_store_name}' (ID={vector_store_id})...")
-    vector_store_files = get_vector_store_files(client, vector_store_id)
-    print("  Loading global files...")
-    all_files = get_all_files(client)
-    all_files_dict = {file.id: file for file in all_files}
-
-    found_files = []
-    # run over all files in vector store, get filename and add to found_files if file type matches one of file_types
-    for file in vector_store_files:
-      # Get the filename from all_files_dict, since this is not stored in vector stores
-      if file.id not in all_files_dict: continue
-      global_file = all_files_dict[file.id]
-      # Check if file matches any of the file types
-      if any(global_file.filename.lower().endswith(ft.lower()) for ft in file_types):
-        # Add file info to the list
-        found_files.append({ 'file_id': file.id, 'filename': global_file.filename, 'created_at': global_file.created_at })
+    if file_index_path:
+      # Answer from the local file index (see FileIndex), refreshing only this vector store
+      with FileIndex.open(client, file_index_path) as file_index:
+        file_index.refresh(client, vector_store_ids=[vector_store_id])
+        for file in file_index.find_files(extensions=file_types, vector_store_id=vector_store_id):
+          found_files.append({ 'file_id': file['file_id'], 'filename': file['filename'], 'created_at': file['created_at'] })
+    else:
+      print(f"  Loading files of vector store '{vector_store_name}' (ID={vector_store_id})...")
+      vector_store_files = get_vector_store_files(client, vector_store_id)
+      print("  Loading global files...")
+      all_files = get_all_files(client)
+      all_files_dict = {file.id: file for file in all_files}
+
+      # run over all files in vector store, get filename and add to found_files if file type matches one of file_types
+      for file in vector_store_files:
+        # Get the filename from all_files_dict, since this is not stored in vector stores
+        if file.id not in all_files_dict: continue
+        global_file = all_files_dict[file.id]
+        # Check if file matches any of the file types
+        if any(global_file.filename.lower().endswith(ft.lower()) for ft in file_types):
+          # Add file info to the list
+          found_files.append({ 'file_id': file.id, 'filename': global_file.filename, 'created_at': global_file.created_at })
 
     if len(found_files) == 0: print(f"  No files found. Nothing to delete.")
     else:
       print(f"  Deleting {len(found_files)} files from vector store...")
-      for i, item in enumerate(found_files):
-        file_id = item['file_id']; filename = item['filename']; created_at = item['created_at']
-        print(f"    [ {i+1} / {len(found_files)} ] File '{filename}'...")
-        try:
-          print(f"      Removing file '{filename}' (ID={file_id}) from vector store '{vector_store_name}' (ID={vector_store_id})...")
-          if not dry_run:
-            client.vector_stores.files.delete(vector_store_id=vector_store_id, file_id=file_id)
-            print(f"        OK.")
-        except Exception as e:
-          print(f"      WARNING: Failed to delete file ID={file_id} from vector store ID={vector_store_id}: {str(e)}")
-        if delete_files_in_global_storage:          
-          try:
-            print(f"      Deleting file '{filename}' (ID={file_id}) from global files...")
-            if not dry_run:
-              client.files.delete(file_id=file.id)
-              print(f"        OK.")
-          except Exception as e:
-            print(f"      WARNING: Failed to delete file '{filename}' (ID={file_id}, {format_timestamp(created_at)}). The file is probably already deleted in the global file storage.")
+      labels = {get_vector_store_file_key(vector_store_id, item['file_id']): f"file '{item['filename']}' (ID={item['file_id']}) from vector store '{vector_store_name}' (ID={vector_store_id})" for item in found_files}
+      vector_store_file_result = bulk_delete(client, 'vector_store_file', list(labels), labels, dry_run=dry_run, indentation=4)
+      print(f"    {vector_store_file_result}")
+      file_result = None
+      if delete_files_in_global_storage:
+        print(f"  Deleting {len(found_files)} files from global files...")
+        labels = {item['file_id']: f"file '{item['filename']}' (ID={item['file_id']}, {format_timestamp(item['created_at'])}) from global files" for item in found_files}
+        file_result = bulk_delete(client, 'file', list(labels), labels, dry_run=dry_run, indentation=4)
+        print(f"    {file_result}")
+      if file_index_path and not dry_run: update_file_index_after_bulk_delete(client, file_index_path, vector_store_file_result, file_result)
 
   log_function_footer(function_name, start_time)
   return found_files
 
 
+# Deletes a vector store. With delete_files=True, its files are deleted from global storage first (see bulk_delete).
+# Returns the BulkDeleteResult of the file deletion, None if delete_files=False.
+def delete_vector_store_and_files(client, vs, delete_files=False):
+  print(f"  Deleting vector store '{vs.name}' (ID={vs.id} , {format_timestamp(vs.created_at)})...")
+  file_result = None
+  if delete_files:
+    files = get_vector_store_files(client, vs)
+    labels = {f.id: f"file ID={f.id} ({format_timestamp(f.created_at)})" for f in files}
+    file_result = bulk_delete(client, 'file', list(labels), labels, indentation=4)
+    print(f"    {file_result}")
+  client.vector_stores.delete(vs.id)
+  invalidate_vector_store_cache(client, vs.id)
+  return file_result
+
 def delete_vector_store_by_id(client, vector_store_id, delete_files=False):
   vs = None
   try:
-    vector_stores = get_all_vector_stores(client)
-    vs = [vs for vs in vector_stores if vs.id == vector_store_id]
-    if vs:
-      vs = vs[0]
+    vs = get_vector_store_by_id(client, vector_store_id)
   except Exception as e:
-    print(f"  WARNING: Failed to get all vector stores: {str(e)}")
-    print(f"  Attempting to retrieve vector store directly...")
-    try:
-      vs = client.vector_stores.retrieve(vector_store_id)
-    except Exception as e2:
-      print(f"  ERROR: Failed to retrieve vector store: {str(e2)}")
-      vs = None
-  
-  if vs:
-    print(f"  Deleting vector store '{vs.name}' (ID={vs.id} , {format_timestamp(vs.created_at)})...")
-    if delete_files:
-      files = get_vector_store_files(client, vs)
-      for i, file in enumerate(files):
-        print(f"    [ {i+1} / {len(files)} ] Deleting file ID={file.id} ({format_timestamp(file.created_at)})...")
-        try: client.files.delete(file_id=file.id)
-        except Exception as e:
-          print(f"      WARNING: Failed to delete file ID={file.id} ({format_timestamp(file.created_at)}). The file is probably already deleted in the global file storage.")
-    client.vector_stores.delete(vs.id)
-  else:
-    print(f"  Vector store id='{vector_store_id}' not found.")
+    print(f"  ERROR: Failed to retrieve vector store: {str(e)}")
+    vs = None
+  
+  if vs: return delete_vector_store_and_files(client, vs, delete_files)
+  else: print(f"  Vector store id='{vector_store_id}' not found.")
 
 def delete_vector_store_by_name(client, name, delete_files=False):
-  vector_stores = get_all_vector_stores(client)
-  vs = [vs for vs in vector_stores if vs.name == name]
-  if vs:
-    vs = vs[0]
-    print(f"  Deleting vector store '{vs.name}' (ID={vs.id} , {format_timestamp(vs.created_at)})...")
-    if delete_files:
-      files = get_vector_store_files(client, vs)
-      for i, file in enumerate(files):
-        print(f"    [ {i+1} / {len(files)} ] Deleting file ID={file.id} ({format_timestamp(file.created_at)})...")
-        try: client.files.delete(file_id=file.id)
-        except Exception as e:
-          print(f"      WARNING: Failed to delete file ID={file.id} ({format_timestamp(file.created_at)}). The file is probably already deleted in the global file storage.")
-    client.vector_stores.delete(vs.id)
-  else:
-    print(f"  Vector store '{name}' not found.")
+  vs = get_vector_store_by_name(client, name)
+  if vs: return delete_vector_store_and_files(client, vs, delete_files)
+  else: print(f"  Vector store '{name}' not found.")
 
 def delete_empty_vector_stores(client, dry_run=False):
   vector_stores = get_all_vector_stores(client)
-  for vs in vector_stores:
-    if vs.usage_bytes == 0:
-      print(f"  Deleting empty vector store '{vs.name}' (ID={vs.id} , {format_timestamp(vs.created_at)})...")
-      if not dry_run:
-        try: client.vector_stores.delete(vs.id)
-        except Exception as e: print(f"      WARNING: Failed to delete empty vector store ID={vs.id} ({format_timestamp(vs.created_at)}). The vector store is probably already deleted.")
+  empty_vector_stores = [vs for vs in vector_stores if vs.usage_bytes == 0]
+  labels = {vs.id: f"empty vector store '{vs.name}' (ID={vs.id} , {format_timestamp(vs.created_at)})" for vs in empty_vector_stores}
+  return bulk_delete(client, 'vector_store', [vs.id for vs in empty_vector_stores], labels, dry_run=dry_run)
 
 def create_vector_store(client, vector_store_name: str, chunk_size=4096, chunk_overlap=2048) -> any:
   """Create a new vector store with specified chunking strategy.
@@ -1407,51 +2827,95 @@ def create_vector_store(client, vector_store_name: str, chunk_size=4096, chunk_o
   # Create vector store
   vector_store = client.vector_stores.create(name=vector_store_name, chunking_strategy=chunking_strategy)
   print(f"    OK. ID={vector_store.id}") if vector_store.id else print("  FAIL.")
+  get_vector_store_cache(client).put(vector_store, include_name=True)
   
   return vector_store
 
 # Retrieve the parsed contents of a vector store file
 # Example return type: [{"type": "text", "text": "..."}, {"type": "text", "text": "..."}, ...]
-def get_vector_store_file_content(client, vector_store_id, file_id):
+def get_vector_store_file_content(client, vector_store_id, file_id, stats=None):
   if not vector_store_id: raise ValueError(f"Expected a non-empty value for 'vector_store_id' but received {vector_store_id!r}")
   if not file_id: raise ValueError(f"Expected a non-empty value for 'file_id' but received {file_id!r}")
 
-  content_page = client.vector_stores.files.content(vector_store_id=vector_store_id, file_id=file_id)
-  all_chunks = list(content_page.data)
+  # The SDK method has no 'after' / 'limit' arguments, so cursor parameters are passed as extra query parameters
+  def list_content_page(**cursor_params):
+    return client.vector_stores.files.content(vector_store_id=vector_store_id, file_id=file_id, extra_query=cursor_params or None)
 
-  has_more = hasattr(content_page, 'has_more') and content_page.has_more
-  current_page = content_page
+  return get_all_paginated_items(list_content_page, limit=None, stats=stats)
 
-  while has_more:
-    last_id = current_page.data[-1].id if current_page.data else None
-    if not last_id: break
+# Number of files whose chunks are retrieved in parallel by iterate_vector_store_file_contents()
+DEFAULT_FILE_CONTENT_MAX_WORKERS = 8
 
-    next_page = client.vector_stores.files.content(vector_store_id=vector_store_id, file_id=file_id, after=last_id)
-    all_chunks.extend(next_page.data)
-    current_page = next_page
-    has_more = hasattr(next_page, 'has_more') and next_page.has_more
+def iterate_vector_store_file_contents(client, vector_store_id, files=None, max_workers=DEFAULT_FILE_CONTENT_MAX_WORKERS, ordered=False, retry_policy=None):
+  """
+  Generator over the chunks of all files of a vector store. Yields (file, chunks) tuples as the files complete.
+  The chunks of up to max_workers files are retrieved in parallel (every file is its own paginated chain). New files are
+  only submitted while fewer than 2 x max_workers are in flight or waiting to be yielded, so memory stays bounded
+  even for stores with thousands of files. A file that fails after retries raises its error when it would be yielded.
 
-  return all_chunks
+  Args:
+    client: OpenAI client
+    vector_store_id: ID of the vector store
+    files: Optional list of vector store files (default: all files of the vector store)
+    max_workers: Number of files retrieved in parallel (1 = one after another)
+    ordered: True = yield in the order of 'files'; False = yield as soon as a file is complete
+    retry_policy: Optional RetryPolicy for the chunk retrieval of every file
+
+  Example:
+    for file, chunks in iterate_vector_store_file_contents(client, "vs_123", max_workers=16):
+      print(f"{file.id}: {len(chunks)} chunks")
+  """
+  if not vector_store_id: raise ValueError(f"Expected a non-empty value for 'vector_store_id' but received {vector_store_id!r}")
+  if files is None: files = get_vector_store_files(client, get_vector_store_by_id(client, vector_store_id))
+
+  def retrieve_chunks(file):
+    return retry_on_openai_errors(lambda: get_vector_store_file_content(client, vector_store_id, file.id), indentation=2, policy=retry_policy)
 
-# Retrieve all files and chunks of a vector store
+  if max_workers <= 1:
+    for file in files: yield file, retrieve_chunks(file)
+    return
+
+  max_in_flight = 2 * max_workers
+  files_to_submit = enumerate(files)
+  futures = {}; completed = {}; next_index = 0
+  executor = ThreadPoolExecutor(max_workers=max_workers)
+  try:
+    while True:
+      # Refill the window. With ordered=True, completed files that wait for an earlier file count towards the window.
+      while len(futures) + len(completed) < max_in_flight:
+        index, file = next(files_to_submit, (None, None))
+        if index is None: break
+        futures[executor.submit(retrieve_chunks, file)] = (index, file)
+      if not futures and not completed: break
+      if futures:
+        done, _ = wait(futures, return_when=FIRST_COMPLETED)
+        for future in done:
+          index, file = futures.pop(future)
+          completed[index] = (file, future)
+      if ordered:
+        while next_index in completed:
+          file, future = completed.pop(next_index); next_index += 1
+          yield file, future.result()
+      else:
+        for index in list(completed):
+          file, future = completed.pop(index)
+          yield file, future.result()
+  finally:
+    # Stops retrieving when the caller stops iterating or a file failed
+    executor.shutdown(wait=True, cancel_futures=True)
+
+# Retrieve all files and chunks of a vector store. The chunks of up to max_workers files are retrieved in parallel,
+# the result keeps the order of the vector store files. Use iterate_vector_store_file_contents() to stream large stores.
 # Example return type: [{"file": <file_object>, "chunks": [{"type": "text", "text": "..."}, ...]}, ...]
-def get_all_vector_store_file_contents(client, vector_store_id):
+def get_all_vector_store_file_contents(client, vector_store_id, max_workers=DEFAULT_FILE_CONTENT_MAX_WORKERS):
   if not vector_store_id: raise ValueError(f"Expected a non-empty value for 'vector_store_id' but received {vector_store_id!r}")
   
-  vs = get_vector_store_by_id(client, vector_store_id)
-  all_vector_store_files = get_vector_store_files(client, vs)
-  
-  # For each file, retrieve its chunks
-  results = []
-  for file in all_vector_store_files:
-    chunks = get_vector_store_file_content(client, vector_store_id, file.id)
-    results.append({"file": file, "chunks": chunks})
-  
-  return results
+  return [{"file": file, "chunks": chunks} for file, chunks in iterate_vector_store_file_contents(client, vector_store_id, max_workers=max_workers, ordered=True)]
 
 # formats a list of vector store file contents
+# Also accepts (file, chunks) tuples and generators like iterate_vector_store_file_contents(). Only the first 2 chunks
+# of every file are kept, so a large store can be streamed into the table.
 def format_vector_store_file_content_table(array_of_file_dicts):
-  if not array_of_file_dicts: return '(No file contents found)'
   
   # Define headers and max column widths
   headers = ['Filename', 'Chunks', 'Chunk 1', 'Chunk 2']
@@ -1461,9 +2925,10 @@ def format_vector_store_file_content_table(array_of_file_dicts):
   col_widths = [min(len(h), max_widths[i]) for i, h in enumerate(headers)]
   
   rows = []
-  for item in array_of_file_dicts:
-    file = item.get('file')
-    chunks = item.get('chunks', [])
+  for item in array_of_file_dicts or []:
+    if isinstance(item, tuple): file, chunks = item
+    else: file = item.get('file'); chunks = item.get('chunks', [])
+    chunks = chunks or []
     
     # Get filename - check direct attribute first, then attributes dict
     filename = '...'
@@ -1501,6 +2966,8 @@ def format_vector_store_file_content_table(array_of_file_dicts):
     
     rows.append(row_data)
   
+  if not rows: return '(No file contents found)'
+  
   # Build table as string
   lines = []
   header_line = ' | '.join(h.ljust(col_widths[i]) for i, h in enumerate(headers))
@@ -1581,29 +3048,8 @@ def format_search_results_table(search_results):
 
 # Gets all evals from Azure OpenAI with pagination handling.
 # Adds a zero-based 'index' attribute to each eval.
-def get_all_evals(client):
-  first_page = client.evals.list()
-  has_more = hasattr(first_page, 'has_more') and first_page.has_more
-  
-  # If only one page, add 'index' and return
-  if not has_more:
-    for idx, eval in enumerate(first_page.data): setattr(eval, 'index', idx)
-    return first_page.data
-  
-  # Initialize collection with first page data
-  all_evals = list(first_page.data)
-  total_evals = len(all_evals)
-  
-  # Continue fetching pages while there are more results
-  current_page = first_page
-  while has_more:
-    last_id = current_page.data[-1].id if current_page.data else None
-    if not last_id: break
-    next_page = client.evals.list(after=last_id)
-    all_evals.extend(next_page.data)
-    total_evals += len(next_page.data)
-    current_page = next_page
-    has_more = hasattr(next_page, 'has_more') and next_page.has_more
+def get_all_evals(client, stats=None):
+  all_evals = get_all_paginated_items(client.evals.list, stats=stats)
   
   # Add index attribute to all evals
   for idx, eval in enumerate(all_evals): setattr(eval, 'index', idx)
@@ -1674,22 +3120,8 @@ def format_evals_table(evals_list):
   return '\n'.join(lines)
 
 # Gets all eval runs from Azure OpenAI with pagination handling.
-def get_all_eval_runs(client, eval_id):
-  runs_page = client.evals.runs.list(eval_id=eval_id)
-  all_runs = list(runs_page.data)
-  
-  # Get additional pages if they exist
-  has_more = hasattr(runs_page, 'has_more') and runs_page.has_more
-  current_page = runs_page
-  
-  while has_more:
-    last_id = current_page.data[-1].id if current_page.data else None
-    if not last_id: break
-    
-    next_page = client.evals.runs.list(eval_id=eval_id, after=last_id)
-    all_runs.extend(next_page.data)
-    current_page = next_page
-    has_more = hasattr(next_page, 'has_more') and next_page.has_more
+def get_all_eval_runs(client, eval_id, stats=None):
+  all_runs = get_all_paginated_items(client.evals.runs.list, stats=stats, eval_id=eval_id)
   
   # Add index and eval_id attributes to all runs
   for idx, run in enumerate(all_runs):
@@ -1706,22 +3138,7 @@ def get_all_eval_run_output_items(client, run_id, eval_id, expected_count=None,
       print(f"  DEBUG: [Get all eval output items] - Retry attempt {attempt} / {max_retries} for fetching output items")
       time.sleep(2)  # Wait 2 seconds before retry
     
-    # Fetch first page
-    output_items_page = client.evals.runs.output_items.list(eval_id=eval_id, run_id=run_id)
-    all_output_items = list(output_items_page.data)
-    
-    # Get additional pages if they exist
-    has_more = hasattr(output_items_page, 'has_more') and output_items_page.has_more
-    current_page = output_items_page
-    
-    while has_more:
-      last_id = current_page.data[-1].id if current_page.data else None
-      if not last_id: break
-      
-      next_page = client.evals.runs.output_items.list(eval_id=eval_id, run_id=run_id, after=last_id)
-      all_output_items.extend(next_page.data)
-      current_page = next_page
-      has_more = hasattr(next_page, 'has_more') and next_page.has_more
+    all_output_items = get_all_paginated_items(client.evals.runs.output_items.list, eval_id=eval_id, run_id=run_id)
     
     # Check if we got the expected number of items
     if expected_count is None or len(all_output_items) == expected_count:
@@ -1744,13 +3161,12 @@ def delete_all_evals(client, dry_run=False):
   start_time = log_function_header(function_name)
 
   all_evals = get_all_evals(client)
-  for i, eval in enumerate(all_evals):
-    print(f"  [ {i+1} / {len(all_evals)} ] Deleting eval '{eval.name}' (ID={eval.id})...")
-    if dry_run: continue
-    try: client.evals.delete(eval_id=eval.id)
-    except Exception as e: print(f"    WARNING: Failed to delete '{eval.name}' (ID={eval.id}). Error: {str(e)}")
+  labels = {eval.id: f"eval '{eval.name}' (ID={eval.id})" for eval in all_evals}
+  result = bulk_delete(client, 'eval', [eval.id for eval in all_evals], labels, dry_run=dry_run)
+  print(f"  {result}")
 
   log_function_footer(function_name, start_time)
+  return result
 
 def delete_eval_by_id(client, eval_id):
   try:
@@ -1776,26 +3192,175 @@ def delete_eval_by_name(client, name):
 
 
 # ----------------------------------------------------- START: Cleanup --------------------------------------------------------
-# Delete expired vector stores
-def delete_expired_vector_stores(client):
-  function_name = 'Delete expired vector stores'
-  start_time = log_function_header(function_name)
+# Every cleanup operation is split into a planner (plan_*) that finds what to delete and returns a DeletionPlan, and
+# execute_deletion_plan(), which applies a plan concurrently with bulk_delete(). A plan can be saved as JSON / JSONL,
+# reviewed and applied later without listing the tenant again. The delete_* functions plan and apply in one call.
+
+# Order in which the kinds of a plan are deleted: vector store files first, global files after the vector stores using them
+DELETION_PLAN_KIND_ORDER = ['vector_store_file', 'assistant', 'vector_store', 'file', 'eval']
+
+# Objects to delete, found by one cleanup operation. items: list of dictionaries with 'kind' (see BULK_DELETE_KINDS),
+# 'key' (see bulk_delete()), 'label' (shown in the log), 'reason' and, where known, 'bytes' (storage freed by the deletion).
+# Optional 'requires': list of [kind, key] of earlier items that must be deleted first (see execute_deletion_plan()).
+@dataclass
+class DeletionPlan:
+  operation: str
+  endpoint: str
+  items: list
+  parameters: dict = None
+  created_at: int = 0
+
+  def add(self, kind, key, label, reason, bytes=None, requires=None):
+    item = {'kind': kind, 'key': key, 'label': label, 'reason': reason}
+    if bytes is not None: item['bytes'] = bytes
+    if requires: item['requires'] = [list(r) for r in requires]
+    self.items.append(item)
+
+  def get_keys(self, kind):
+    return [item['key'] for item in self.items if item['kind'] == kind]
+
+  def __str__(self):
+    counts = {}
+    for item in self.items: counts[(item['kind'], item['reason'])] = counts.get((item['kind'], item['reason']), 0) + 1
+    counts_str = ", ".join([f"{count:,} {kind.replace('_', ' ')}{'s' if count != 1 else ''} ({reason})" for (kind, reason), count in counts.items()]) or "nothing to delete"
+    return f"Deletion plan '{self.operation}' ({format_timestamp(self.created_at)}): {counts_str}"
+
+  def print_items(self, indentation=2):
+    for i, item in enumerate(self.items, 1): print(f"{' '*indentation}[ {i} / {len(self.items)} ] {item['label']}: {item['reason']}")
+
+  # Saves the plan as JSON, or as JSONL (header line, then one line per item) if the path ends with '.jsonl'. Atomic: temp file + rename.
+  def save(self, plan_path):
+    header = {'operation': self.operation, 'endpoint': self.endpoint, 'parameters': self.parameters or {}, 'created_at': self.created_at}
+    plan_folder = os.path.dirname(os.path.abspath(plan_path))
+    if not os.path.exists(plan_folder): os.makedirs(plan_folder)
+    temp_path = plan_path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+      if plan_path.lower().endswith('.jsonl'):
+        f.write(json.dumps({'type': 'deletion_plan', **header}) + "\n")
+        for item in self.items: f.write(json.dumps({'type': 'item', **item}) + "\n")
+      else: json.dump({**header, 'items': self.items}, f, indent=2)
+    os.replace(temp_path, plan_path)
+
+  @classmethod
+  def load(cls, plan_path):
+    with open(plan_path, 'r', encoding='utf-8') as f:
+      if plan_path.lower().endswith('.jsonl'):
+        header = {}; items = []
+        for line in f:
+          if not line.strip(): continue
+          entry = json.loads(line)
+          if entry.pop('type', None) == 'item': items.append(entry)
+          else: header = entry
+      else:
+        header = json.load(f); items = header.get('items', [])
+    return cls(header.get('operation', ''), header.get('endpoint', ''), items, header.get('parameters') or {}, header.get('created_at', 0))
+
+def create_deletion_plan(client, operation, parameters=None):
+  return DeletionPlan(operation, str(getattr(client, 'base_url', '')), [], parameters or {}, int(time.time()))
+
+# Returns a dictionary group -> {'count', 'bytes'} over the items of a plan, grouped by group_function(item) (default: 'reason').
+# Items with group None are left out. With results (from execute_deletion_plan()), only items that were deleted
+# (or would be, with dry_run) are counted.
+def get_deletion_plan_totals(plan, results=None, group_function=None):
+  done_keys = None
+  if results is not None: done_keys = {(result.kind, r.key) for result in results for r in result.results if r.status in ['deleted', 'dry_run']}
+  totals = {}
+  for item in plan.items:
+    if done_keys is not None and (item['kind'], item['key']) not in done_keys: continue
+    group = group_function(item) if group_function else item['reason']
+    if group is None: continue
+    entry = totals.setdefault(group, {'count': 0, 'bytes': 0})
+    entry['count'] += 1; entry['bytes'] += item.get('bytes') or 0
+  return totals
+
+def execute_deletion_plan(client, plan, max_concurrency=DEFAULT_BULK_DELETE_MAX_CONCURRENCY, journal_path=None, dry_run=False, indentation=2):
+  """
+  Applies a deletion plan: deletes the items of each kind concurrently with bulk_delete(), kinds in DELETION_PLAN_KIND_ORDER.
+  Objects that are already gone count as 'not_found', so an old plan can be applied safely.
+  Items with 'requires' are only deleted if all required items were deleted (or not found) before. Otherwise they are
+  kept and get status 'kept' in the result, e.g. files of a vector store that failed to delete.
 
-  vector_stores = get_all_vector_stores(client)
-  vector_stores_expired = [v for v in vector_stores if getattr(v, 'status', None) == 'expired']
-  if len(vector_stores_expired) == 0: print(" Nothing to delete.")
+  Args:
+    plan: DeletionPlan or path of a saved plan (JSON / JSONL)
+    max_concurrency: Maximum number of deletions in flight
+    journal_path: Optional journal path. One bulk_delete() journal per kind is written next to it ('<name>.<kind>.jsonl').
+      Applying the same plan again with the same journal_path skips what was already deleted.
+    dry_run: Only log what would be deleted
 
-  for vs in vector_stores_expired:
-    print(f"  Deleting expired vector store ID={vs.id} '{vs.name}'...")
-    client.vector_stores.delete(vs.id)
+  Returns:
+    List of BulkDeleteResult, one per kind in the plan
 
-  log_function_footer(function_name, start_time)
+  Example:
+    plan = plan_delete_failed_and_unused_files(client)
+    plan.save("./cleanup_plan.jsonl")
+    # ... review the plan ...
+    results = execute_deletion_plan(client, "./cleanup_plan.jsonl", journal_path="./cleanup_journal.jsonl")
+  """
+  if isinstance(plan, str): plan = DeletionPlan.load(plan)
+  indent = ' ' * indentation
+  endpoint = str(getattr(client, 'base_url', ''))
+  if plan.endpoint and plan.endpoint != endpoint: raise ValueError(f"Deletion plan '{plan.operation}' was created for endpoint '{plan.endpoint}', not '{endpoint}'")
+  unknown_kinds = {item['kind'] for item in plan.items} - set(DELETION_PLAN_KIND_ORDER)
+  if unknown_kinds: raise ValueError(f"Invalid kind(s) in deletion plan: {', '.join(sorted(unknown_kinds))}. Must be one of: {', '.join(BULK_DELETE_KINDS)}")
+
+  print(f"{indent}{plan}")
+  results = []
+  done_keys = set()
+  for kind in DELETION_PLAN_KIND_ORDER:
+    items = [item for item in plan.items if item['kind'] == kind]
+    if not items: continue
+    kept_items = [item for item in items if any(tuple(r) not in done_keys for r in item.get('requires', []))]
+    for item in kept_items: print(f"{indent}Keeping {item['label']}: required objects were not deleted.")
+    items = [item for item in items if item not in kept_items]
+    result = BulkDeleteResult(kind, [])
+    if items:
+      print(f"{indent}Deleting {len(items):,} {kind.replace('_', ' ')}{'s' if len(items) != 1 else ''}{' (dry run)' if dry_run else ''}...")
+      kind_journal_path = f"{os.path.splitext(journal_path)[0]}.{kind}.jsonl" if journal_path else None
+      result = bulk_delete(client, kind, [item['key'] for item in items], {item['key']: item['label'] for item in items}, max_concurrency, kind_journal_path, dry_run, indentation=indentation+2)
+    result.results.extend([DeleteResult(item['key'], 'kept', 'required objects were not deleted') for item in kept_items])
+    print(f"{indent}  {result}")
+    done_keys.update((kind, r.key) for r in result.results if r.status in ['deleted', 'not_found', 'skipped', 'dry_run'])
+    results.append(result)
+  return results
 
-# Delete duplicate files in vector stores
-# This will delete all duplicate filenames in vector stores, keeping only the file with the latest upload time
-def delete_duplicate_files_in_vector_stores(client):
-  function_name = 'Delete duplicate files in vector stores'
+# Saves the plan (if plan_path is given) and applies it. Used by the delete_* functions below.
+def save_and_execute_deletion_plan(client, plan, dry_run=False, plan_path=None, max_concurrency=DEFAULT_BULK_DELETE_MAX_CONCURRENCY, journal_path=None):
+  if plan_path:
+    plan.save(plan_path)
+    print(f"  Deletion plan with {len(plan.items):,} items saved to '{plan_path}'.")
+  if len(plan.items) == 0: print("  Nothing to delete."); return []
+  return execute_deletion_plan(client, plan, max_concurrency, journal_path, dry_run)
+
+# Plans the deletion of all vector stores with status 'expired'
+def plan_delete_expired_vector_stores(client):
+  plan = create_deletion_plan(client, 'delete_expired_vector_stores')
+  vector_stores = get_all_vector_stores(client)
+  for vs in vector_stores:
+    if getattr(vs, 'status', None) == 'expired': plan.add('vector_store', vs.id, f"expired vector store ID={vs.id} '{vs.name}'", "expired")
+  return plan
+
+# Delete expired vector stores
+def delete_expired_vector_stores(client, dry_run=False, plan_path=None, max_concurrency=DEFAULT_BULK_DELETE_MAX_CONCURRENCY):
+  function_name = 'Delete expired vector stores'
   start_time = log_function_header(function_name)
+  plan = plan_delete_expired_vector_stores(client)
+  save_and_execute_deletion_plan(client, plan, dry_run, plan_path, max_concurrency)
+  log_function_footer(function_name, start_time)
+  return plan
+
+# Criteria for duplicate files in a vector store:
+#   'filename':           same filename
+#   'filename_and_bytes': same filename and size
+#   'content':            same filename, size and SHA-256 of the content (see get_file_content_hashes()). Files whose content
+#                         can't be downloaded are never treated as duplicates.
+DUPLICATE_MATCH_MODES = ['filename', 'filename_and_bytes', 'content']
+
+# Plans the deletion of duplicate files in vector stores: of each group of duplicates (see DUPLICATE_MATCH_MODES) in a
+# vector store, only the newest file is kept. The files of all vector stores are listed in parallel (max_workers).
+# Items have 'bytes' = usage bytes of the vector store file (see get_reclaimed_bytes_by_vector_store()).
+def plan_delete_duplicate_files_in_vector_stores(client, match_by='filename', max_workers=DEFAULT_VECTOR_STORE_FAN_OUT_WORKERS, file_hash_cache_path=DEFAULT_FILE_HASH_CACHE_PATH):
+  if match_by not in DUPLICATE_MATCH_MODES: raise ValueError(f"Invalid match_by '{match_by}'. Must be one of: {', '.join(DUPLICATE_MATCH_MODES)}")
+  plan = create_deletion_plan(client, 'delete_duplicate_files_in_vector_stores', {'match_by': match_by})
 
   print(f"  Loading all files...")
   all_files_list = get_all_files(client)
@@ -1804,85 +3369,398 @@ def delete_duplicate_files_in_vector_stores(client):
 
   print(f"  Loading all vector stores...")
   vector_stores = get_all_vector_stores(client)
-  for vs in vector_stores:
-    print(f"  Loading files for vector store '{vs.name}'...")
-    files = get_vector_store_files(client, vs)
-    # Sort files so newest files are on top
-    files.sort(key=lambda f: f.created_at, reverse=True)
-    # Add filenames from all_files to files
-    for f in files:
-      # If error, use datetime timestamp as filename. Can happen if vector store got new file just after all_files was loaded.
-      try: f.filename = all_files[f.id].filename
-      except: f.filename = str(datetime.datetime.now().timestamp())
-
-    # Create dictionary with filename as key and list of files as value
-    files_by_filename = {}
+  print(f"  Loading files of {len(vector_stores):,} vector stores...")
+  files_per_vector_store = get_files_of_vector_stores(client, vector_stores, max_workers)
+
+  # Group files of each vector store by filename (and size). Files missing in all_files are skipped.
+  # Can happen if vector store got new file just after all_files was loaded.
+  groups_per_vector_store = []
+  for files in files_per_vector_store:
+    groups = {}
     for f in files:
-      if f.filename not in files_by_filename:
-        files_by_filename[f.filename] = []
-      files_by_filename[f.filename].append(f)
-    
-    # Find files with duplicate filenames. Omit first file (the newest), treat others (older files) as duplicates.
-    duplicate_files = []
-    for filename, files in files_by_filename.items():
-      if len(files) > 1:
-        duplicate_files.extend(files[1:])
-
-    for file in duplicate_files:
-      print(f"    Deleting duplicate file ID={file.id} '{file.filename}' ({format_timestamp(file.created_at)})...")
-      client.vector_stores.files.delete(file_id=file.id, vector_store_id=vs.id)
+      if f.id not in all_files: continue
+      key = all_files[f.id].filename if match_by == 'filename' else (all_files[f.id].filename, all_files[f.id].bytes)
+      groups.setdefault(key, []).append(f)
+    groups_per_vector_store.append([group for group in groups.values() if len(group) > 1])
+
+  # Confirm candidates by content: split groups by hash, files without hash become groups of their own
+  if match_by == 'content':
+    candidate_file_ids = [f.id for groups in groups_per_vector_store for group in groups for f in group]
+    hashes = get_file_content_hashes(client, candidate_file_ids, file_hash_cache_path, max_workers)
+    for i, groups in enumerate(groups_per_vector_store):
+      groups_by_hash = {}
+      for group in groups:
+        for f in group: groups_by_hash.setdefault((id(group), hashes.get(f.id) or f.id), []).append(f)
+      groups_per_vector_store[i] = [group for group in groups_by_hash.values() if len(group) > 1]
+
+  # In each group, keep the newest file and treat the others (older files) as duplicates
+  for vs, groups in zip(vector_stores, groups_per_vector_store):
+    for files in groups:
+      files.sort(key=lambda f: f.created_at, reverse=True)
+      for file in files[1:]:
+        label = f"duplicate file ID={file.id} '{all_files[file.id].filename}' ({format_timestamp(file.created_at)}) from vector store '{vs.name}'"
+        plan.add('vector_store_file', get_vector_store_file_key(vs.id, file.id), label, f"older than file ID={files[0].id}", getattr(file, 'usage_bytes', None) or 0)
+  return plan
+
+# Returns a dictionary vector store ID -> {'files': count, 'bytes': sum of 'bytes'} of the vector store files in the plan.
+# With results (from execute_deletion_plan()), only files that were deleted (or would be, with dry_run) are counted.
+def get_reclaimed_bytes_by_vector_store(plan, results=None):
+  totals = get_deletion_plan_totals(plan, results, lambda item: item['key'].split('/', 1)[0] if item['kind'] == 'vector_store_file' else None)
+  return {vector_store_id: {'files': entry['count'], 'bytes': entry['bytes']} for vector_store_id, entry in totals.items()}
 
+# Delete duplicate files in vector stores
+# This will delete all duplicate filenames in vector stores, keeping only the file with the latest upload time.
+# match_by: see DUPLICATE_MATCH_MODES. Prints the number of files and bytes reclaimed per vector store.
+def delete_duplicate_files_in_vector_stores(client, dry_run=False, plan_path=None, max_concurrency=DEFAULT_BULK_DELETE_MAX_CONCURRENCY, match_by='filename', file_hash_cache_path=DEFAULT_FILE_HASH_CACHE_PATH):
+  function_name = 'Delete duplicate files in vector stores'
+  start_time = log_function_header(function_name)
+  plan = plan_delete_duplicate_files_in_vector_stores(client, match_by, file_hash_cache_path=file_hash_cache_path)
+  results = save_and_execute_deletion_plan(client, plan, dry_run, plan_path, max_concurrency)
+  reclaimed = get_reclaimed_bytes_by_vector_store(plan, results)
+  for vector_store_id, entry in sorted(reclaimed.items(), key=lambda x: -x[1]['bytes']):
+    print(f"  Vector store ID={vector_store_id}: {entry['files']:,} files, {format_filesize(entry['bytes']) or '0 B'} {'to reclaim' if dry_run else 'reclaimed'}")
+  if reclaimed: print(f"  Total: {sum(e['files'] for e in reclaimed.values()):,} files, {format_filesize(sum(e['bytes'] for e in reclaimed.values())) or '0 B'} {'to reclaim' if dry_run else 'reclaimed'}")
   log_function_footer(function_name, start_time)
+  return plan
 
-
-# deletes all files with status = 'failed', 'cancelled' and all files with purpose = 'assistants' that are not used by any vector store
-def delete_failed_and_unused_files(client, dry_run=False):
-  function_name = 'Delete failed and unused files'
-  start_time = log_function_header(function_name)
+# Plans the deletion of all files with status = 'failed', 'cancelled' and all files with purpose = 'assistants' that are not used by any vector store
+def plan_delete_failed_and_unused_files(client):
+  plan = create_deletion_plan(client, 'delete_failed_and_unused_files')
 
   print(f"  Loading all files...")
-  all_files_list = get_all_files(client)
-  # Convert to hashmap by using id as key
-  all_files = {f.id: f for f in all_files_list}
-
-  # Find files with status = 'failed', 'cancelled'
-  files_to_delete = [f for f in all_files.values() if f.status in ['failed', 'cancelled']]
+  all_files = get_all_files(client)
 
   print(f"  Loading files used by vector stores...")
   files_used_by_vector_stores_list = get_all_files_used_by_vector_stores(client)
   files_used_by_vector_stores = {f.id: f for f in files_used_by_vector_stores_list}
 
-  # Find files with purpose = 'assistants' that are not used by any vector store
-  files_not_used_by_vector_stores = [f for f in all_files.values() if f.purpose == 'assistants' and f.id not in files_used_by_vector_stores]
-  files_to_delete.extend(files_not_used_by_vector_stores)
-
-  for i, file in enumerate(files_to_delete, 1):
-    print(f"    [ {i} / {len(files_to_delete)} ] Deleting file '{file.filename}' (ID={file.id}, {format_timestamp(file.created_at)})...")
-    if dry_run: continue
-    try:
-      client.files.delete(file_id=file.id)
-    except Exception as e:
-      print(f"  WARNING: Failed to delete file ID={file.id} from global storage: {str(e)}")
+  for f in all_files:
+    label = f"file '{f.filename}' (ID={f.id}, {format_timestamp(f.created_at)})"
+    if f.status in ['failed', 'cancelled']: plan.add('file', f.id, label, f"status '{f.status}'")
+    elif f.purpose == 'assistants' and f.id not in files_used_by_vector_stores: plan.add('file', f.id, label, "not used by any vector store")
+  return plan
 
+# deletes all files with status = 'failed', 'cancelled' and all files with purpose = 'assistants' that are not used by any vector store
+def delete_failed_and_unused_files(client, dry_run=False, plan_path=None, max_concurrency=DEFAULT_BULK_DELETE_MAX_CONCURRENCY):
+  function_name = 'Delete failed and unused files'
+  start_time = log_function_header(function_name)
+  plan = plan_delete_failed_and_unused_files(client)
+  save_and_execute_deletion_plan(client, plan, dry_run, plan_path, max_concurrency)
   log_function_footer(function_name, start_time)
+  return plan
 
-def delete_vector_stores_not_used_by_assistants(client, until_date_created, dry_run=False):
+# Plans the deletion of all vector stores not used by any assistant and created before until_date_created
+def plan_delete_vector_stores_not_used_by_assistants(client, until_date_created):
+  plan = create_deletion_plan(client, 'delete_vector_stores_not_used_by_assistants', {'until_date_created': until_date_created.isoformat()})
+  all_vector_stores = get_all_vector_stores(client)
+  all_assistant_vector_store_ids = set(get_all_assistant_vector_store_ids(client))
+  for vs in all_vector_stores:
+    if vs.id in all_assistant_vector_store_ids or datetime.datetime.fromtimestamp(vs.created_at) > until_date_created: continue
+    plan.add('vector_store', vs.id, f"vector store ID={vs.id} '{vs.name}' ({format_timestamp(vs.created_at)})", "not used by assistants")
+  return plan
+
+def delete_vector_stores_not_used_by_assistants(client, until_date_created, dry_run=False, plan_path=None, max_concurrency=DEFAULT_BULK_DELETE_MAX_CONCURRENCY):
   function_name = 'Delete vector stores not used by assistants'
   start_time = log_function_header(function_name)
+  plan = plan_delete_vector_stores_not_used_by_assistants(client, until_date_created)
+  save_and_execute_deletion_plan(client, plan, dry_run, plan_path, max_concurrency)
+  log_function_footer(function_name, start_time)
+  return plan
 
-  all_vector_stores = get_all_vector_stores(client)
-  all_assistant_vector_store_ids = get_all_assistant_vector_store_ids(client)
-  vector_stores_not_used_by_assistants = [vs for vs in all_vector_stores if vs.id not in all_assistant_vector_store_ids and datetime.datetime.fromtimestamp(vs.created_at) <= until_date_created]
 
-  for vs in vector_stores_not_used_by_assistants:
-    print(f"  Deleting vector store ID={vs.id} '{vs.name}' ({format_timestamp(vs.created_at)})...")
-    if dry_run: continue
-    try:
-      client.vector_stores.delete(vs.id)
-    except Exception as e:
-      print(f"  WARNING: Failed to delete vector store ID={vs.id}: {str(e)}")
+# Categories of tenant garbage, see plan_tenant_garbage_collection()
+TENANT_GARBAGE_CATEGORIES = ['expired_vector_stores', 'vector_stores_not_used_by_assistants', 'empty_vector_stores', 'failed_files', 'unused_files']
 
-  log_function_footer(function_name, start_time)
+def plan_tenant_garbage_collection(client, until_date_created=None, categories=None, inventory=None):
+  """
+  Plans a single-pass garbage collection of the tenant (mark and sweep). The reference graph
+  assistant -> vector store -> file is built once from a TenantInventory (everything listed in parallel), then every
+  object is assigned to the first matching category (the item's 'reason'):
+    expired_vector_stores:                vector stores with status 'expired'
+    vector_stores_not_used_by_assistants: vector stores not used by any assistant and created until until_date_created
+                                          (only if until_date_created is given)
+    empty_vector_stores:                  vector stores with usage_bytes = 0 that are not used by any assistant
+    failed_files:                         files with status 'failed' or 'cancelled'
+    unused_files:                         files with purpose 'assistants' that are not used (status other than 'failed' or
+                                          'cancelled') by any vector store that is kept
+  Unlike running the delete_* functions one after another, files that are only used by collected vector stores are
+  found in the same pass. Such files 'require' their vector stores: they are kept if a vector store fails to delete.
+  Vector stores missing in the listing (enumeration gaps, vector stores of assistants) are never swept: their files are
+  listed by ID, and if that is not possible, no 'unused_files' are planned. Items have 'bytes': usage bytes of vector
+  stores, size of files.
 
+  Args:
+    until_date_created: datetime. Enables 'vector_stores_not_used_by_assistants'
+    categories: Subset of TENANT_GARBAGE_CATEGORIES (default: all)
+    inventory: Optional TenantInventory to use instead of loading a new one. Must be recent, otherwise objects that
+      are in use now can be collected.
+
+  Returns:
+    DeletionPlan
+  """
+  categories = list(TENANT_GARBAGE_CATEGORIES if categories is None else categories)
+  invalid_categories = [c for c in categories if c not in TENANT_GARBAGE_CATEGORIES]
+  if invalid_categories: raise ValueError(f"Invalid categories: {', '.join(invalid_categories)}. Must be one of: {', '.join(TENANT_GARBAGE_CATEGORIES)}")
+  parameters = {'categories': categories, 'until_date_created': until_date_created.isoformat() if until_date_created else None}
+  plan = create_deletion_plan(client, 'collect_tenant_garbage', parameters)
+  if inventory is None: inventory = TenantInventory.load(client, include_evals=False)
+
+  # Vector stores: assistants are the roots
+  assistant_vector_store_ids = set(inventory.get_all_assistant_vector_store_ids())
+  collected_vector_store_ids = set()
+  for vs in inventory.vector_stores:
+    used_by_assistant = vs.id in assistant_vector_store_ids
+    if 'expired_vector_stores' in categories and getattr(vs, 'status', None) == 'expired': category = 'expired_vector_stores'
+    elif 'vector_stores_not_used_by_assistants' in categories and until_date_created and not used_by_assistant and datetime.datetime.fromtimestamp(vs.created_at) <= until_date_created: category = 'vector_stores_not_used_by_assistants'
+    elif 'empty_vector_stores' in categories and not used_by_assistant and getattr(vs, 'usage_bytes', None) == 0: category = 'empty_vector_stores'
+    else: continue
+    collected_vector_store_ids.add(vs.id)
+    plan.add('vector_store', vs.id, f"vector store ID={vs.id} '{vs.name}' ({format_timestamp(vs.created_at)})", category, getattr(vs, 'usage_bytes', None) or 0)
+
+  # Files: marked as used by the vector stores that are kept
+  used_file_ids = set()
+  for vector_store_id, vector_store_files in inventory.vector_store_files_by_vector_store_id.items():
+    if vector_store_id in collected_vector_store_ids: continue
+    used_file_ids.update(f.id for f in vector_store_files if getattr(f, 'status', None) not in ['failed', 'cancelled'])
+  # Vector stores the inventory could not list (enumeration gaps, assistant vector stores missing in the listing) are kept:
+  # their files are listed by ID. If that fails, files can't be marked and no file is collected as unused.
+  collect_unused_files = 'unused_files' in categories
+  if collect_unused_files:
+    unlisted_vector_store_ids = [vector_store_id for vector_store_id in assistant_vector_store_ids if vector_store_id not in inventory.vector_stores_by_id]
+    unlisted_vector_store_ids += [gap['broken_id'] for gap in inventory.vector_store_gaps if gap.get('broken_id')]
+    unmarked = [gap['error_context'] for gap in inventory.vector_store_gaps if not gap.get('broken_id')]
+    for vector_store_id in dict.fromkeys(unlisted_vector_store_ids):
+      print(f"  Listing files of vector store ID={vector_store_id} missing in the vector store listing...")
+      try: vector_store_files = get_all_paginated_items(client.vector_stores.files.list, vector_store_id=vector_store_id)
+      except Exception as e:
+        print(f"    WARNING: Failed to list files of vector store ID={vector_store_id} -> {e}")
+        unmarked.append(f"vector store ID={vector_store_id}"); continue
+      used_file_ids.update(f.id for f in vector_store_files if getattr(f, 'status', None) not in ['failed', 'cancelled'])
+    if unmarked:
+      print(f"  WARNING: Not collecting 'unused_files': files of {len(unmarked)} vector store{'s' if len(unmarked) != 1 else ''} could not be listed ({', '.join(unmarked)}).")
+      collect_unused_files = False
+  for f in inventory.files:
+    if 'failed_files' in categories and f.status in ['failed', 'cancelled']: category = 'failed_files'
+    elif collect_unused_files and f.purpose == 'assistants' and f.id not in used_file_ids: category = 'unused_files'
+    else: continue
+    # Unused files of collected vector stores are only deleted after those vector stores were deleted
+    requires = [['vector_store', vector_store_id] for vector_store_id in inventory.get_vector_store_ids_of_file(f.id) if vector_store_id in collected_vector_store_ids] if category == 'unused_files' else None
+    plan.add('file', f.id, f"file '{f.filename}' (ID={f.id}, {format_timestamp(f.created_at)})", category, getattr(f, 'bytes', None) or 0, requires)
+  return plan
+
+# Outcome of collect_tenant_garbage(). str() is the report: objects and bytes freed per category.
+@dataclass
+class TenantGarbageCollectionResult:
+  plan: DeletionPlan
+  results: list
+  dry_run: bool = False
+
+  # Dictionary category -> {'count', 'bytes'} of the objects that were deleted (or would be, with dry_run)
+  @property
+  def totals(self): return get_deletion_plan_totals(self.plan, self.results)
+
+  def __str__(self):
+    totals = self.totals
+    freed = 'To free' if self.dry_run else 'Freed'
+    lines = [f"{'Category':<38} {'Objects':>9} {freed:>12}"]
+    for category in (self.plan.parameters or {}).get('categories', TENANT_GARBAGE_CATEGORIES):
+      entry = totals.get(category, {'count': 0, 'bytes': 0})
+      lines.append(f"{category:<38} {entry['count']:>9,} {format_filesize(entry['bytes']) or '0 B':>12}")
+    lines.append(f"{'Total':<38} {sum(e['count'] for e in totals.values()):>9,} {format_filesize(sum(e['bytes'] for e in totals.values())) or '0 B':>12}")
+    return "\n".join(lines)
+
+# Finds all tenant garbage in one pass (see plan_tenant_garbage_collection()) and deletes it with bounded concurrency,
+# in dependency order (vector stores before the files they used). Prints and returns a TenantGarbageCollectionResult.
+def collect_tenant_garbage(client, until_date_created=None, categories=None, dry_run=False, plan_path=None, max_concurrency=DEFAULT_BULK_DELETE_MAX_CONCURRENCY, journal_path=None, inventory=None):
+  function_name = 'Collect tenant garbage'
+  start_time = log_function_header(function_name)
+  plan = plan_tenant_garbage_collection(client, until_date_created, categories, inventory)
+  results = save_and_execute_deletion_plan(client, plan, dry_run, plan_path, max_concurrency, journal_path)
+  result = TenantGarbageCollectionResult(plan, results, dry_run)
+  print("\n".join(f"  {line}" for line in str(result).split("\n")))
+  log_function_footer(function_name, start_time)
+  return result
 
 # ----------------------------------------------------- END: Cleanup ----------------------------------------------------------
+
+
+# ----------------------------------------------------- START: Tenant inventory -----------------------------------------------
+
+DEFAULT_TENANT_INVENTORY_MAX_AGE_SECONDS = 3600
+
+# Returns all vector store IDs configured in the file_search tool resources of an assistant (get_assistant_vector_store_id() returns only the first)
+def get_assistant_vector_store_ids(assistant):
+  tool_resources = getattr(assistant, 'tool_resources', None)
+  file_search = getattr(tool_resources, 'file_search', None) if tool_resources else None
+  vector_store_ids = getattr(file_search, 'vector_store_ids', None) if file_search else None
+  return list(vector_store_ids) if vector_store_ids else []
+
+class TenantInventory:
+  """
+  In-memory snapshot of all files, vector stores, vector store files, assistants and evals of a tenant.
+  Everything is loaded once (in parallel) and all listing and "used / unused" questions are answered from indexes.
+
+  Indexes:
+    files_by_id                            file_id -> file
+    vector_stores_by_id                    vector_store_id -> vector store
+    vector_store_files_by_vector_store_id  vector_store_id -> [vector store file, ...]
+    vector_store_ids_by_file_id            file_id -> [vector_store_id, ...]
+    file_ids_by_filename                   filename -> [file_id, ...]
+    vector_store_ids_by_assistant_id       assistant_id -> [vector_store_id, ...]
+
+  vector_store_gaps lists the vector stores the enumeration could not list (see iterate_all_vector_stores()) as dictionaries
+  {'error_context', 'broken_id'} ('broken_id' = None if unknown). Their files are missing from the indexes.
+
+  Example:
+    inventory = TenantInventory.load(client, snapshot_path='./tenant_inventory.json', max_age_seconds=600)
+    unused_files = inventory.get_files_not_used_by_vector_stores()
+  """
+  def __init__(self, files, vector_stores, vector_store_files_by_vector_store_id, assistants, evals, loaded_at=None, vector_store_gaps=None):
+    self.files = files
+    self.vector_stores = vector_stores
+    self.vector_store_files_by_vector_store_id = vector_store_files_by_vector_store_id
+    self.assistants = assistants
+    self.evals = evals
+    self.loaded_at = loaded_at if loaded_at else time.time()
+    self.vector_store_gaps = vector_store_gaps or []
+    self.build_indexes()
+
+  def build_indexes(self):
+    self.files_by_id = {f.id: f for f in self.files}
+    self.vector_stores_by_id = {vs.id: vs for vs in self.vector_stores}
+    self.file_ids_by_filename = {}
+    for f in self.files: self.file_ids_by_filename.setdefault(getattr(f, 'filename', None), []).append(f.id)
+    self.vector_store_ids_by_file_id = {}
+    for vector_store_id, vector_store_files in self.vector_store_files_by_vector_store_id.items():
+      for f in vector_store_files: self.vector_store_ids_by_file_id.setdefault(f.id, []).append(vector_store_id)
+    self.vector_store_ids_by_assistant_id = {a.id: get_assistant_vector_store_ids(a) for a in self.assistants}
+
+  @property
+  def age_seconds(self):
+    return time.time() - self.loaded_at
+
+  # Loads the inventory from the API, or from snapshot_path if the snapshot is younger than max_age_seconds.
+  # If snapshot_path is given, a freshly loaded inventory is saved there.
+  @classmethod
+  def load(cls, client, snapshot_path=None, max_age_seconds=DEFAULT_TENANT_INVENTORY_MAX_AGE_SECONDS, include_evals=True, max_workers=8):
+    if snapshot_path and os.path.exists(snapshot_path):
+      inventory = cls.load_snapshot(snapshot_path)
+      if inventory.age_seconds <= max_age_seconds:
+        print(f"  Using tenant inventory snapshot '{snapshot_path}' (age={format_milliseconds(int(inventory.age_seconds * 1000))}).")
+        return inventory
+      print(f"  Tenant inventory snapshot '{snapshot_path}' expired (age={format_milliseconds(int(inventory.age_seconds * 1000))}, max_age_seconds={max_age_seconds}).")
+
+    print(f"  Loading tenant inventory...")
+    loaded_at = time.time()
+    with ThreadPoolExecutor(max_workers=max(2, max_workers)) as executor:
+      files_future = executor.submit(get_all_files, client)
+      assistants_future = executor.submit(get_all_assistants, client)
+      evals_future = executor.submit(get_all_evals, client) if include_evals else None
+      # Vector store files are listed as soon as the vector stores are known, while files and assistants are still loading
+      all_vector_stores = get_all_vector_stores(client, include_broken_ones=True)
+      vector_stores = [vs for vs in all_vector_stores if not isinstance(vs, DummyVectorStore404)]
+      vector_store_gaps = [{'error_context': vs.error_context, 'broken_id': vs.broken_id} for vs in all_vector_stores if isinstance(vs, DummyVectorStore404)]
+      vector_store_files_futures = {vs.id: executor.submit(get_vector_store_files, client, vs) for vs in vector_stores}
+      vector_store_files_by_vector_store_id = {vector_store_id: future.result() for vector_store_id, future in vector_store_files_futures.items()}
+      files = files_future.result()
+      assistants = assistants_future.result()
+      evals = []
+      if evals_future:
+        try: evals = evals_future.result()
+        except Exception as e: print(f"    WARNING: Failed to load evals -> {e}")
+
+    inventory = cls(files, vector_stores, vector_store_files_by_vector_store_id, assistants, evals, loaded_at, vector_store_gaps)
+    memberships = sum(len(v) for v in vector_store_files_by_vector_store_id.values())
+    print(f"    {len(files)} files, {len(vector_stores)} vector stores, {memberships} vector store files, {len(assistants)} assistants, {len(evals)} evals loaded.")
+    if vector_store_gaps: print(f"    WARNING: {len(vector_store_gaps)} vector store{'s' if len(vector_store_gaps) != 1 else ''} could not be listed.")
+    if snapshot_path: inventory.save_snapshot(snapshot_path)
+    return inventory
+
+  # Writes the inventory as JSON to snapshot_path (atomic: temp file + rename)
+  def save_snapshot(self, snapshot_path):
+    def to_dict(item): return item.model_dump(mode='json') if hasattr(item, 'model_dump') else dict(vars(item))
+    data = {
+      'loaded_at': self.loaded_at,
+      'files': [to_dict(f) for f in self.files],
+      'vector_stores': [to_dict(vs) for vs in self.vector_stores],
+      'vector_store_files': {vector_store_id: [to_dict(f) for f in files] for vector_store_id, files in self.vector_store_files_by_vector_store_id.items()},
+      'assistants': [to_dict(a) for a in self.assistants],
+      'evals': [to_dict(e) for e in self.evals],
+      'vector_store_gaps': self.vector_store_gaps
+    }
+    snapshot_folder = os.path.dirname(os.path.abspath(snapshot_path))
+    if not os.path.exists(snapshot_folder): os.makedirs(snapshot_folder)
+    temp_path = snapshot_path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f: json.dump(data, f)
+    os.replace(temp_path, snapshot_path)
+
+  @classmethod
+  def load_snapshot(cls, snapshot_path):
+    with open(snapshot_path, 'r', encoding='utf-8') as f: data = json.load(f)
+    files = [FileObject.model_validate(d) for d in data.get('files', [])]
+    vector_stores = [VectorStore.model_validate(d) for d in data.get('vector_stores', [])]
+    vector_store_files_by_vector_store_id = {vector_store_id: [VectorStoreFile.model_validate(d) for d in items] for vector_store_id, items in data.get('vector_store_files', {}).items()}
+    assistants = [Assistant.model_validate(d) for d in data.get('assistants', [])]
+    evals = [EvalListResponse.model_validate(d) for d in data.get('evals', [])]
+    return cls(files, vector_stores, vector_store_files_by_vector_store_id, assistants, evals, data.get('loaded_at'), data.get('vector_store_gaps'))
+
+  def get_file(self, file_id):
+    return self.files_by_id.get(file_id)
+
+  def get_vector_store(self, vector_store_id_or_name):
+    if vector_store_id_or_name in self.vector_stores_by_id: return self.vector_stores_by_id[vector_store_id_or_name]
+    return next((vs for vs in self.vector_stores if vs.name == vector_store_id_or_name), None)
+
+  # Returns the files of a vector store (object, ID or name) with 'index', 'vector_store_id' and 'vector_store_name' attributes
+  def get_vector_store_files(self, vector_store):
+    vector_store_id = vector_store if isinstance(vector_store, str) else getattr(vector_store, 'id', None)
+    vector_store = self.get_vector_store(vector_store_id)
+    if not vector_store: return []
+    return self.vector_store_files_by_vector_store_id.get(vector_store.id, [])
+
+  def get_file_ids_by_filename(self, filename):
+    return self.file_ids_by_filename.get(filename, [])
+
+  def get_vector_store_ids_of_file(self, file_id):
+    return self.vector_store_ids_by_file_id.get(file_id, [])
+
+  # Returns the distinct vector store IDs of all assistants in order of first appearance
+  def get_all_assistant_vector_store_ids(self):
+    all_assistant_vector_store_ids = {}
+    for vector_store_ids in self.vector_store_ids_by_assistant_id.values():
+      for vector_store_id in vector_store_ids: all_assistant_vector_store_ids[vector_store_id] = None
+    return list(all_assistant_vector_store_ids)
+
+  # Merges the files of the given vector stores into one list of copies. See merge_vector_store_file_memberships().
+  def merge_vector_store_files(self, vector_store_ids):
+    vector_stores_with_files = [(self.vector_stores_by_id[vector_store_id], self.vector_store_files_by_vector_store_id.get(vector_store_id, [])) for vector_store_id in vector_store_ids]
+    all_files = merge_vector_store_file_memberships(vector_stores_with_files, copy_files=True)
+    for idx, file in enumerate(all_files): setattr(file, 'index', idx)
+    return all_files
+
+  # Same result as get_all_files_used_by_vector_stores(client)
+  def get_all_files_used_by_vector_stores(self):
+    return self.merge_vector_store_files([vs.id for vs in self.vector_stores])
+
+  # Like get_files_used_by_assistant_vector_stores(client), but considers all vector stores of an assistant and not only the first one
+  def get_files_used_by_assistant_vector_stores(self):
+    return self.merge_vector_store_files([vector_store_id for vector_store_id in self.get_all_assistant_vector_store_ids() if vector_store_id in self.vector_stores_by_id])
+
+  # Returns global files that are not used (status other than 'failed' or 'cancelled') by any vector store. Optionally filtered by purpose.
+  def get_files_not_used_by_vector_stores(self, purpose=None):
+    used_file_ids = {f.id for f in self.get_all_files_used_by_vector_stores()}
+    return [f for f in self.files if f.id not in used_file_ids and (purpose is None or getattr(f, 'purpose', None) == purpose)]
+
+  # Returns global files that are not used by any vector store of any assistant
+  def get_files_not_used_by_assistants(self):
+    used_file_ids = {f.id for f in self.get_files_used_by_assistant_vector_stores()}
+    return [f for f in self.files if f.id not in used_file_ids]
+
+  # Returns vector stores not used by any assistant, optionally only those created until until_date_created
+  def get_vector_stores_not_used_by_assistants(self, until_date_created=None):
+    assistant_vector_store_ids = set(self.get_all_assistant_vector_store_ids())
+    vector_stores = [vs for vs in self.vector_stores if vs.id not in assistant_vector_store_ids]
+    if until_date_created: vector_stores = [vs for vs in vector_stores if datetime.datetime.fromtimestamp(vs.created_at) <= until_date_created]
+    return vector_stores
+
+# ----------------------------------------------------- END: Tenant inventory -------------------------------------------------
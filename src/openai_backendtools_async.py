@@ -0,0 +1,469 @@
+import os
+import asyncio
+import datetime
+import time
+from azure.identity.aio import DefaultAzureCredential, get_bearer_token_provider
+import openai
+from openai_backendtools import BULK_DELETE_KINDS, DEFAULT_KNOWN_BROKEN_VECTOR_STORES_PATH, DEFAULT_RETRY_POLICY, PAGINATION_MAX_LIMIT, PAGINATION_MAX_LIMIT_FILES, AdaptiveConcurrencyLimiter, BulkDeleteResult, DeleteResult, PaginationStats, format_timestamp, get_assistant_vector_store_id, get_bulk_delete_label, get_error_headers, get_vector_store_file_key, invalidate_vector_store_cache, is_rate_limit_error, iterate_all_vector_stores, log_function_footer, log_function_header, merge_vector_store_file_memberships
+
+# Asynchronous twin of openai_backendtools.py built on AsyncOpenAI / AsyncAzureOpenAI.
+# All functions have the same semantics as their synchronous counterparts (suffix '_async'), but issue independent
+# HTTP calls concurrently. The number of requests in flight is capped by 'max_concurrency'.
+
+DEFAULT_MAX_CONCURRENCY = 20
+
+# ----------------------------------------------------- START: Utilities ------------------------------------------------------
+
+def create_async_openai_client():
+  api_key = os.environ.get('OPENAI_API_KEY')
+  return openai.AsyncOpenAI(api_key=api_key)
+
+# Create an async Azure OpenAI client using either managed identity or API key authentication.
+def create_async_azure_openai_client(use_key_authentication=False):
+  endpoint = os.environ.get('AZURE_OPENAI_ENDPOINT')
+  api_version = os.environ.get('AZURE_OPENAI_API_VERSION')
+
+  if use_key_authentication:
+    api_key = os.environ.get('AZURE_OPENAI_API_KEY')
+    return openai.AsyncAzureOpenAI(api_version=api_version, azure_endpoint=endpoint, api_key=api_key)
+  else:
+    # Use managed identity or service principal authentication (whatever is configured in the environment variables)
+    cred = DefaultAzureCredential()
+    token_provider = get_bearer_token_provider(cred, "https://cognitiveservices.azure.com/.default")
+    return openai.AsyncAzureOpenAI(api_version=api_version, azure_endpoint=endpoint, azure_ad_token_provider=token_provider)
+
+# Runs coroutine_function(item) for all items with at most max_concurrency coroutines in flight.
+# Returns results in the order of items. Exceptions are returned as results and not raised.
+async def run_with_concurrency_limit(items, coroutine_function, max_concurrency=DEFAULT_MAX_CONCURRENCY):
+  semaphore = asyncio.Semaphore(max(1, max_concurrency))
+  async def run_one(item):
+    async with semaphore: return await coroutine_function(item)
+  return await asyncio.gather(*[run_one(item) for item in items], return_exceptions=True)
+
+# Synchronous view of an async client for code that must run in a worker thread, e.g. iterate_all_vector_stores().
+# Every call is run as coroutine on the event loop 'loop' and waited for, so the loop must not be blocked by the caller.
+# Only the methods used by iterate_all_vector_stores() are provided: vector_stores.list() and vector_stores.retrieve().
+class SyncVectorStoresView:
+  def __init__(self, async_client, loop):
+    self.async_client = async_client
+    self.loop = loop
+
+  def call(self, function, *args, **kwargs):
+    async def run(): return await function(*args, **kwargs)
+    return asyncio.run_coroutine_threadsafe(run(), self.loop).result()
+
+  def list(self, **params): return self.call(self.async_client.vector_stores.list, **params)
+
+  def retrieve(self, vector_store_id): return self.call(self.async_client.vector_stores.retrieve, vector_store_id)
+
+class SyncClientView:
+  def __init__(self, async_client, loop):
+    self.base_url = async_client.base_url
+    self.vector_stores = SyncVectorStoresView(async_client, loop)
+
+# ----------------------------------------------------- END: Utilities --------------------------------------------------------
+
+# ----------------------------------------------------- START: Pagination -----------------------------------------------------
+
+# Async generator over all items of a cursor-paginated list endpoint. See iterate_paginated_items() in openai_backendtools.py.
+async def iterate_paginated_items_async(list_function, limit=PAGINATION_MAX_LIMIT, stats=None, **list_params):
+  if stats is None: stats = PaginationStats()
+  if limit: list_params['limit'] = limit
+  async def fetch_page(**params): return await list_function(**params)
+
+  stats.start_time = time.perf_counter(); stats.end_time = 0.0
+  next_page_task = None
+  try:
+    page = await fetch_page(**list_params)
+    while True:
+      stats.pages += 1
+      page_items = list(getattr(page, 'data', None) or [])
+      has_more = hasattr(page, 'has_more') and page.has_more
+      last_id = getattr(page_items[-1], 'id', None) if page_items else None
+      # Prefetch next page before handing out the items of the current page
+      next_page_task = asyncio.create_task(fetch_page(after=last_id, **list_params)) if (has_more and last_id) else None
+      for item in page_items:
+        stats.items += 1
+        yield item
+      if not next_page_task: break
+      page = await next_page_task
+      next_page_task = None
+  finally:
+    if next_page_task and not next_page_task.done(): next_page_task.cancel()
+    stats.end_time = time.perf_counter()
+
+async def get_all_paginated_items_async(list_function, limit=PAGINATION_MAX_LIMIT, stats=None, **list_params):
+  return [item async for item in iterate_paginated_items_async(list_function, limit=limit, stats=stats, **list_params)]
+
+# ----------------------------------------------------- END: Pagination -------------------------------------------------------
+
+# ----------------------------------------------------- START: Listings -------------------------------------------------------
+
+# Adds a zero-based 'index' attribute to each file.
+async def get_all_files_async(client, stats=None):
+  all_files = await get_all_paginated_items_async(client.files.list, limit=PAGINATION_MAX_LIMIT_FILES, stats=stats)
+  for idx, file in enumerate(all_files): setattr(file, 'index', idx)
+  return all_files
+
+# Adds a zero-based 'index' and the 'vector_store_id' attribute to each assistant.
+async def get_all_assistants_async(client, stats=None):
+  all_assistants = await get_all_paginated_items_async(client.beta.assistants.list, stats=stats)
+  for idx, assistant in enumerate(all_assistants):
+    setattr(assistant, 'index', idx)
+    setattr(assistant, 'vector_store_id', get_assistant_vector_store_id(client, assistant))
+  return all_assistants
+
+async def get_all_assistant_vector_store_ids_async(client):
+  all_assistants = await get_all_assistants_async(client)
+  return [a.vector_store_id for a in all_assistants]
+
+# Adds a zero-based 'index' attribute to each eval.
+async def get_all_evals_async(client, stats=None):
+  all_evals = await get_all_paginated_items_async(client.evals.list, stats=stats)
+  for idx, eval in enumerate(all_evals): setattr(eval, 'index', idx)
+  return all_evals
+
+# Adds a zero-based 'index' attribute to each vector store.
+# Same result as get_all_vector_stores(): runs the 404-resilient iterate_all_vector_stores() in a worker thread, with its
+# requests sent through this client. A truncated listing would make files of the missing vector stores look unused.
+async def get_all_vector_stores_async(client, include_broken_ones: bool = False, known_broken_vector_stores_path=DEFAULT_KNOWN_BROKEN_VECTOR_STORES_PATH, stats=None):
+  sync_client = SyncClientView(client, asyncio.get_running_loop())
+  try:
+    all_vector_stores = await asyncio.to_thread(lambda: list(iterate_all_vector_stores(sync_client, include_broken_ones, known_broken_vector_stores_path, stats=stats)))
+  except openai.InternalServerError:
+    # Azure backends may return 500 when vector stores aren't supported
+    return []
+  for idx, vector_store in enumerate(all_vector_stores): setattr(vector_store, 'index', idx)
+  return all_vector_stores
+
+async def get_vector_store_files_async(client, vector_store, stats=None):
+  vector_store_id = vector_store if isinstance(vector_store, str) else getattr(vector_store, 'id', None)
+  vector_store_name = None if isinstance(vector_store, str) else getattr(vector_store, 'name', None)
+  if not vector_store_id or vector_store_id == "[UNKNOWN]": return []
+
+  all_files = await get_all_paginated_items_async(client.vector_stores.files.list, stats=stats, vector_store_id=vector_store_id)
+  for idx, file in enumerate(all_files):
+    setattr(file, 'index', idx)
+    setattr(file, 'vector_store_id', vector_store_id)
+    setattr(file, 'vector_store_name', vector_store_name)
+  return all_files
+
+# Lists the files of all given vector stores concurrently. Returns a list of file lists in the order of vector_stores.
+# Like get_files_of_vector_stores(), the first error is raised after all listings have finished, because an
+# incomplete listing would make files look unused to the cleanup functions.
+async def get_files_of_vector_stores_async(client, vector_stores, max_concurrency=DEFAULT_MAX_CONCURRENCY):
+  results = await run_with_concurrency_limit(vector_stores, lambda vs: get_vector_store_files_async(client, vs), max_concurrency)
+  failed = [(vector_store, result) for vector_store, result in zip(vector_stores, results) if isinstance(result, Exception)]
+  for vector_store, result in failed:
+    print(f"  ERROR: Failed to list files of vector store ID={getattr(vector_store, 'id', vector_store)} -> {result}")
+  if failed: raise failed[0][1]
+  return list(results)
+
+# Same result as get_all_files_used_by_vector_stores(), with all vector stores listed concurrently.
+async def get_all_files_used_by_vector_stores_async(client, max_concurrency=DEFAULT_MAX_CONCURRENCY):
+  all_vector_stores = await get_all_vector_stores_async(client)
+  files_per_vector_store = await get_files_of_vector_stores_async(client, all_vector_stores, max_concurrency)
+
+  return merge_vector_store_file_memberships(zip(all_vector_stores, files_per_vector_store))
+
+# ----------------------------------------------------- END: Listings ---------------------------------------------------------
+
+# ----------------------------------------------------- START: Deletions ------------------------------------------------------
+
+# Async counterpart of AdaptiveConcurrencyLimiter for coroutines on one event loop: same AIMD limit and rate limit pauses,
+# but waiting coroutines sleep on an asyncio.Event (set on every release) instead of blocking the loop.
+class AsyncAdaptiveConcurrencyLimiter(AdaptiveConcurrencyLimiter):
+  def __init__(self, max_concurrency=DEFAULT_MAX_CONCURRENCY, **kwargs):
+    super().__init__(max_concurrency, **kwargs)
+    self.released = asyncio.Event()
+
+  async def acquire(self):
+    while True:
+      wait_seconds = self.paused_until - time.monotonic()
+      if wait_seconds <= 0 and self.in_flight < int(self.limit):
+        self.in_flight += 1
+        return
+      self.released.clear()
+      try: await asyncio.wait_for(self.released.wait(), timeout=wait_seconds if wait_seconds > 0 else None)
+      except asyncio.TimeoutError: pass
+
+  def release_success(self, headers=None):
+    super().release_success(headers); self.released.set()
+
+  def release_rate_limited(self, headers=None):
+    super().release_rate_limited(headers); self.released.set()
+
+  def release_error(self):
+    super().release_error(); self.released.set()
+
+# Async version of call_with_response_headers(). Returns (result, headers).
+async def call_with_response_headers_async(resource, method_name, *args, **kwargs):
+  raw_resource = getattr(resource, 'with_raw_response', None)
+  if raw_resource is None: return await getattr(resource, method_name)(*args, **kwargs), {}
+  response = await getattr(raw_resource, method_name)(*args, **kwargs)
+  return response.parse(), response.headers
+
+# Deletes one object and returns the response headers (async version of delete_object())
+async def delete_object_async(client, kind, key):
+  if kind == 'file': _, headers = await call_with_response_headers_async(client.files, 'delete', key)
+  elif kind == 'vector_store_file':
+    vector_store_id, file_id = key.split('/', 1)
+    _, headers = await call_with_response_headers_async(client.vector_stores.files, 'delete', file_id=file_id, vector_store_id=vector_store_id)
+  elif kind == 'vector_store':
+    _, headers = await call_with_response_headers_async(client.vector_stores, 'delete', key)
+    invalidate_vector_store_cache(client, key)
+  elif kind == 'assistant': _, headers = await call_with_response_headers_async(client.beta.assistants, 'delete', key)
+  elif kind == 'eval': _, headers = await call_with_response_headers_async(client.evals, 'delete', key)
+  else: raise ValueError(f"Invalid kind '{kind}'. Must be one of: {', '.join(BULK_DELETE_KINDS)}")
+  return headers
+
+async def bulk_delete_async(client, kind, keys, labels=None, max_concurrency=DEFAULT_MAX_CONCURRENCY, dry_run=False, retry_policy=None, indentation=2):
+  """
+  Async version of bulk_delete(): deletes many objects of one kind concurrently with rate-limit-aware concurrency
+  (see AsyncAdaptiveConcurrencyLimiter). Transient errors are retried, only 404 Not Found counts as already deleted.
+  Has no journal. Use bulk_delete() with 'journal_path' for deletions that must be resumable.
+
+  Args:
+    client: AsyncOpenAI / AsyncAzureOpenAI client
+    kind: 'file', 'vector_store_file', 'vector_store', 'assistant' or 'eval'
+    keys: Object IDs. For 'vector_store_file' use get_vector_store_file_key(vector_store_id, file_id). Duplicates are removed.
+    labels: Optional dictionary key -> text shown in the log instead of the ID
+    max_concurrency: Maximum number of deletions in flight
+    dry_run: Only log what would be deleted
+    retry_policy: RetryPolicy for transient errors (default: DEFAULT_RETRY_POLICY). Rate limit waits are handled by the limiter.
+
+  Returns:
+    BulkDeleteResult with one DeleteResult per unique key, in the order of keys
+
+  Example:
+    result = await bulk_delete_async(client, 'file', [f.id for f in files], max_concurrency=50)
+    print(result)  # -> 297 deleted, 3 not found in 9 secs (33.0 items/sec, 12 rate limited, throttled 4 secs)
+  """
+  if kind not in BULK_DELETE_KINDS: raise ValueError(f"Invalid kind '{kind}'. Must be one of: {', '.join(BULK_DELETE_KINDS)}")
+  keys = list(dict.fromkeys([k for k in keys if k]))
+  labels = labels or {}
+  indent = ' ' * indentation
+  start_time = time.perf_counter()
+  limiter = AsyncAdaptiveConcurrencyLimiter(max_concurrency)
+  retry_policy = retry_policy or DEFAULT_RETRY_POLICY
+  counter = {'count': 0}
+
+  def log_result(result):
+    counter['count'] += 1
+    label = labels.get(result.key) or get_bulk_delete_label(kind, result.key)
+    if result.status == 'deleted': print(f"{indent}[ {counter['count']} / {len(keys)} ] Deleted {label}.")
+    elif result.status == 'not_found': print(f"{indent}[ {counter['count']} / {len(keys)} ] {label} not found. Probably already deleted.")
+    elif result.status == 'dry_run': print(f"{indent}[ {counter['count']} / {len(keys)} ] Deleting {label}... (dry run)")
+    else: print(f"{indent}[ {counter['count']} / {len(keys)} ] WARNING: Failed to delete {label} -> {result.error}")
+
+  async def delete_one(key):
+    attempts = 0
+    while True:
+      attempts += 1
+      await limiter.acquire()
+      released = False
+      try:
+        headers = await delete_object_async(client, kind, key)
+        limiter.release_success(headers); released = True
+        result = DeleteResult(key, 'deleted', None, attempts)
+      except openai.NotFoundError as e:
+        limiter.release_success(get_error_headers(e)); released = True
+        result = DeleteResult(key, 'not_found', None, attempts)
+      except Exception as e:
+        if is_rate_limit_error(e): limiter.release_rate_limited(get_error_headers(e))
+        else: limiter.release_error()
+        released = True
+        delay_seconds = retry_policy.get_retry_delay_seconds(attempts + 1, e)
+        if delay_seconds is not None:
+          # Rate limit errors wait in limiter.acquire() until the rate limit resets
+          if not is_rate_limit_error(e): await asyncio.sleep(delay_seconds)
+          continue
+        result = DeleteResult(key, 'failed', str(e), attempts)
+      finally:
+        if not released: limiter.release_error()
+      log_result(result)
+      return result
+
+  if dry_run:
+    results = [DeleteResult(key, 'dry_run') for key in keys]
+    for result in results: log_result(result)
+  else:
+    results = await asyncio.gather(*[delete_one(key) for key in keys])
+
+  return BulkDeleteResult(kind, list(results), time.perf_counter() - start_time, limiter.rate_limited_count, limiter.throttled_seconds)
+
+# Deletes a list of files concurrently (see bulk_delete_async). Returns a BulkDeleteResult.
+async def delete_files_async(client, files, max_concurrency=DEFAULT_MAX_CONCURRENCY):
+  file_ids = [getattr(file, 'id', None) for file in files]
+  labels = {f.id: f"file ID={f.id} '{f.filename}'" for f in files if getattr(f, 'id', None) and getattr(f, 'filename', None)}
+  return await bulk_delete_async(client, 'file', file_ids, labels, max_concurrency)
+
+# Deletes a list of file IDs concurrently (see bulk_delete_async). Returns a BulkDeleteResult.
+async def delete_file_ids_async(client, file_ids, max_concurrency=DEFAULT_MAX_CONCURRENCY):
+  return await bulk_delete_async(client, 'file', file_ids, None, max_concurrency)
+
+# Removes (vector_store_id, file_id) pairs from vector stores concurrently. Files are not deleted from global storage.
+# Returns a BulkDeleteResult with keys from get_vector_store_file_key(vector_store_id, file_id).
+async def delete_vector_store_files_async(client, vector_store_file_pairs, max_concurrency=DEFAULT_MAX_CONCURRENCY):
+  keys = [get_vector_store_file_key(vector_store_id, file_id) for vector_store_id, file_id in vector_store_file_pairs]
+  return await bulk_delete_async(client, 'vector_store_file', keys, None, max_concurrency)
+
+# Deletes a list of vector stores concurrently (see bulk_delete_async). Returns a BulkDeleteResult.
+async def delete_vector_stores_async(client, vector_stores, max_concurrency=DEFAULT_MAX_CONCURRENCY):
+  labels = {vs.id: f"vector store ID={vs.id} '{vs.name}' ({format_timestamp(vs.created_at)})" for vs in vector_stores if getattr(vs, 'id', None)}
+  return await bulk_delete_async(client, 'vector_store', list(labels), labels, max_concurrency)
+
+# ----------------------------------------------------- END: Deletions --------------------------------------------------------
+
+# ----------------------------------------------------- START: Cleanup --------------------------------------------------------
+
+# deletes all files with status = 'failed', 'cancelled' and all files with purpose = 'assistants' that are not used by any vector store
+async def delete_failed_and_unused_files_async(client, dry_run=False, max_concurrency=DEFAULT_MAX_CONCURRENCY):
+  function_name = 'Delete failed and unused files (async)'
+  start_time = log_function_header(function_name)
+
+  print(f"  Loading all files and files used by vector stores...")
+  all_files_list, files_used_by_vector_stores_list = await asyncio.gather(get_all_files_async(client), get_all_files_used_by_vector_stores_async(client, max_concurrency))
+  files_used_by_vector_stores = {f.id for f in files_used_by_vector_stores_list}
+
+  files_to_delete = [f for f in all_files_list if f.status in ['failed', 'cancelled']]
+  files_to_delete.extend([f for f in all_files_list if f.purpose == 'assistants' and f.status not in ['failed', 'cancelled'] and f.id not in files_used_by_vector_stores])
+
+  print(f"  {len(files_to_delete)} file{'s' if len(files_to_delete) != 1 else ''} to delete.")
+  if dry_run:
+    for i, file in enumerate(files_to_delete, 1): print(f"    [ {i} / {len(files_to_delete)} ] Deleting file '{file.filename}' (ID={file.id}, {format_timestamp(file.created_at)})...")
+    deleted_file_ids = []
+  else:
+    result = await delete_files_async(client, files_to_delete, max_concurrency)
+    print(f"  {result}")
+    deleted_file_ids = result.deleted_keys
+
+  log_function_footer(function_name, start_time)
+  return deleted_file_ids
+
+# Delete duplicate files in vector stores, keeping only the file with the latest upload time
+async def delete_duplicate_files_in_vector_stores_async(client, dry_run=False, max_concurrency=DEFAULT_MAX_CONCURRENCY):
+  function_name = 'Delete duplicate files in vector stores (async)'
+  start_time = log_function_header(function_name)
+
+  print(f"  Loading all files and vector stores...")
+  all_files_list, vector_stores = await asyncio.gather(get_all_files_async(client), get_all_vector_stores_async(client))
+  all_files = {f.id: f for f in all_files_list}
+
+  print(f"  Loading files of {len(vector_stores)} vector store{'s' if len(vector_stores) != 1 else ''}...")
+  files_per_vector_store = await get_files_of_vector_stores_async(client, vector_stores, max_concurrency)
+
+  duplicate_pairs = []
+  for vs, files in zip(vector_stores, files_per_vector_store):
+    # Sort files so newest files are on top
+    files.sort(key=lambda f: f.created_at, reverse=True)
+    files_by_filename = {}
+    for f in files:
+      # Files added after all_files was loaded have no filename yet and are never treated as duplicates
+      filename = all_files[f.id].filename if f.id in all_files else f.id
+      files_by_filename.setdefault(filename, []).append(f)
+    for filename, files_with_same_name in files_by_filename.items():
+      for file in files_with_same_name[1:]:
+        print(f"    Deleting duplicate file ID={file.id} '{filename}' ({format_timestamp(file.created_at)}) in vector store '{vs.name}'...")
+        duplicate_pairs.append((vs.id, file.id))
+
+  removed_pairs = []
+  if not dry_run:
+    result = await delete_vector_store_files_async(client, duplicate_pairs, max_concurrency)
+    print(f"  {result}")
+    removed_pairs = [tuple(key.split('/', 1)) for key in result.deleted_keys]
+
+  log_function_footer(function_name, start_time)
+  return removed_pairs
+
+async def delete_vector_stores_not_used_by_assistants_async(client, until_date_created, dry_run=False, max_concurrency=DEFAULT_MAX_CONCURRENCY):
+  function_name = 'Delete vector stores not used by assistants (async)'
+  start_time = log_function_header(function_name)
+
+  all_vector_stores, all_assistant_vector_store_ids = await asyncio.gather(get_all_vector_stores_async(client), get_all_assistant_vector_store_ids_async(client))
+  all_assistant_vector_store_ids = set(all_assistant_vector_store_ids)
+  vector_stores_not_used_by_assistants = [vs for vs in all_vector_stores if vs.id not in all_assistant_vector_store_ids and datetime.datetime.fromtimestamp(vs.created_at) <= until_date_created]
+
+  print(f"  {len(vector_stores_not_used_by_assistants)} vector store{'s' if len(vector_stores_not_used_by_assistants) != 1 else ''} to delete.")
+  if dry_run:
+    for vs in vector_stores_not_used_by_assistants: print(f"  Deleting vector store ID={vs.id} '{vs.name}' ({format_timestamp(vs.created_at)})...")
+    deleted_vector_store_ids = []
+  else:
+    result = await delete_vector_stores_async(client, vector_stores_not_used_by_assistants, max_concurrency)
+    print(f"  {result}")
+    deleted_vector_store_ids = result.deleted_keys
+
+  log_function_footer(function_name, start_time)
+  return deleted_vector_store_ids
+
+# ----------------------------------------------------- END: Cleanup ----------------------------------------------------------
+
+# ----------------------------------------------------- START: Replication ----------------------------------------------------
+
+# Async version of replicate_vector_store_content(). Source and target vector stores are listed concurrently and
+# files are added to / removed from all target vector stores concurrently.
+# Returns: Tuple of (added_file_ids, removed_file_ids, errors) with one list per target vector store (same as the sync version)
+async def replicate_vector_store_content_async(client, source_vector_store_ids, target_vector_store_ids, remove_target_files_not_in_sources=False, max_concurrency=DEFAULT_MAX_CONCURRENCY):
+  function_name = 'Replicate vector store content (async)'
+  start_time = log_function_header(function_name)
+
+  if isinstance(source_vector_store_ids, str): source_vector_store_ids = [source_vector_store_ids]
+  if isinstance(target_vector_store_ids, str): target_vector_store_ids = [target_vector_store_ids]
+
+  async def retrieve_vector_store(vector_store_id): return await client.vector_stores.retrieve(vector_store_id)
+  all_vector_store_ids = list(source_vector_store_ids) + list(target_vector_store_ids)
+  retrieved = await run_with_concurrency_limit(all_vector_store_ids, retrieve_vector_store, max_concurrency)
+  vector_stores_by_id = {vs_id: vs for vs_id, vs in zip(all_vector_store_ids, retrieved) if not isinstance(vs, Exception)}
+
+  source_vector_stores = []
+  for source_vs_id in source_vector_store_ids:
+    if source_vs_id not in vector_stores_by_id: print(f"  WARNING: Source vector store ID={source_vs_id} not found, skipping..."); continue
+    source_vector_stores.append(vector_stores_by_id[source_vs_id])
+  target_vector_stores = [vector_stores_by_id.get(target_vs_id) for target_vs_id in target_vector_store_ids]
+
+  print(f"  Loading files from {len(source_vector_stores)} source and {len(target_vector_stores)} target vector stores...")
+  files_per_vector_store = await get_files_of_vector_stores_async(client, source_vector_stores + [vs for vs in target_vector_stores if vs], max_concurrency)
+  source_files_per_vector_store = files_per_vector_store[:len(source_vector_stores)]
+  target_files_iterator = iter(files_per_vector_store[len(source_vector_stores):])
+
+  # Keep the first source vector store in which a file was found
+  collected_source_vector_stores_by_file_id = {}
+  for source_vs, source_files in zip(source_vector_stores, source_files_per_vector_store):
+    for f in source_files: collected_source_vector_stores_by_file_id.setdefault(f.id, source_vs)
+
+  added_file_ids = []; removed_file_ids = []; errors = []
+  operations = []  # (target_index, 'add' | 'remove', target_vs, file_id, source_vs)
+  for i, (target_vs_id, target_vs) in enumerate(zip(target_vector_store_ids, target_vector_stores)):
+    added_file_ids.append([]); removed_file_ids.append([]); errors.append([])
+    if not target_vs: print(f"  WARNING: Target vector store ID={target_vs_id} not found, skipping..."); continue
+    target_file_ids = {f.id for f in next(target_files_iterator)}
+    file_ids_missing_in_target_vs = [file_id for file_id in collected_source_vector_stores_by_file_id if file_id not in target_file_ids]
+    file_ids_not_in_sources = [file_id for file_id in target_file_ids if file_id not in collected_source_vector_stores_by_file_id] if remove_target_files_not_in_sources else []
+    print(f"  [ {i+1} / {len(target_vector_store_ids)} ] Target vector store '{target_vs.name}' (ID={target_vs_id}): {len(file_ids_missing_in_target_vs)} files to add, {len(file_ids_not_in_sources)} to remove.")
+    for file_id in file_ids_missing_in_target_vs: operations.append((i, 'add', target_vs, file_id, collected_source_vector_stores_by_file_id[file_id]))
+    for file_id in file_ids_not_in_sources: operations.append((i, 'remove', target_vs, file_id, None))
+
+  async def run_operation(operation):
+    i, action, target_vs, file_id, source_vs = operation
+    try:
+      if action == 'add':
+        await client.vector_stores.files.create(vector_store_id=target_vs.id, file_id=file_id)
+        added_file_ids[i].append((file_id, source_vs))
+      else:
+        await client.vector_stores.files.delete(vector_store_id=target_vs.id, file_id=file_id)
+        removed_file_ids[i].append(file_id)
+    except Exception as e:
+      if action == 'add':
+        source_vs_name = getattr(source_vs, 'name', source_vs.id)
+        print(f"    WARNING: Failed to add file ID={file_id} from '{source_vs_name}' to '{target_vs.name}' -> {str(e)}")
+        errors[i].append((file_id, f"FAILED: Add file ID='{file_id}' from '{source_vs_name}' to vector store '{target_vs.name}': {str(e)}"))
+      else:
+        print(f"    WARNING: Failed to remove file ID={file_id} from '{target_vs.name}' -> {str(e)}")
+        errors[i].append((file_id, f"FAILED: Remove file ID='{file_id}' from vector store '{target_vs.name}': {str(e)}"))
+
+  await run_with_concurrency_limit(operations, run_operation, max_concurrency)
+
+  log_function_footer(function_name, start_time)
+  return (added_file_ids, removed_file_ids, errors)
+
+# ----------------------------------------------------- END: Replication ------------------------------------------------------
@@ -25,6 +25,16 @@ if __name__ == '__main__':
   # -------------------------------------------------------------------------------------------------
   # delete_failed_and_unused_files(client, dry_run=True)
 
+  # Plan first, review the saved plan, then apply it. Re-running with the same journal skips what was already deleted.
+  # -------------------------------------------------------------------------------------------------
+  # plan = plan_delete_failed_and_unused_files(client)
+  # plan.save("./cleanup_plan.jsonl"); print(plan)
+  # execute_deletion_plan(client, "./cleanup_plan.jsonl", journal_path="./cleanup_journal.jsonl")
+
+  # All cleanups above in one pass: lists the tenant once, deletes vector stores before the files they used and reports bytes freed.
+  # -------------------------------------------------------------------------------------------------
+  # collect_tenant_garbage(client, until_date_created=datetime.datetime.now() - datetime.timedelta(days=10), dry_run=True)
+
   # Run this after you have created a vector store and want to remove failed and cancelled files
   # -------------------------------------------------------------------------------------------------
   # delete_failed_vector_store_files(client,"vs_67b0ca3da1fc819186fc791943fce1a3", dry_run=True)
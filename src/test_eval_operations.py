@@ -496,7 +496,8 @@ def get_answers_from_model_and_return_items(client, vector_store_id, model, item
     # This function also handles adding reasoning configuration (effort)
     remove_temperature_from_request_params_for_reasoning_models(request_params, model, reasoning_effort)
     
-    response = retry_on_openai_errors(lambda: client.responses.create(**request_params), indentation=4)
+    estimated_tokens = estimate_request_tokens((instructions or '') + input)
+    response = retry_on_openai_errors(lambda: call_with_rate_limit(client, model, estimated_tokens, lambda: client.responses.create(**request_params)), indentation=4)
     output_text = response.output_text
     print(f"    Response: {truncate_string(remove_linebreaks(output_text),80)}")
     item['item']['output_text'] = output_text
@@ -669,10 +670,10 @@ def score_answers_using_cosine_similarity_and_return_items(client, items, embedd
     return float(np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b)))
 
   def embed_text(text):
-    response = retry_on_openai_errors(lambda: client.embeddings.create(
+    response = retry_on_openai_errors(lambda: call_with_rate_limit(client, embedding_model, estimate_request_tokens(text, 0), lambda: client.embeddings.create(
       model=embedding_model,
       input=[text]
-    ), indentation=4)
+    )), indentation=4)
     return response.data[0].embedding
 
   for idx, item in enumerate(items_copy, 1):
@@ -745,7 +746,8 @@ def score_answers_using_judge_model_and_return_items(client, items, prompt_templ
     # Remove temperature parameter for reasoning models that don't support it
     remove_temperature_from_request_params_for_reasoning_models(request_params, judge_model_name)
     
-    response = retry_on_openai_errors(lambda: client.responses.create(**request_params), indentation=4)
+    estimated_tokens = estimate_request_tokens(prompt)
+    response = retry_on_openai_errors(lambda: call_with_rate_limit(client, judge_model_name, estimated_tokens, lambda: client.responses.create(**request_params)), indentation=4)
     
     # Parse the JSON response
     try:
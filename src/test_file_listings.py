@@ -14,8 +14,9 @@ def truncate_list_if_too_long(lines):
   return lines
 
 # Display all files with top row showing total count and metrics
-def list_all_files(client):
-  all_files = get_all_files(client)
+# All list_* functions answer from the TenantInventory if given, otherwise they query the API
+def list_all_files(client, inventory=None):
+  all_files = inventory.files if inventory else get_all_files(client)
   # Get file metrics
   metrics = get_filelist_metrics(all_files)
   metrics_str = ", ".join([f"{v} {k}" for k, v in metrics.items()])
@@ -27,8 +28,15 @@ def list_all_files(client):
   print("\n")
   return all_files
 
-def list_vector_store_files_with_filenames(client, vector_store_id):
-  vector_store_files = get_vector_store_files_with_filenames(client, vector_store_id)
+def list_vector_store_files_with_filenames(client, vector_store_id, inventory=None):
+  if inventory:
+    vector_store_files = inventory.get_vector_store_files(vector_store_id)
+    for vs_file in vector_store_files:
+      global_file = inventory.get_file(vs_file.id)
+      if not global_file: continue
+      setattr(vs_file, 'filename', global_file.filename); setattr(vs_file, 'bytes', global_file.bytes); setattr(vs_file, 'purpose', global_file.purpose)
+  else:
+    vector_store_files = get_vector_store_files_with_filenames(client, vector_store_id)
   print(f"Total files in vector store '{vector_store_id}': {len(vector_store_files)}")
   print("-"*140)
   print(format_files_table(truncate_list_if_too_long(vector_store_files)))
@@ -36,8 +44,8 @@ def list_vector_store_files_with_filenames(client, vector_store_id):
   return vector_store_files
 
 # Display the vector stores with top row showing total count and expired count
-def list_vector_stores(client, include_broken_ones: bool= False):
-  all_vector_stores = get_all_vector_stores(client,include_broken_ones)
+def list_vector_stores(client, include_broken_ones: bool= False, inventory=None):
+  all_vector_stores = inventory.vector_stores if inventory else get_all_vector_stores(client,include_broken_ones)
   all_vector_stores_expired = [v for v in all_vector_stores if getattr(v, 'status', None) == 'expired']
   total_usage_bytes = sum([vs.usage_bytes for vs in all_vector_stores if hasattr(vs, 'usage_bytes')])
   print(f"Total vector stores: {len(all_vector_stores)} ({len(all_vector_stores_expired)} expired, {format_filesize(total_usage_bytes)} total storage)")
@@ -47,8 +55,8 @@ def list_vector_stores(client, include_broken_ones: bool= False):
   return all_vector_stores
   
 # Display the files used by vector stores with top row showing total count and metrics
-def list_files_used_by_vector_stores(client):
-  files_used_by_vector_stores = get_all_files_used_by_vector_stores(client)
+def list_files_used_by_vector_stores(client, inventory=None):
+  files_used_by_vector_stores = inventory.get_all_files_used_by_vector_stores() if inventory else get_all_files_used_by_vector_stores(client)
   metrics = get_filelist_metrics(files_used_by_vector_stores)
   metrics_str = ", ".join([f"{v} {k}" for k, v in metrics.items()])
   print(f"Total files in vector stores: {len(files_used_by_vector_stores)} ({metrics_str})")
@@ -58,8 +66,8 @@ def list_files_used_by_vector_stores(client):
   return files_used_by_vector_stores
 
 # Display the assistants with top row showing total count
-def list_assistants(client): 
-  all_assistants = get_all_assistants(client)
+def list_assistants(client, inventory=None): 
+  all_assistants = inventory.assistants if inventory else get_all_assistants(client)
   print(f"Total assistants: {len(all_assistants)}")
   print("-"*140)
   print(format_assistants_table(truncate_list_if_too_long(all_assistants)))
@@ -67,11 +75,14 @@ def list_assistants(client):
   return all_assistants
 
 # Display the files not used by vector stores with top row showing total count
-def list_files_not_used_by_vector_stores(client, all_files):
-  if not all_files: all_files = get_all_files(client)
-  # filter out all files that do not have purpose = 'assistants' and show files not used in vector stores
-  assistant_files = [f for f in all_files if getattr(f, 'purpose', None) == 'assistants']
-  unused_vector_store_files = [f for f in all_files if f.id not in [file.id for file in assistant_files]]
+def list_files_not_used_by_vector_stores(client, all_files, inventory=None):
+  if inventory:
+    unused_vector_store_files = inventory.get_files_not_used_by_vector_stores()
+  else:
+    if not all_files: all_files = get_all_files(client)
+    # filter out all files that do not have purpose = 'assistants' and show files not used in vector stores
+    assistant_files = [f for f in all_files if getattr(f, 'purpose', None) == 'assistants']
+    unused_vector_store_files = [f for f in all_files if f.id not in [file.id for file in assistant_files]]
   print(f"Total files NOT used in vector stores: {len(unused_vector_store_files)}")
   print("-"*140)
   print(format_files_table(truncate_list_if_too_long(unused_vector_store_files)))
@@ -79,8 +90,8 @@ def list_files_not_used_by_vector_stores(client, all_files):
   return unused_vector_store_files
 
 # Display the files used by assistants with top row showing total count
-def list_files_used_by_assistants(client):
-  files_used_by_assistant_vector_stores = get_files_used_by_assistant_vector_stores(client)
+def list_files_used_by_assistants(client, inventory=None):
+  files_used_by_assistant_vector_stores = inventory.get_files_used_by_assistant_vector_stores() if inventory else get_files_used_by_assistant_vector_stores(client)
   metrics = get_filelist_metrics(files_used_by_assistant_vector_stores)
   metrics_str = ", ".join([f"{v} {k}" for k, v in metrics.items()])
   print(f"Total files used by assistants: {len(files_used_by_assistant_vector_stores)} ({metrics_str})")
@@ -90,9 +101,12 @@ def list_files_used_by_assistants(client):
   return files_used_by_assistant_vector_stores
 
 # Display the files not used by assistants with top row showing total count
-def list_files_not_used_by_assistants(client, files_used_by_vector_stores):
-  if not files_used_by_vector_stores: files_used_by_vector_stores = get_all_files_used_by_vector_stores(client)
-  files_not_used_by_assistants = [f for f in all_files if f.id not in files_used_by_vector_stores]
+def list_files_not_used_by_assistants(client, files_used_by_vector_stores, inventory=None):
+  if inventory:
+    files_not_used_by_assistants = inventory.get_files_not_used_by_assistants()
+  else:
+    if not files_used_by_vector_stores: files_used_by_vector_stores = get_all_files_used_by_vector_stores(client)
+    files_not_used_by_assistants = [f for f in all_files if f.id not in files_used_by_vector_stores]
   metrics = get_filelist_metrics(files_not_used_by_assistants)
   metrics_str = ", ".join([f"{v} {k}" for k, v in metrics.items()])
   print(f"Total files NOT used by assistants: {len(files_not_used_by_assistants)} ({metrics_str})")
@@ -102,8 +116,8 @@ def list_files_not_used_by_assistants(client, files_used_by_vector_stores):
   return files_not_used_by_assistants
 
 # Display all evals
-def list_evals(client):
-  all_evals = get_all_evals(client)
+def list_evals(client, inventory=None):
+  all_evals = inventory.evals if inventory else get_all_evals(client)
   print(f"Evals: {len(all_evals)}")
   print("-"*140)
   print(format_evals_table(truncate_list_if_too_long(all_evals)))
@@ -122,27 +136,31 @@ if __name__ == '__main__':
   if openai_service_type == "openai": client = create_openai_client()
   elif openai_service_type == "azure_openai": client = create_azure_openai_client(azure_openai_use_key_authentication)
 
-  all_vector_stores = list_vector_stores(client, True)
+  # Load files, vector stores, vector store files, assistants and evals once. All listings below are answered from memory.
+  # Re-running the script within max_age_seconds re-uses the snapshot on disk instead of querying the API again.
+  inventory = TenantInventory.load(client, snapshot_path="./tenant_inventory_snapshot.json", max_age_seconds=600)
+
+  all_vector_stores = list_vector_stores(client, True, inventory=inventory)
   
   # Filter out vector stores with ID = "[UNKNOWN]"
   all_vector_stores = [vs for vs in all_vector_stores if vs.id != "[UNKNOWN]"] 
 
-  all_files = list_all_files(client)
+  all_files = list_all_files(client, inventory=inventory)
 
   if all_vector_stores and len(all_vector_stores) > 0:
-    list_vector_store_files_with_filenames(client, all_vector_stores[-1].id)
+    list_vector_store_files_with_filenames(client, all_vector_stores[-1].id, inventory=inventory)
   
-  all_assistants = list_assistants(client)
+  all_assistants = list_assistants(client, inventory=inventory)
 
-  files_used_by_vector_stores = list_files_used_by_vector_stores(client)
+  files_used_by_vector_stores = list_files_used_by_vector_stores(client, inventory=inventory)
 
-  list_files_not_used_by_vector_stores(client, all_files)
+  list_files_not_used_by_vector_stores(client, all_files, inventory=inventory)
 
-  files_used_by_assistants = list_files_used_by_assistants(client)
+  files_used_by_assistants = list_files_used_by_assistants(client, inventory=inventory)
 
-  list_files_not_used_by_assistants(client, files_used_by_vector_stores)
+  list_files_not_used_by_assistants(client, files_used_by_vector_stores, inventory=inventory)
 
-  all_evals = list_evals(client)
+  all_evals = list_evals(client, inventory=inventory)
 
 
 # ----------------------------------------------------- END: Main -------------------------------------------------------------
@@ -1,6 +1,8 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from dataclasses import dataclass
 from dotenv import load_dotenv
 from openai_backendtools import *
+import fnmatch
 import time
 import os
 import datetime
@@ -25,68 +27,112 @@ class VectorStoreFiles:
   files_metadata: any
   files_data: any
 
-def collect_files_from_folder_path(folder_path, include_subfolders=True, include_file_types=["*"]):
+DEFAULT_SCAN_MAX_WORKERS = 8
+
+# One file found by scan_folder_path(). __slots__ keeps 200k records small.
+class ScannedFile:
+  __slots__ = ('path', 'filename', 'file_type', 'file_size', 'modified_at')
+
+  def __init__(self, path, filename, file_type, file_size, modified_at):
+    self.path = path; self.filename = filename; self.file_type = file_type; self.file_size = file_size; self.modified_at = modified_at
+
+  def __repr__(self):
+    return f"ScannedFile('{self.path}', {self.file_size} bytes)"
+
+# Returns True if one of the globs matches the relative path ('/' as separator) or the name
+def matches_any_glob(relative_path, name, globs):
+  return any(fnmatch.fnmatch(relative_path, glob) or fnmatch.fnmatch(name, glob) for glob in globs)
+
+def scan_folder_path(folder_path, include_subfolders=True, include_file_types=["*"], include_globs=None, exclude_globs=None, max_file_size=None, max_workers=DEFAULT_SCAN_MAX_WORKERS):
   """
-  Recursively collect files from folder_path and return file information.
+  Generator over the files in folder_path, built on os.scandir(). Subfolders are scanned in parallel (max_workers threads)
+  and files are yielded as soon as their folder is scanned, so processing can start before the scan is finished.
+  Uses the stat results cached by os.scandir(): at most one stat call per file (none for type checks on most platforms).
+
+  Args:
+    folder_path: Path to the folder to scan
+    include_subfolders: Whether to scan subfolders (default: True)
+    include_file_types: List of file extensions to include (e.g., ["txt", "pdf"]) or ["*"] for all files (default: ["*"])
+    include_globs: Optional. Only files whose path relative to folder_path or name matches one of the globs (e.g. ["docs/*", "*.md"])
+    exclude_globs: Optional. Files and subfolders (with all their content) matching one of the globs are skipped (e.g. ["*.tmp", ".git"])
+    max_file_size: Optional. Files larger than this (bytes) are skipped
+
+  Yields:
+    ScannedFile records, in no particular order
+  """
+  folder_path = os.path.abspath(folder_path)
+  if not os.path.exists(folder_path): raise Exception(f"File '{folder_path}' does not exist.")
+  include_all_files = "*" in include_file_types
+  normalized_filetypes = set() if include_all_files else {t.lower().lstrip('.') for t in include_file_types}
+  include_globs = include_globs or []; exclude_globs = exclude_globs or []
+
+  # Scans one folder. Returns (files, subfolders).
+  def scan_folder(current_path):
+    files = []; subfolders = []
+    try:
+      with os.scandir(current_path) as entries:
+        for entry in entries:
+          relative_path = os.path.relpath(entry.path, folder_path).replace(os.sep, '/')
+          try:
+            if entry.is_dir(follow_symlinks=False):
+              if include_subfolders and not matches_any_glob(relative_path, entry.name, exclude_globs): subfolders.append(entry.path)
+              continue
+            if not entry.is_file(): continue
+            # Get file type from extension (handles multiple dots in filename)
+            file_type = entry.name.split('.')[-1].lower() if '.' in entry.name else ''
+            if not include_all_files and file_type not in normalized_filetypes: continue
+            if include_globs and not matches_any_glob(relative_path, entry.name, include_globs): continue
+            if exclude_globs and matches_any_glob(relative_path, entry.name, exclude_globs): continue
+            stat = entry.stat()
+            if max_file_size is not None and stat.st_size > max_file_size: continue
+            files.append(ScannedFile(entry.path, entry.name, file_type, stat.st_size, stat.st_mtime))
+          except OSError:
+            # Skip files that can't be accessed (lock files, permission issues, etc.)
+            print(f"  Skipping inaccessible file: {entry.name}")
+    except OSError as e:
+      print(f"  Skipping inaccessible folder: '{current_path}' -> {e}")
+    return files, subfolders
+
+  with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+    pending = {executor.submit(scan_folder, folder_path)}
+    while pending:
+      done, pending = wait(pending, return_when=FIRST_COMPLETED)
+      for future in done:
+        files, subfolders = future.result()
+        for subfolder in subfolders: pending.add(executor.submit(scan_folder, subfolder))
+        yield from files
+
+def collect_files_from_folder_path(folder_path, include_subfolders=True, include_file_types=["*"], include_globs=None, exclude_globs=None, max_file_size=None):
+  """
+  Recursively collect files from folder_path and return file information. Uses scan_folder_path().
   
   Args:
     folder_path: Path to the folder to collect files from
     include_subfolders: Whether to include files from subdirectories (default: True)
     include_filetypes: List of file extensions to include (e.g., ["txt", "pdf", "docx"]) or ["*"] for all files (default: ["*"])
+    include_globs, exclude_globs, max_file_size: Optional filters, see scan_folder_path()
   
   Returns:
     tuple: (files, files_metadata, files_data) where:
-      - files: list of file paths
+      - files: list of file paths, sorted
       - files_metadata: dict with file metadata for upload (key=file_path)
       - files_data: dict with file data not for upload (key=file_path)
   """
   files = []; files_metadata = {}; files_data = {}
-  
-  # normalize folder path
-  folder_path = os.path.abspath(folder_path) 
-  if not os.path.exists(folder_path):
-    raise Exception(f"File '{folder_path}' does not exist.")
-  
-  # Normalize file types for comparison (remove dots and convert to lowercase)
-  normalized_filetypes = []
-  include_all_files = "*" in include_file_types
-  if not include_all_files:
-    for filetype in include_file_types:
-      normalized_type = filetype.lower().lstrip('.')
-      normalized_filetypes.append(normalized_type)
-  
-  # Recursively walk through all subdirectories
-  for root, dirs, filenames in os.walk(folder_path):
-    # If include_subfolders is False, only process the root directory
-    if not include_subfolders and root != folder_path: continue
-      
-    for filename in filenames:
-      file_path = os.path.join(root, filename)
-      if os.path.isfile(file_path):
-        try:
-          # Get file type from extension (handles multiple dots in filename)
-          file_type = filename.split('.')[-1].lower() if '.' in filename else ''
-          
-          # Check if file type should be included
-          if not include_all_files and file_type not in normalized_filetypes: continue
-            
-          # Extract year from file's last modification date
-          mod_timestamp = os.path.getmtime(file_path)
-          last_modified = datetime.datetime.fromtimestamp(mod_timestamp).strftime('%Y-%m-%d')
-          file_size = os.path.getsize(file_path)
-          # Store file source path and metadata
-          files.append(file_path)
-          files_metadata[file_path] = { 'source': file_path, 'filename': filename, 'file_type': file_type }
-          files_data[file_path] = { 'file_size': file_size, 'last_modified': last_modified}
-        except (PermissionError, OSError) as e:
-          # Skip files that can't be accessed (lock files, permission issues, etc.)
-          print(f"  Skipping inaccessible file: {filename}")
-          continue
-  
+  scanned_files = sorted(scan_folder_path(folder_path, include_subfolders, include_file_types, include_globs, exclude_globs, max_file_size), key=lambda f: f.path)
+  for scanned_file in scanned_files:
+    # Store file source path and metadata
+    files.append(scanned_file.path)
+    files_metadata[scanned_file.path] = { 'source': scanned_file.path, 'filename': scanned_file.filename, 'file_type': scanned_file.file_type }
+    files_data[scanned_file.path] = { 'file_size': scanned_file.file_size, 'last_modified': datetime.datetime.fromtimestamp(scanned_file.modified_at).strftime('%Y-%m-%d') }
   return files, files_metadata, files_data
 
 
-def build_test_vector_store_by_adding_collected_files(client, vector_store, files, files_metadata, files_data, log_headers=True) -> VectorStoreFiles:
+# pipelined=True: concurrent uploads, files added to the vector store in file batches (see upload_files_to_vector_store())
+# With file_hash_cache_path, files whose content was uploaded before are reused instead of uploaded again (see
+# find_uploaded_files_by_content()). Off by default: reused files are shared with other vector stores, and deleting this
+# vector store with its files (delete_vector_store_by_id(client, id, True)) would delete them for the other vector stores too.
+def build_test_vector_store_by_adding_collected_files(client, vector_store, files, files_metadata, files_data, log_headers=True, pipelined=False, max_concurrency=DEFAULT_UPLOAD_MAX_CONCURRENCY, batch_size=DEFAULT_UPLOAD_BATCH_SIZE, file_hash_cache_path=None) -> VectorStoreFiles:
   function_name = 'Update test vector store from collected files'
   start_time = log_function_header(function_name) if log_headers else datetime.datetime.now()
 
@@ -97,6 +143,14 @@ def build_test_vector_store_by_adding_collected_files(client, vector_store, file
   failed_files = []
   do_not_retry_files = []
 
+  # Reuse files with unchanged content that are already in global storage (populates files_data[...]['file_id'])
+  reused_file_ids = set(); sha256_by_path = {}
+  if file_hash_cache_path:
+    file_ids_by_path, sha256_by_path = find_uploaded_files_by_content(client, [f for f in files_to_upload if not files_data[f].get('file_id')], file_hash_cache_path)
+    for file_path, file_id in file_ids_by_path.items(): files_data[file_path]['file_id'] = file_id
+    reused_file_ids = set(file_ids_by_path.values())
+    print(f"  Reusing {len(file_ids_by_path)} of {len(files_to_upload)} files already uploaded with the same content.")
+
   while attempt < max_retries:
     if attempt > 0:
       # Filter out non-retryable files and prepare for retry
@@ -107,49 +161,61 @@ def build_test_vector_store_by_adding_collected_files(client, vector_store, file
       print(f"\n  Retry attempt {attempt + 1} / {max_retries} for uploading {len(files_to_upload)} files...")
     else:
       print(f"  Uploading {len(files_to_upload)} files...")
-    for idx, file_path in enumerate(files_to_upload, 1):
-      # Step 1: Upload file, but only if not already uploaded
-      file_id = files_data[file_path].get('file_id') if files_data[file_path] else None
-      if not file_id:
-        try:
-          with open(file_path, 'rb') as f:
-            try:
-              vector_store_file = client.files.create(file=f, purpose="assistants")
-              if vector_store_file.id:
-                status = f"OK: Upload"
-                files_data[file_path]['file_id'] = vector_store_file.id
-              else:
-                status = f"FAIL: Upload"
+    if pipelined:
+      existing_file_ids = {f: files_data[f].get('file_id') for f in files_to_upload if files_data[f] and files_data[f].get('file_id')}
+      result = upload_files_to_vector_store(client, vector_store.id, files_to_upload, {f: files_metadata[f] for f in files_to_upload}, existing_file_ids, max_concurrency, batch_size)
+      for file_path, file_id in result.file_ids_by_path.items(): files_data[file_path]['file_id'] = file_id
+      for file_path, e in result.errors_by_path.items():
+        # Skip files that can't be opened (lock files, permission issues, etc.)
+        if isinstance(e, OSError): print(f"    SKIPPED: Cannot access file - {os.path.basename(file_path)}"); continue
+        # Error code: 400 - File type not supported; Error = 'unsupported_file'; do not retry
+        if getattr(e, 'status_code', None) == 400 and getattr(e, 'code', None) == 'unsupported_file': do_not_retry_files.append(file_path)
+        failed_files.append(file_path)
+      print(f"  {result}")
+    else:
+      for idx, file_path in enumerate(files_to_upload, 1):
+        # Step 1: Upload file, but only if not already uploaded
+        file_id = files_data[file_path].get('file_id') if files_data[file_path] else None
+        if not file_id:
+          try:
+            with open(file_path, 'rb') as f:
+              try:
+                vector_store_file = client.files.create(file=f, purpose="assistants")
+                if vector_store_file.id:
+                  status = f"OK: Upload"
+                  files_data[file_path]['file_id'] = vector_store_file.id
+                else:
+                  status = f"FAIL: Upload"
+                  failed_files.append(file_path)
+              except Exception as e:
+                status = f"FAIL: Upload '{file_path}' - {str(e)}"
                 failed_files.append(file_path)
-            except Exception as e:
-              status = f"FAIL: Upload '{file_path}' - {str(e)}"
-              failed_files.append(file_path)
-        except (PermissionError, OSError) as e:
-          # Skip files that can't be opened (lock files, permission issues, etc.)
-          status = f"SKIPPED: Cannot access file - {os.path.basename(file_path)}"
-          # Don't add to failed_files since this is expected for inaccessible files
-      else:
-        status = f"OK: Upload (skipped)"
-
-      # Step 2: Add file to vector store
-      file_id = files_data[file_path].get('file_id') if files_data[file_path] else None
-      if file_id:
-        try:
-          metadata = files_metadata[file_path]
-          retVal = client.vector_stores.files.create(vector_store_id=vector_store.id, file_id=file_id, attributes=metadata)
-          status += f", OK: Add to vector store ID={file_id} '{file_path}'"
-        except Exception as e:
-          # Error code: 400 - File type not supported; Error = 'unsupported_file'; do not retry
-          if e.status_code == 400 and e.code == 'unsupported_file':
-            do_not_retry_files.append(file_path)
-          status += f", FAIL: Add to vector store ID={file_id} '{file_path}' - {str(e)}"
-          failed_files.append(file_path)
-      print(f"    [ {idx} / {len(files_to_upload)} ] {status}")
+          except (PermissionError, OSError) as e:
+            # Skip files that can't be opened (lock files, permission issues, etc.)
+            status = f"SKIPPED: Cannot access file - {os.path.basename(file_path)}"
+            # Don't add to failed_files since this is expected for inaccessible files
+        else:
+          status = f"OK: Upload (skipped)"
+
+        # Step 2: Add file to vector store
+        file_id = files_data[file_path].get('file_id') if files_data[file_path] else None
+        if file_id:
+          try:
+            metadata = files_metadata[file_path]
+            retVal = client.vector_stores.files.create(vector_store_id=vector_store.id, file_id=file_id, attributes=metadata)
+            status += f", OK: Add to vector store ID={file_id} '{file_path}'"
+          except Exception as e:
+            # Error code: 400 - File type not supported; Error = 'unsupported_file'; do not retry
+            if e.status_code == 400 and e.code == 'unsupported_file':
+              do_not_retry_files.append(file_path)
+            status += f", FAIL: Add to vector store ID={file_id} '{file_path}' - {str(e)}"
+            failed_files.append(file_path)
+        print(f"    [ {idx} / {len(files_to_upload)} ] {status}")
 
     # Try to delete files globally that are marked as not retryable
     for file_path in do_not_retry_files:
       file_id = files_data[file_path].get('file_id') if files_data[file_path] else None
-      if file_id:
+      if file_id and file_id not in reused_file_ids:
         try: client.files.delete(file_id=file_id)
         except Exception as e: pass
     
@@ -157,27 +223,11 @@ def build_test_vector_store_by_adding_collected_files(client, vector_store, file
     # Otherwise delete them from vector store and add them to failed files
     print(f"  Verifying all vector store files are 'completed'...")
     
-    # Calculate max wait time and max status checks:
-    # for < 11 files -> 10 checks with 3 secs; for > 10 files -> 15 checks with 10 secs; for > 100 files -> 20 checks with 20 secs
-    max_status_checks, wait_time = (10, 3) if len(files_to_upload) < 11 else (15, 10) if len(files_to_upload) <= 100 else (20, 20)
-    # Exception: if HTML files are uploaded, adjust wait parameters based on HTML file count and size
-    # Reason: Large HTML files take much longer to process
-    html_files = [f for f in files_to_upload if f.lower().endswith('.html')]
-    if html_files:
-        html_count = len(html_files)
-        total_size_mb = sum(os.path.getsize(f) / (1024 * 1024) for f in html_files)
-        # Adjust max checks based on file count and size: at least number of HTML files, plus extra time for larger files
-        max_status_checks = max(max_status_checks, html_count + int(total_size_mb / 5))  # Add 1 check per 5MB
-        wait_time = max(wait_time, 10)  # Ensure at least 10 seconds wait for HTML files
-
-    status_check = 0; in_progress_files_count=0
-    while status_check < max_status_checks:
-      temp_vector_store = client.vector_stores.retrieve(vector_store.id)
-      in_progress_files_count = temp_vector_store.file_counts.in_progress
-      if in_progress_files_count == 0: break
-      print(f"    Waiting {wait_time} seconds ( {status_check + 1} / {max_status_checks} ) for {in_progress_files_count} files to complete...")
-      time.sleep(wait_time)
-      status_check += 1
+    # Adaptive polling (see StatusWatcher) with a deadline estimated from the sizes and types of the uploaded files
+    deadline_seconds = estimate_ingestion_deadline_seconds([(f, files_data[f].get('file_size', 0)) for f in files_to_upload if f in files_data])
+    result = wait_for_vector_store_ingestion(client, [vector_store.id], deadline_seconds)[vector_store.id]
+    if result.timed_out: print(f"    WARNING: {result.value.file_counts.in_progress if result.value else 'Unknown number of'} files still in progress after {format_milliseconds(int(result.elapsed_seconds * 1000))}.")
+    elif result.error: print(f"    WARNING: Failed to retrieve vector store ID={vector_store.id} -> {result.error}")
 
     vector_store_files = get_vector_store_files(client, vector_store)
     for vector_store_file in vector_store_files:
@@ -210,16 +260,21 @@ def build_test_vector_store_by_adding_collected_files(client, vector_store, file
       if file_id:
         try: client.vector_stores.files.delete(vector_store_id=vector_store.id, file_id=file_id)
         except Exception as e: pass
-        try: client.files.delete(file_id=file_id)
-        except Exception as e: pass
+        # Reused files can still be used by other vector stores
+        if file_id not in reused_file_ids:
+          try: client.files.delete(file_id=file_id)
+          except Exception as e: pass
       del files_data[file_path]
       del files_metadata[file_path]
       del files[files.index(file_path)]
 
+  # Remember the content hashes of uploaded files, so that the next run can reuse them
+  if file_hash_cache_path: update_file_hash_cache(client, {files_data[f]['file_id']: sha256_by_path[f] for f in files if f in sha256_by_path and files_data[f].get('file_id')}, file_hash_cache_path=file_hash_cache_path)
+
   log_function_footer(function_name, start_time)
   return VectorStoreFiles(vector_store, files, files_metadata, files_data)
 
-def create_test_vector_store_from_collected_files(client, vector_store_name, files, files_metadata, files_data, log_headers=True, chunk_size=800, chunk_overlap=400) -> VectorStoreFiles:
+def create_test_vector_store_from_collected_files(client, vector_store_name, files, files_metadata, files_data, log_headers=True, chunk_size=800, chunk_overlap=400, pipelined=False) -> VectorStoreFiles:
   function_name = 'Create test vector store from collected files'
   start_time = log_function_header(function_name) if log_headers else datetime.datetime.now()
 
@@ -234,18 +289,19 @@ def create_test_vector_store_from_collected_files(client, vector_store_name, fil
   }
   vector_store = client.vector_stores.create(name=vector_store_name, chunking_strategy=chunking_strategy)
   print(f"    OK. ID={vector_store.id}") if vector_store.id else print("  FAIL.")
+  get_vector_store_cache(client).put(vector_store, include_name=True)
 
-  vector_store_with_files = build_test_vector_store_by_adding_collected_files(client, vector_store, files, files_metadata, files_data, False)
+  vector_store_with_files = build_test_vector_store_by_adding_collected_files(client, vector_store, files, files_metadata, files_data, False, pipelined)
 
   if log_headers: log_function_footer(function_name, start_time)
   return vector_store_with_files
 
 # Creates a vector store and uploads files from the given folder recursively
-def create_test_vector_store_from_folder_path(client, vector_store_name, folder_path, include_subfolders=True, include_file_types=["*"], chunk_size=800, chunk_overlap=400) -> VectorStoreFiles:
+def create_test_vector_store_from_folder_path(client, vector_store_name, folder_path, include_subfolders=True, include_file_types=["*"], chunk_size=800, chunk_overlap=400, pipelined=False) -> VectorStoreFiles:
   function_name = 'Create test vector store from folder path'
   start_time = log_function_header(function_name)
   files, files_metadata, files_data = collect_files_from_folder_path(folder_path, include_subfolders=include_subfolders, include_file_types=include_file_types)
-  test_vector_store_with_files = create_test_vector_store_from_collected_files(client, vector_store_name, files, files_metadata, files_data, False, chunk_size, chunk_overlap)
+  test_vector_store_with_files = create_test_vector_store_from_collected_files(client, vector_store_name, files, files_metadata, files_data, False, chunk_size, chunk_overlap, pipelined)
   log_function_footer(function_name, start_time)
   return test_vector_store_with_files
 
@@ -1,12 +1,19 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass, field
 from dotenv import load_dotenv
 from openai_backendtools import *
+import hashlib
+import json
 import os
 import re
+import time
 
 load_dotenv()
 
 UNKNOWN = '[UNKNOWN]'
+DEFAULT_RECONSTRUCTION_MAX_WORKERS = 8
+# Written to the output folder. One JSON line per reconstructed file; the last line of a file ID wins.
+DEFAULT_RECONSTRUCTION_MANIFEST_FILENAME = "_reconstruction_manifest.jsonl"
 
 # ----------------------------------------------------- START: Data Classes --------------------------------------------------------
 
@@ -17,6 +24,9 @@ class RAGTextRetrievalParams:
   output_folder: str = "./output"
   output_suffix: str = ".reconstructed.md"
   log_headers: bool = True
+  max_workers: int = DEFAULT_RECONSTRUCTION_MAX_WORKERS
+  manifest_filename: str = DEFAULT_RECONSTRUCTION_MANIFEST_FILENAME
+  verify_hashes: bool = False  # True = resume also compares the SHA-256 of existing outputs with the manifest (reads every file)
 
 @dataclass
 class ChunkOverlapInfo:
@@ -24,6 +34,32 @@ class ChunkOverlapInfo:
   confidence: str  # "exact", "normalized", "none"
   detection_method: str = "suffix_prefix_match"
 
+# Per-file overlap statistics of stitch_chunks_with_pair_overlaps(): one detection per consecutive chunk pair
+@dataclass
+class ChunkOverlapStats:
+  pairs: int = 0
+  exact: int = 0
+  normalized: int = 0
+  none: int = 0
+  min_overlap_chars: int = 0
+  max_overlap_chars: int = 0
+  total_overlap_chars: int = 0
+
+  def add(self, overlap_info: ChunkOverlapInfo):
+    self.pairs += 1
+    setattr(self, overlap_info.confidence, getattr(self, overlap_info.confidence) + 1)
+    if overlap_info.confidence == "none": return
+    found = self.exact + self.normalized
+    self.min_overlap_chars = overlap_info.overlap_chars if found == 1 else min(self.min_overlap_chars, overlap_info.overlap_chars)
+    self.max_overlap_chars = max(self.max_overlap_chars, overlap_info.overlap_chars)
+    self.total_overlap_chars += overlap_info.overlap_chars
+
+  def __str__(self):
+    if self.pairs == 0: return "no chunk pairs"
+    overlap_range = f"{self.min_overlap_chars:,}" if self.min_overlap_chars == self.max_overlap_chars else f"{self.min_overlap_chars:,}-{self.max_overlap_chars:,}"
+    overlap_chars = f", {overlap_range} chars" if (self.exact + self.normalized) > 0 else ""
+    return f"{self.pairs} pair{'s' if self.pairs != 1 else ''}: {self.exact} exact, {self.normalized} normalized, {self.none} none{overlap_chars}"
+
 @dataclass
 class ReconstructionResult:
   filename: str
@@ -31,6 +67,34 @@ class ReconstructionResult:
   chunk_count: int
   reconstructed_bytes: int
   output_path: str
+  sha256: str = ''
+
+# Counts and throughput of retrieve_and_reconstruct_files(). Pass an instance as 'stats' to get it filled in.
+@dataclass
+class ReconstructionStats:
+  written: int = 0
+  skipped: int = 0
+  failed: int = 0
+  chunks: int = 0
+  bytes: int = 0
+  start_time: float = 0.0
+  end_time: float = 0.0
+
+  @property
+  def elapsed_seconds(self):
+    end_time = self.end_time if self.end_time else time.perf_counter()
+    return (end_time - self.start_time) if self.start_time else 0.0
+
+  @property
+  def files_per_second(self):
+    return (self.written / self.elapsed_seconds) if self.elapsed_seconds > 0 else 0.0
+
+  @property
+  def mb_per_second(self):
+    return (self.bytes / (1024 * 1024) / self.elapsed_seconds) if self.elapsed_seconds > 0 else 0.0
+
+  def __str__(self):
+    return f"{self.written:,} written, {self.skipped:,} skipped, {self.failed:,} failed, {self.chunks:,} chunks, {self.bytes:,} bytes in {format_milliseconds(int(self.elapsed_seconds * 1000))} ({self.files_per_second:.1f} files/sec, {self.mb_per_second:.2f} MB/sec)"
 
 # ----------------------------------------------------- END: Data Classes ----------------------------------------------------------
 
@@ -42,8 +106,12 @@ class ReconstructionResult:
 # the reconstructed text will be scrambled. Verify with your data if results seem wrong.
 
 # NOTE: Per-file chunking [RAGTR-RV-002]
-# If files were added to the vector store with different chunking strategies, the overlap
-# detected from the first file may be incorrect for others. Watch for "normalized" confidence.
+# Files can be added to a vector store with different chunking strategies, and token-based overlaps differ in
+# characters from pair to pair. Overlap is therefore detected for every chunk pair. Watch for "normalized" and
+# "none" pairs in the per-file overlap statistics.
+
+# Overlaps shorter than this are treated as accidental (e.g. a chunk ending with '.' and the next one starting with '.')
+DEFAULT_MIN_OVERLAP_CHARS = 100
 
 def normalize_whitespace(text):
   """Normalize whitespace for comparison: collapse multiple spaces, normalize line endings."""
@@ -56,54 +124,83 @@ def normalize_whitespace(text):
   text = re.sub(r'\n+', '\n', text)
   return text.strip()
 
-def detect_chunk_overlap(chunk_a_text, chunk_b_text, max_search_chars=8000):
+# One token per run of line breaks, run of spaces/tabs, or run of other characters
+WHITESPACE_NORMALIZATION_TOKEN_PATTERN = re.compile(r'[\r\n]+|[ \t]+|[^\r\n \t]+')
+
+def normalize_whitespace_with_offsets(text):
+  """
+  Same result as normalize_whitespace(), plus an offset map: offsets[i] is the index in 'text' of normalized character i.
+  A collapsed whitespace run maps to its first character. Single pass, O(n).
+  Returns (normalized_text, offsets).
+  """
+  if not text: return "", []
+  parts = []; offsets = []
+  for match in WHITESPACE_NORMALIZATION_TOKEN_PATTERN.finditer(text):
+    token = match.group(0); start = match.start()
+    if token[0] in '\r\n': parts.append('\n'); offsets.append(start)
+    elif token[0] in ' \t': parts.append(' '); offsets.append(start)
+    else: parts.append(token); offsets.extend(range(start, match.end()))
+  normalized = ''.join(parts)
+  # Strip like str.strip(), which also removes other whitespace (e.g. non-breaking spaces) at both ends
+  start = len(normalized) - len(normalized.lstrip()); end = len(normalized.rstrip())
+  return normalized[start:end], offsets[start:end]
+
+def get_prefix_function(pattern):
+  """KMP prefix function: pi[i] = length of the longest proper prefix of pattern[:i+1] that is also its suffix."""
+  pi = [0] * len(pattern); k = 0
+  for i in range(1, len(pattern)):
+    while k > 0 and pattern[i] != pattern[k]: k = pi[k - 1]
+    if pattern[i] == pattern[k]: k += 1
+    pi[i] = k
+  return pi
+
+def get_longest_suffix_prefix_overlap(text_a, text_b):
+  """
+  Returns the length of the longest suffix of text_a that is a prefix of text_b (KMP, O(len(text_a) + len(text_b))).
+  Example: get_longest_suffix_prefix_overlap("hello wor", "world") -> 3
+  """
+  if not text_a or not text_b: return 0
+  pattern = text_b[:len(text_a)]
+  pi = get_prefix_function(pattern); k = 0
+  # Scan text_a with the automaton of text_b's prefix. The state after the last character is the overlap.
+  for ch in text_a[len(text_a) - len(pattern):]:
+    while k > 0 and (k == len(pattern) or pattern[k] != ch): k = pi[k - 1]
+    if pattern[k] == ch: k += 1
+  return k
+
+def detect_chunk_overlap(chunk_a_text, chunk_b_text, max_search_chars=8000, min_overlap_chars=DEFAULT_MIN_OVERLAP_CHARS):
   """
   Detect overlap between two consecutive chunks using suffix-prefix matching.
   Returns ChunkOverlapInfo with overlap_chars, confidence, and detection_method.
   
   Algorithm:
-  1. Search for chunk_b's first N chars in chunk_a's tail region
-  2. If found, verify the full overlap matches
-  3. If exact match fails, try whitespace-normalized matching
+  1. Longest suffix of chunk_a's last max_search_chars chars that is a prefix of chunk_b (KMP prefix function)
+  2. If there is none of at least min_overlap_chars (or all of a shorter chunk_b), repeat on whitespace-normalized texts.
+     The normalized overlap is mapped back to chunk_b's original characters with the offset map, so 'overlap_chars'
+     is exact and not estimated.
   """
   if not chunk_a_text or not chunk_b_text:
     return ChunkOverlapInfo(overlap_chars=0, confidence="none")
   
-  # Step 1: Find candidate overlap by searching for chunk_b's prefix in chunk_a's suffix
-  search_prefix_len = min(100, len(chunk_b_text))
-  search_prefix = chunk_b_text[:search_prefix_len]
-  search_region = chunk_a_text[-max_search_chars:] if len(chunk_a_text) > max_search_chars else chunk_a_text
+  min_overlap_chars = min(min_overlap_chars, len(chunk_b_text))
+  search_region = chunk_a_text[-max_search_chars:]
   
-  # Try exact match first
-  idx = search_region.rfind(search_prefix)
-  if idx != -1:
-    # Calculate candidate overlap length
-    candidate_overlap = len(search_region) - idx
-    suffix_a = chunk_a_text[-candidate_overlap:]
-    prefix_b = chunk_b_text[:candidate_overlap]
-    
-    if suffix_a == prefix_b:
-      return ChunkOverlapInfo(overlap_chars=candidate_overlap, confidence="exact")
+  # Step 1: Exact match
+  overlap = get_longest_suffix_prefix_overlap(search_region, chunk_b_text[:max_search_chars])
+  if overlap >= min_overlap_chars:
+    return ChunkOverlapInfo(overlap_chars=overlap, confidence="exact", detection_method="prefix_function")
   
-  # Step 2: Try whitespace-normalized matching as fallback
-  norm_a = normalize_whitespace(chunk_a_text)
-  norm_b = normalize_whitespace(chunk_b_text)
-  norm_search_prefix = normalize_whitespace(search_prefix)
-  norm_search_region = norm_a[-max_search_chars:] if len(norm_a) > max_search_chars else norm_a
-  
-  idx = norm_search_region.rfind(norm_search_prefix)
-  if idx != -1:
-    # Found normalized match - now we need to find the corresponding original overlap
-    # This is approximate since normalization changes lengths
-    candidate_norm_overlap = len(norm_search_region) - idx
-    norm_suffix_a = norm_a[-candidate_norm_overlap:]
-    norm_prefix_b = norm_b[:candidate_norm_overlap]
-    
-    if norm_suffix_a == norm_prefix_b:
-      # Estimate original character overlap based on ratio
-      ratio = len(chunk_b_text) / len(norm_b) if len(norm_b) > 0 else 1.0
-      estimated_overlap = int(candidate_norm_overlap * ratio)
-      return ChunkOverlapInfo(overlap_chars=estimated_overlap, confidence="normalized")
+  # Step 2: Whitespace-normalized match as fallback
+  norm_a, _ = normalize_whitespace_with_offsets(search_region)
+  norm_b, offsets_b = normalize_whitespace_with_offsets(chunk_b_text[:max_search_chars])
+  norm_overlap = get_longest_suffix_prefix_overlap(norm_a, norm_b)
+  if norm_overlap > 0 and norm_overlap >= min(min_overlap_chars, len(norm_b)):
+    # End of the overlap in chunk_b = one after the original position of its last normalized character
+    overlap = offsets_b[norm_overlap - 1] + 1
+    # chunk_a's trailing whitespace was stripped by the normalization: the same whitespace in chunk_b belongs to the overlap
+    if search_region[-1].isspace():
+      while overlap < len(chunk_b_text) and chunk_b_text[overlap].isspace(): overlap += 1
+    return ChunkOverlapInfo(overlap_chars=overlap, confidence="normalized", detection_method="prefix_function_normalized")
   
   # No overlap found
   return ChunkOverlapInfo(overlap_chars=0, confidence="none")
@@ -113,29 +210,46 @@ def detect_chunk_overlap(chunk_a_text, chunk_b_text, max_search_chars=8000):
 
 # ----------------------------------------------------- START: Chunk Stitching -----------------------------------------------------
 
+def get_chunk_text(chunk):
+  return chunk.text if hasattr(chunk, 'text') else (chunk.get('text', '') if isinstance(chunk, dict) else str(chunk))
+
 def stitch_chunks(chunks, overlap_chars):
-  """Concatenate chunks by removing detected overlap from each subsequent chunk."""
+  """Concatenate chunks by removing the same overlap from each subsequent chunk."""
   if not chunks: return ""
   
-  # Get text from first chunk
-  first_chunk = chunks[0]
-  result = first_chunk.text if hasattr(first_chunk, 'text') else (first_chunk.get('text', '') if isinstance(first_chunk, dict) else str(first_chunk))
-  
-  if len(chunks) == 1: return result
-  
-  for i in range(1, len(chunks)):
-    chunk = chunks[i]
-    chunk_text = chunk.text if hasattr(chunk, 'text') else (chunk.get('text', '') if isinstance(chunk, dict) else str(chunk))
-    
+  # Collect the parts and join once at the end instead of growing one string
+  parts = [get_chunk_text(chunks[0])]
+  for chunk in chunks[1:]:
+    chunk_text = get_chunk_text(chunk)
     if not chunk_text: continue
     
     if overlap_chars > 0 and len(chunk_text) > overlap_chars:
-      result += chunk_text[overlap_chars:]
+      parts.append(chunk_text[overlap_chars:])
     else:
       # Fallback: no overlap removal, add with newline separator
-      result += "\n" + chunk_text
+      parts.append("\n" + chunk_text)
   
-  return result
+  return ''.join(parts)
+
+def stitch_chunks_with_pair_overlaps(chunks, max_search_chars=8000):
+  """
+  Concatenate chunks by detecting and removing the overlap of every consecutive chunk pair (detect_chunk_overlap()).
+  Works for files whose chunks overlap by varying amounts and for files with different chunking strategies.
+  Pairs without detected overlap are joined with a newline. Linear in the total text length.
+  Returns (text, ChunkOverlapStats).
+  """
+  overlap_stats = ChunkOverlapStats()
+  chunk_texts = [t for t in (get_chunk_text(c) for c in chunks or []) if t]
+  if not chunk_texts: return "", overlap_stats
+  
+  parts = [chunk_texts[0]]
+  for previous_text, chunk_text in zip(chunk_texts, chunk_texts[1:]):
+    overlap_info = detect_chunk_overlap(previous_text, chunk_text, max_search_chars)
+    overlap_stats.add(overlap_info)
+    if overlap_info.overlap_chars > 0: parts.append(chunk_text[overlap_info.overlap_chars:])
+    else: parts.append("\n" + chunk_text)
+  
+  return ''.join(parts), overlap_stats
 
 def get_filename_from_file(file_obj):
   """Extract filename from file object attributes, fallback to file ID."""
@@ -158,15 +272,81 @@ def get_filename_from_file(file_obj):
 # ----------------------------------------------------- END: Chunk Stitching -------------------------------------------------------
 
 
+# ----------------------------------------------------- START: Manifest ------------------------------------------------------------
+
+# Returns a dictionary file ID -> last manifest entry. A missing or partly written manifest yields the readable entries.
+def load_reconstruction_manifest(manifest_path):
+  entries = {}
+  if not os.path.exists(manifest_path): return entries
+  with open(manifest_path, 'r', encoding='utf-8') as f:
+    for line in f:
+      try: entry = json.loads(line)
+      except json.JSONDecodeError: continue
+      if entry.get('file_id'): entries[entry['file_id']] = entry
+  return entries
+
+def append_reconstruction_manifest_entry(manifest_file, result: ReconstructionResult):
+  entry = {'file_id': result.original_file_id, 'filename': result.filename, 'output_path': result.output_path, 'chunk_count': result.chunk_count, 'bytes': result.reconstructed_bytes, 'sha256': result.sha256, 'written_at': int(time.time())}
+  manifest_file.write(json.dumps(entry) + "\n"); manifest_file.flush()
+
+# True if the output recorded in the manifest entry still exists with the recorded size (and SHA-256 if verify_hash=True)
+def is_reconstruction_complete(entry, output_path, verify_hash=False):
+  if not entry or entry.get('output_path') != output_path or not os.path.exists(output_path): return False
+  if os.path.getsize(output_path) != entry.get('bytes'): return False
+  if verify_hash: return get_local_file_sha256(output_path) == entry.get('sha256')
+  return True
+
+# Writes text to a temporary file next to output_path and renames it, so an interrupted write never leaves a partial output
+def write_text_file_atomically(output_path, text, temp_suffix='.tmp'):
+  data = text.encode('utf-8')
+  temp_path = output_path + temp_suffix
+  with open(temp_path, 'wb') as f: f.write(data)
+  os.replace(temp_path, output_path)
+  return len(data), hashlib.sha256(data).hexdigest()
+
+# ----------------------------------------------------- END: Manifest --------------------------------------------------------------
+
+
 # ----------------------------------------------------- START: Main Functions ------------------------------------------------------
 
-def retrieve_and_reconstruct_files(client, params: RAGTextRetrievalParams):
+# Returns dictionary file ID -> output path. Files sharing a filename (compared case-insensitively, as on Windows and macOS)
+# get their file ID appended, e.g. 'report.pdf.file-abc123.reconstructed.md', so no two workers write the same output.
+def get_output_paths(files, output_folder, output_suffix):
+  files_by_filename = {}
+  for file in files: files_by_filename.setdefault(get_filename_from_file(file).lower(), []).append(file)
+  output_paths = {}
+  for files_with_same_name in files_by_filename.values():
+    for file in files_with_same_name:
+      filename = get_filename_from_file(file)
+      if len(files_with_same_name) > 1: filename += f".{file.id}"
+      output_paths[file.id] = os.path.join(output_folder, filename + output_suffix)
+  return output_paths
+
+def reconstruct_file(client, vector_store_id, file, output_path):
+  """
+  Retrieves the chunks of one vector store file, stitches them and writes the text atomically to output_path.
+  Overlap is detected for every chunk pair (stitch_chunks_with_pair_overlaps()).
+  Returns (ReconstructionResult, ChunkOverlapStats, total_chars). Raises on retrieval or write errors.
+  """
+  chunks = retry_on_openai_errors(lambda: get_vector_store_file_content(client, vector_store_id, file.id), indentation=6)
+  reconstructed_text, overlap_stats = stitch_chunks_with_pair_overlaps(chunks)
+  reconstructed_bytes, sha256 = write_text_file_atomically(output_path, reconstructed_text, temp_suffix=f".{file.id}.tmp")
+  result = ReconstructionResult(filename=get_filename_from_file(file), original_file_id=file.id, chunk_count=len(chunks), reconstructed_bytes=reconstructed_bytes, output_path=output_path, sha256=sha256)
+  return result, overlap_stats, sum(len(get_chunk_text(c)) for c in chunks)
+
+def retrieve_and_reconstruct_files(client, params: RAGTextRetrievalParams, stats: ReconstructionStats = None):
   """
   Main orchestration function: retrieve chunks from vector store and reconstruct files.
-  Returns list of ReconstructionResult.
+  Up to params.max_workers files are retrieved, stitched and written in parallel. Every output is written atomically
+  (temp file + rename) and recorded in a manifest in the output folder (file ID, chunk count, bytes, SHA-256).
+  A file is skipped only if the manifest says it was written and the output still has the recorded size (and hash
+  with params.verify_hashes), so outputs of an interrupted run are redone instead of being treated as complete.
+  Returns list of ReconstructionResult. Pass a ReconstructionStats object as 'stats' to get counts and throughput.
   """
   function_name = 'Retrieve and reconstruct files from vector store'
   start_time = log_function_header(function_name) if params.log_headers else None
+  if stats is None: stats = ReconstructionStats()
+  stats.start_time = time.perf_counter(); stats.end_time = 0.0
   
   print(f"  Vector store: '{params.vector_store_id}'")
   
@@ -184,6 +364,7 @@ def retrieve_and_reconstruct_files(client, params: RAGTextRetrievalParams):
   
   if not files_to_process:
     print(f"  No files to process.")
+    stats.end_time = time.perf_counter()
     if params.log_headers: log_function_footer(function_name, start_time)
     return []
   
@@ -192,83 +373,49 @@ def retrieve_and_reconstruct_files(client, params: RAGTextRetrievalParams):
     os.makedirs(params.output_folder)
     print(f"  Created output folder: '{params.output_folder}'")
   
-  # Step 4: Process each file immediately (write-early pattern)
-  # - Skip files that already exist on disk
-  # - Detect overlap from first multi-chunk file
-  # - Stitch and write immediately after retrieving each file's chunks
-  results = []
-  skipped_count = 0
-  total_chunks = 0
-  total_bytes = 0
-  overlap_info = ChunkOverlapInfo(overlap_chars=0, confidence="none")
-  overlap_detected = False
+  # Step 4: Skip files that the manifest records as complete
+  manifest_path = os.path.join(params.output_folder, params.manifest_filename)
+  manifest = load_reconstruction_manifest(manifest_path)
+  files_to_reconstruct = []
+  output_paths = get_output_paths(files_to_process, params.output_folder, params.output_suffix)
+  duplicate_count = sum(1 for file in files_to_process if os.path.basename(output_paths[file.id]) != get_filename_from_file(file) + params.output_suffix)
+  if duplicate_count > 0: print(f"  {duplicate_count} file{'s' if duplicate_count != 1 else ''} with the same filename as another file. File ID is appended to the output filename.")
+  for file in files_to_process:
+    output_path = output_paths[file.id]
+    if is_reconstruction_complete(manifest.get(file.id), output_path, params.verify_hashes): stats.skipped += 1
+    else: files_to_reconstruct.append((file, output_path))
+  if stats.skipped > 0: print(f"  Skipping {stats.skipped} file{'s' if stats.skipped != 1 else ''} already reconstructed (manifest: '{manifest_path}').")
   
-  print(f"  Processing {len(files_to_process)} file{'s' if len(files_to_process) != 1 else ''} (write-early)...")
+  # Step 5: Retrieve, stitch and write in parallel; results and manifest entries are recorded as files complete
+  results = []
+  print(f"  Processing {len(files_to_reconstruct)} file{'s' if len(files_to_reconstruct) != 1 else ''} with {params.max_workers} worker{'s' if params.max_workers != 1 else ''}...")
   
-  for file_idx, file in enumerate(files_to_process, 1):
-    filename = get_filename_from_file(file)
-    file_id = getattr(file, 'id', UNKNOWN) if file else UNKNOWN
-    
-    # Check if output already exists -> skip
-    output_filename = filename + params.output_suffix
-    output_path = os.path.join(params.output_folder, output_filename)
-    if os.path.exists(output_path):
-      print(f"    [ {file_idx} / {len(files_to_process)} ] '{filename}': SKIPPED (output exists)")
-      skipped_count += 1
-      continue
-    
-    # Retrieve chunks for this file
-    try:
-      chunks = get_vector_store_file_content(client, params.vector_store_id, file.id)
-    except Exception as e:
-      print(f"    [ {file_idx} / {len(files_to_process)} ] '{filename}': ERROR retrieving chunks: {e}")
-      continue
-    
-    chunk_count = len(chunks)
-    total_chars = sum(len(c.text) if hasattr(c, 'text') else len(c.get('text', '')) for c in chunks)
-    
-    # Detect overlap from first multi-chunk file (only once)
-    if not overlap_detected and chunk_count >= 2:
-      chunk_0_text = chunks[0].text if hasattr(chunks[0], 'text') else chunks[0].get('text', '')
-      chunk_1_text = chunks[1].text if hasattr(chunks[1], 'text') else chunks[1].get('text', '')
-      overlap_info = detect_chunk_overlap(chunk_0_text, chunk_1_text)
-      overlap_detected = True
-      print(f"    Overlap detected from '{filename}': {overlap_info.overlap_chars} chars (confidence: {overlap_info.confidence})")
-      if overlap_info.confidence == "normalized":
-        print(f"    WARNING: Overlap detected via whitespace normalization. Results may have minor duplicates.")
-    
-    # Stitch chunks together
-    reconstructed_text = stitch_chunks(chunks, overlap_info.overlap_chars)
-    reconstructed_bytes = len(reconstructed_text.encode('utf-8'))
-    
-    # Write immediately
-    try:
-      with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(reconstructed_text)
-    except Exception as e:
-      print(f"    [ {file_idx} / {len(files_to_process)} ] '{filename}': ERROR writing: {e}")
-      continue
-    
-    # Track results
-    result = ReconstructionResult(
-      filename=filename,
-      original_file_id=file_id,
-      chunk_count=chunk_count,
-      reconstructed_bytes=reconstructed_bytes,
-      output_path=output_path
-    )
-    results.append(result)
-    total_chunks += chunk_count
-    total_bytes += reconstructed_bytes
-    
-    # NOTE: PDF/DOCX quality depends on OpenAI's text extraction [RAGTR-RV-006]
-    file_ext = os.path.splitext(filename)[1].lower() if filename != UNKNOWN else ''
-    quality_warning = ' (text extraction quality may vary)' if file_ext in ['.pdf', '.docx', '.pptx', '.doc'] else ''
-    print(f"    [ {file_idx} / {len(files_to_process)} ] '{filename}': {chunk_count} chunks, {total_chars:,} chars -> {reconstructed_bytes:,} bytes -> '{output_path}'{quality_warning}")
+  with open(manifest_path, 'a', encoding='utf-8') as manifest_file, ThreadPoolExecutor(max_workers=max(1, params.max_workers)) as executor:
+    futures = {executor.submit(reconstruct_file, client, params.vector_store_id, file, output_path): (file, output_path) for file, output_path in files_to_reconstruct}
+    for file_idx, future in enumerate(as_completed(futures), 1):
+      file, output_path = futures[future]
+      filename = get_filename_from_file(file)
+      try:
+        result, overlap_stats, total_chars = future.result()
+      except Exception as e:
+        print(f"    [ {file_idx} / {len(files_to_reconstruct)} ] '{filename}': ERROR -> {e}")
+        stats.failed += 1
+        continue
+      append_reconstruction_manifest_entry(manifest_file, result)
+      results.append(result)
+      stats.written += 1; stats.chunks += result.chunk_count; stats.bytes += result.reconstructed_bytes
+      
+      overlap_msg = f", overlaps: {overlap_stats}" if overlap_stats.pairs > 0 else ''
+      # NOTE: PDF/DOCX quality depends on OpenAI's text extraction [RAGTR-RV-006]
+      file_ext = os.path.splitext(filename)[1].lower() if filename != UNKNOWN else ''
+      quality_warning = ' (text extraction quality may vary)' if file_ext in ['.pdf', '.docx', '.pptx', '.doc'] else ''
+      print(f"    [ {file_idx} / {len(files_to_reconstruct)} ] '{filename}': {result.chunk_count} chunks, {total_chars:,} chars{overlap_msg} -> {result.reconstructed_bytes:,} bytes -> '{output_path}'{quality_warning}")
+      if overlap_stats.normalized > 0:
+        print(f"      WARNING: Overlap of {overlap_stats.normalized} pair{'s' if overlap_stats.normalized != 1 else ''} detected via whitespace normalization. Results may have minor whitespace differences.")
   
   # Summary
-  skipped_msg = f", {skipped_count} skipped" if skipped_count > 0 else ""
-  print(f"  Summary: {len(results)} file{'s' if len(results) != 1 else ''} written, {total_chunks} chunk{'s' if total_chunks != 1 else ''}, {total_bytes:,} bytes{skipped_msg}")
+  stats.end_time = time.perf_counter()
+  print(f"  Summary: {stats}")
   
   if params.log_headers: log_function_footer(function_name, start_time)
   return results
@@ -292,6 +439,7 @@ if __name__ == '__main__':
     ,output_folder="./downloaded_rag_texts"
     ,output_suffix=".reconstructed.md"
     ,log_headers=True
+    ,max_workers=8
   )
 
   # Run reconstruction